@@ -27,6 +27,11 @@ logger.info(f"📊 Python version: {sys.version}")
 DATABASE_AVAILABLE = False
 try:
     from models import db, BuktiSetor
+    from bukti_setor.services.history import get_history_page
+    from bukti_setor.services.rekap import get_bukti_setor_summary
+    from bukti_setor.services.data_version import bump_data_version
+    from bukti_setor.services.bulk_save import bulk_save_bukti_setor
+    from bukti_setor.services.pagination import InvalidQueryParam
     logger.info("✅ Database models imported successfully")
     DATABASE_AVAILABLE = True
 except ImportError as e:
@@ -145,6 +150,20 @@ def save_bukti_setor():
     
     try:
         data = request.get_json()
+        
+        # List: bulk save (validasi seluruh payload, dedupe, satu INSERT multi-row)
+        if isinstance(data, list):
+            logger.info(f"📝 Bulk saving {len(data)} bukti setor")
+            results, summary = bulk_save_bukti_setor(
+                data, copy_threshold=int(os.getenv('BULK_SAVE_COPY_THRESHOLD', 5000))
+            )
+            return jsonify({
+                "status": "success",
+                "message": f"{summary['inserted']} bukti setor saved successfully!",
+                "summary": summary,
+                "results": results
+            }), 201 if summary["inserted"] else 200
+        
         logger.info(f"📝 Saving bukti setor: {data}")
         
         # Validate required fields
@@ -167,6 +186,7 @@ def save_bukti_setor():
         )
         
         db.session.add(new_record)
+        bump_data_version("bukti_setor")
         db.session.commit()
         
         logger.info(f"✅ Record saved successfully: {new_record.kode_setor}")
@@ -195,34 +215,20 @@ def get_bukti_setor_history():
         }), 500
     
     try:
-        # Get query parameters
-        tahun = request.args.get('tahun')
-        limit = min(int(request.args.get('limit', 20)), 100)  # Max 100 records
-        
-        # Build query
-        query = db.select(BuktiSetor).order_by(BuktiSetor.created_at.desc())
-        
-        # Apply filters
-        if tahun:
-            # Filter by year from tanggal field
-            query = query.where(db.extract('year', BuktiSetor.tanggal) == int(tahun))
-        
-        # Apply limit
-        query = query.limit(limit)
-        
-        results = db.session.execute(query).scalars().all()
-        data = [record.to_dict() for record in results]
+        # Keyset pagination + filter (tahun, bulan, tanggal_dari/sampai, kode_setor, jumlah_min/max, fields)
+        page = get_history_page(request.args, default_limit=20, max_limit=100)
         
         return jsonify({
             "status": "success",
             "message": "Data retrieved successfully",
-            "data": data,
-            "total": len(data),
-            "filters": {
-                "tahun": tahun
-            }
+            **page
         })
         
+    except InvalidQueryParam as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get history error: {str(e)}")
         return jsonify({
@@ -251,6 +257,7 @@ def delete_bukti_setor(bukti_setor_id):
         
         # Delete the record
         db.session.delete(record)
+        bump_data_version("bukti_setor")
         db.session.commit()
         
         logger.info(f"✅ Record deleted successfully: {bukti_setor_id}")
@@ -281,27 +288,21 @@ def get_summary():
     try:
         # Get current year
         current_year = datetime.now().year
-        tahun_filter = request.args.get('tahun', current_year)
-        
-        # Get summary statistics
-        total_count = db.session.execute(
-            db.text("SELECT COUNT(*) FROM bukti_setor WHERE EXTRACT(YEAR FROM tanggal) = :tahun"),
-            {"tahun": tahun_filter}
-        ).fetchone()[0]
-        
-        total_amount = db.session.execute(
-            db.text("SELECT COALESCE(SUM(jumlah), 0) FROM bukti_setor WHERE EXTRACT(YEAR FROM tanggal) = :tahun"),
-            {"tahun": tahun_filter}
-        ).fetchone()[0]
+        try:
+            tahun_filter = int(request.args.get('tahun', current_year))
+            bulan_filter = int(request.args['bulan']) if request.args.get('bulan') else None
+            # Dibaca dari rekap_bulanan (maksimal 12 baris), bukan scan bukti_setor
+            summary = get_bukti_setor_summary(tahun_filter, bulan_filter)
+        except ValueError:
+            return jsonify({
+                "status": "error",
+                "message": "tahun dan bulan (1-12) harus berupa angka"
+            }), 400
         
         return jsonify({
             "status": "success",
             "message": "Summary retrieved successfully",
-            "summary": {
-                "tahun": int(tahun_filter),
-                "total_bukti_setor": total_count,
-                "total_amount": float(total_amount) if total_amount else 0
-            }
+            "summary": summary
         })
         
     except Exception as e:
@@ -12,6 +12,7 @@ from config import Config
 from models import db, BuktiSetor
 from bukti_setor.routes import bukti_setor_bp, laporan_bp
 from bukti_setor.services.delete import delete_bukti_setor
+from bukti_setor.utils.warmup import start_background_preload, models_status
 
 # ========================================
 # FLASK APP INITIALIZATION
@@ -33,6 +34,11 @@ db.init_app(app)
 app.register_blueprint(bukti_setor_bp, url_prefix='/api')
 app.register_blueprint(laporan_bp, url_prefix='/api')
 
+# Preload model di thread background setiap worker (tanpa gunicorn --preload: torch /
+# EasyOCR tidak boleh dimuat di master sebelum fork), /ready menunggu sampai selesai
+if Config.PRELOAD_MODELS:
+    start_background_preload(Config.OCR_RPC_ADDRESS)
+
 # ========================================
 # HEALTH CHECK ENDPOINT
 # ========================================
@@ -46,6 +52,18 @@ def health_check():
         "version": "1.0.0"
     }), 200
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 200 hanya jika EasyOCR Reader dan kamus sudah dimuat"""
+    rpc_address = app.config.get('OCR_RPC_ADDRESS')
+    status = models_status(rpc_address, app.config.get('OCR_RPC_AUTHKEY'))
+    if not status["ready"]:
+        # Tanpa PRELOAD_MODELS: mulai muat model di background pada probe pertama;
+        # no-op selama thread preload (dengan retry) masih berjalan
+        start_background_preload(rpc_address)
+    status["status"] = "ready" if status["ready"] else "loading"
+    return jsonify(status), 200 if status["ready"] else 503
+
 # ========================================
 # SERVICE INFO ENDPOINT
 # ========================================
@@ -0,0 +1,148 @@
+"""
+Benchmark spellcheck per halaman OCR bukti setor: pyspellchecker (alur lama) vs SpellIndex
+
+Usage:
+    python bench_spellcheck.py [--repeat 5] [ocr_page.txt ...]
+
+Setiap file = teks OCR satu halaman, satu blok EasyOCR per baris (seperti debug
+"[🤖 DEBUG OCR-EasyOCR Input]"). Tanpa file, dipakai contoh halaman di bawah.
+Blok diproses persis seperti _build_page_result: lowercase, hanya blok > 2 karakter.
+Waktu SpellIndex diukur dua kali: cache dingin (halaman pertama kali dilihat) dan
+cache hangat (token sudah ada di LRU, kondisi normal setelah beberapa upload).
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+from bukti_setor.utils.spellcheck import (
+    KAMUS_PATH, correct_spelling, correct_word, get_spell_checker
+)
+
+SAMPLE_PAGES = [
+    """BUKTI PENERIMAAN NEGARA
+NTPN 0A1B2C3D4E5F6G7H
+Tanggal Buku 12 Maret 2024
+Tanggal Bayar 12-03-2024
+Kode Billing 123456789012345
+NPWP 01.234.567.8-431.000
+Nama Wajib Pajak PT UTAMA
+Kode Akun Pajak 411211
+Kode Jenis Setoran 100
+Masa Pajak 02022024
+Jumlah Setoran Rp 5.500.000
+Terbilang lima juta lima ratus ribu rupiah""",
+    """BANK MANDIRI
+Bukti Transfer / Setoran Pajak
+Tangal Transaksi 05/01/2025
+No Rekenig 1230004567890
+Nama Penerma KPP PRATAMA
+Jumah Rp 12.750.000,00
+Referensi 98765432
+Keterangn PPN masa desember
+NTPN ABCD1234EFGH5678""",
+    """SURAT SETORAN PAJAK
+Kode Akun Pajak 411121 Kode Jenis Setoran 402
+Uraian Pembayaran PPh pasal 21 bulan novembr
+Jumlah Pembayaran 3.250.000
+Tangal 15 November 2024
+Validasi Teller 0098
+Lembar ke-1 untuk Wajib Pajak""",
+]
+
+
+def load_pages(paths):
+    texts = list(SAMPLE_PAGES)
+    if paths:
+        texts = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                texts.append(f.read())
+    # Sama dengan cleaned_ocr di _build_page_result
+    return [
+        [block.strip().lower() for block in text.splitlines() if len(block.strip()) > 2]
+        for text in texts
+    ]
+
+
+def legacy_correct_spelling(spell, text):
+    """Alur lama: spell.correction() dua kali untuk setiap kata yang tidak dikenal"""
+    if not text or not text.strip():
+        return text
+    corrected_words = []
+    for word in text.split():
+        if word in spell or not spell.correction(word):
+            corrected_words.append(word)
+        else:
+            corrected_words.append(spell.correction(word))
+    return ' '.join(corrected_words)
+
+
+def time_pages(func, pages):
+    latencies = []
+    outputs = []
+    for blocks in pages:
+        started_at = time.perf_counter()
+        outputs.append([func(block) for block in blocks])
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return latencies, outputs
+
+
+def report(name, latencies):
+    print(
+        f"{name:22s} median {statistics.median(latencies):9.3f} ms/halaman | "
+        f"max {max(latencies):9.3f} ms | total {sum(latencies):10.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.files) * args.repeat
+    print(f"📄 {len(pages)} halaman ({sum(len(blocks) for blocks in pages)} blok teks)")
+
+    started_at = time.perf_counter()
+    get_spell_checker()
+    print(f"📚 SpellIndex dibangun dalam {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+    correct_word.cache_clear()
+    cold_latencies, outputs = time_pages(correct_spelling, pages[:len(pages) // args.repeat])
+    report("SpellIndex (cold)", cold_latencies)
+    warm_latencies, _ = time_pages(correct_spelling, pages)
+    report("SpellIndex (warm)", warm_latencies)
+    print(f"🗄️ {correct_word.cache_info()}")
+
+    try:
+        from spellchecker import SpellChecker
+    except ImportError:
+        print("⚠️ pyspellchecker tidak terpasang, perbandingan dengan alur lama dilewati")
+        return 0
+
+    spell = SpellChecker(language=None, case_sensitive=False)
+    spell.word_frequency.load_text_file(KAMUS_PATH)
+    legacy_latencies, legacy_outputs = time_pages(
+        lambda block: legacy_correct_spelling(spell, block), pages[:len(pages) // args.repeat]
+    )
+    report("pyspellchecker", legacy_latencies)
+    print(f"⚡ Speedup median: {statistics.median(legacy_latencies) / statistics.median(warm_latencies):.1f}x (warm), "
+          f"{statistics.median(legacy_latencies) / statistics.median(cold_latencies):.1f}x (cold)")
+
+    total = same = 0
+    for legacy_blocks, new_blocks in zip(legacy_outputs, outputs):
+        for legacy, new in zip(legacy_blocks, new_blocks):
+            total += 1
+            if legacy == new:
+                same += 1
+            else:
+                print(f"  ↔️ lama: {legacy!r}\n     baru: {new!r}")
+    print(f"🔍 Output identik: {same}/{total} blok "
+          f"(beda yang diharapkan: token berdigit tidak dikoreksi, kandidat seri dipilih alfabetis)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
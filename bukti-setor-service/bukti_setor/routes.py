@@ -6,9 +6,12 @@
 # ==============================================================================
 
 import os
+import json
+import tempfile
 import traceback
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, Response, stream_with_context
 from datetime import datetime
+from werkzeug.utils import secure_filename
 from models import BuktiSetor, db
 
 # shared_utils
@@ -16,12 +19,17 @@ from shared_utils.text_utils import clean_transaction_value
 from shared_utils.file_utils import allowed_file, is_valid_image
 
 # local utils
-from bukti_setor.utils.bukti_setor_processor import extract_bukti_setor_data
+from bukti_setor.utils.bukti_setor_processor import extract_bukti_setor_data, iter_bukti_setor_results, get_total_pages
 from bukti_setor.utils.parsing.kode_setor import parse_kode_setor
 from bukti_setor.utils.parsing.tanggal import parse_tanggal
 from bukti_setor.utils.parsing.jumlah import parse_jumlah
 from bukti_setor.utils.helpers import simpan_preview_image      
 from bukti_setor.services.delete import delete_bukti_setor
+from bukti_setor.services.data_version import bump_data_version
+from bukti_setor.services.bulk_save import bulk_save_bukti_setor
+from bukti_setor.services.history import get_history_page
+from bukti_setor.services.rekap import get_bukti_setor_summary
+from bukti_setor.services.pagination import InvalidQueryParam
 from bukti_setor.services.excel_exporter_bukti_setor import generate_excel_bukti_setor_export  
 # ==============================================================================
 # Blueprints
@@ -76,36 +84,84 @@ def process_bukti_setor_endpoint():
             os.remove(filepath)
             print(f"🗑️ [DEBUG] Cleanup: file {filepath} removed")
 
+# ========== ENDPOINT: PROCESS STREAMING (NDJSON) ==========
+@bukti_setor_bp.route('/process-stream', methods=['POST'])
+def process_bukti_setor_stream():
+    """
+    Sama seperti /process tapi hasil dikirim per halaman sebagai NDJSON:
+    {"type": "meta", ...}, {"type": "page", "result": {...}} per halaman, lalu {"type": "done", ...}
+    """
+    if 'file' not in request.files:
+        return jsonify(error="File tidak ditemukan"), 400
+    
+    file = request.files['file']
+    filename = secure_filename(file.filename or '')
+    if not filename or not allowed_file(filename):
+        return jsonify(error="Tipe file tidak didukung"), 400
+    
+    # Nama file sementara unik di upload folder (nama upload tidak pernah jadi path)
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    fd, filepath = tempfile.mkstemp(dir=upload_folder, suffix=f"_{filename}")
+    with os.fdopen(fd, 'wb') as f:
+        file.save(f)
+    poppler_path = current_app.config.get('POPPLER_PATH')
+
+    def remove_upload():
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    try:
+        total_pages = get_total_pages(filepath, poppler_path)
+    except Exception as e:
+        remove_upload()
+        current_app.logger.error(f"Error reading bukti setor file: {e}")
+        return jsonify(error=str(e)), 400
+
+    def generate():
+        processed = 0
+        try:
+            yield json.dumps({"type": "meta", "filename": filename, "total_halaman": total_pages}) + "\n"
+            for formatted_result in iter_bukti_setor_results(filepath, poppler_path, total_pages):
+                processed += 1
+                yield json.dumps({"type": "page", "result": formatted_result}) + "\n"
+            yield json.dumps({"type": "done", "total_halaman": total_pages, "processed": processed}) + "\n"
+        except Exception as e:
+            current_app.logger.error(f"Error streaming bukti setor: {e}\n{traceback.format_exc()}")
+            yield json.dumps({"type": "error", "error": str(e), "processed": processed}) + "\n"
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Dipanggil saat response ditutup: selesai normal, client putus, atau sebelum generator mulai
+    response.call_on_close(remove_upload)
+    return response
+
 # ========== ENDPOINT: SIMPAN KE DB ==========
 @bukti_setor_bp.route('/save', methods=['POST'])
 def save_bukti_setor_endpoint():
     data = request.get_json()
-    print("🚀 Data diterima di backend:", data)
+    print("🚀 Data diterima di backend:", f"{len(data)} item" if isinstance(data, list) else data)
 
     try:
-        # Support untuk bulk save (multiple records)
+        # Bulk save: validasi seluruh payload, dedupe, satu INSERT multi-row
         if isinstance(data, list):
-            saved_count = 0
-            for item in data:
-                kode_setor = item.get('kode_setor')
-                tanggal = item.get('tanggal')
-                jumlah = item.get('jumlah')
-
-                if not all([kode_setor, tanggal, jumlah]):
-                    print(f"⚠️ Skipping incomplete record: {item}")
-                    continue
-
-                tanggal_obj = datetime.strptime(tanggal, '%Y-%m-%d').date()
-                new_record = BuktiSetor(
-                    tanggal=tanggal_obj,
-                    kode_setor=str(kode_setor),
-                    jumlah=float(jumlah)
-                )
-                db.session.add(new_record)
-                saved_count += 1
-            
-            db.session.commit()
-            return jsonify(message=f"{saved_count} bukti setor berhasil disimpan!"), 201
+            strict = request.args.get('strict', 'false').lower() == 'true'
+            results, summary = bulk_save_bukti_setor(
+                data, strict=strict, copy_threshold=current_app.config.get('BULK_SAVE_COPY_THRESHOLD', 5000)
+            )
+            if strict and summary["invalid"]:
+                return jsonify(
+                    error=f"{summary['invalid']} item tidak valid, tidak ada data yang disimpan",
+                    summary=summary, results=results
+                ), 422
+            return jsonify(
+                message=f"{summary['inserted']} bukti setor berhasil disimpan!",
+                summary=summary, results=results
+            ), 201 if summary["inserted"] else 200
         
         # Single record save
         else:
@@ -123,6 +179,7 @@ def save_bukti_setor_endpoint():
                 jumlah=float(jumlah)
             )
             db.session.add(new_record)
+            bump_data_version("bukti_setor")
             db.session.commit()
             return jsonify(message="Data bukti setor berhasil disimpan!"), 201
             
@@ -134,20 +191,34 @@ def save_bukti_setor_endpoint():
 # ========== ENDPOINT: AMBIL DATA HISTORY ==========
 @bukti_setor_bp.route('/history', methods=['GET'])
 def get_bukti_setor_history():
+    """
+    History bukti setor per halaman (keyset, urut created_at terbaru).
+    Halaman berikutnya: kirim ulang filter yang sama + cursor=<next_cursor>.
+    """
     try:
-        results = db.session.execute(db.select(BuktiSetor).order_by(BuktiSetor.tanggal.desc())).scalars().all()
-        data = [{
-            "id": row.id,
-            "kode_setor": row.kode_setor,
-            "tanggal": row.tanggal.strftime("%Y-%m-%d"),
-            "jumlah": float(row.jumlah),
-            "created_at": row.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        } for row in results]
-        return jsonify(message="Data berhasil diambil.", data=data), 200
+        page = get_history_page(request.args)
+        return jsonify(message="Data berhasil diambil.", **page), 200
+    except InvalidQueryParam as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching history: {e}\n{traceback.format_exc()}")
         return jsonify(error="Gagal mengambil data."), 500
 
+# ========== ENDPOINT: SUMMARY PER BULAN ==========
+@bukti_setor_bp.route('/summary', methods=['GET'])
+def get_bukti_setor_summary_route():
+    """Total dan rincian per bulan dari rekap_bulanan: ?tahun=2024[&bulan=3]"""
+    try:
+        tahun = int(request.args.get('tahun', datetime.now().year))
+        bulan = int(request.args['bulan']) if request.args.get('bulan') else None
+        summary = get_bukti_setor_summary(tahun, bulan)
+    except ValueError:
+        return jsonify(error="tahun dan bulan (1-12) harus berupa angka"), 400
+    except Exception as e:
+        current_app.logger.error(f"Error fetching summary: {e}\n{traceback.format_exc()}")
+        return jsonify(error="Gagal mengambil summary."), 500
+    return jsonify(message="Summary berhasil diambil.", summary=summary), 200
+
 # ========== ENDPOINT: DELETE DATA ==========
 @bukti_setor_bp.route('/delete/<int:id>', methods=["DELETE"])
 def delete_bukti_setor_route(id):
@@ -156,4 +227,5 @@ def delete_bukti_setor_route(id):
 # ========== ENDPOINT: EXPORT EXCEL ==========
 @laporan_bp.route("/api/export_bukti_setor", methods=["GET"])
 def export_bukti_setor():
-    return generate_excel_bukti_setor_export(db)
+    """Export Excel, filter opsional sama dengan /history: ?tahun=2024&bulan=3&kode_setor=411211"""
+    return generate_excel_bukti_setor_export(db, request.args)
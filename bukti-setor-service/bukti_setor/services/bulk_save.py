@@ -0,0 +1,165 @@
+# bukti_setor/services/bulk_save.py
+
+import io
+import csv
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from models import db, BuktiSetor
+from bukti_setor.services.data_version import bump_data_version
+
+JUMLAH_MAX = Decimal("1e13")  # Numeric(15, 2)
+KODE_SETOR_MAX_LENGTH = 100
+DEDUPE_LOOKUP_CHUNK_SIZE = 1000
+
+
+def _validate_item(item):
+    """Satu item payload -> (row, None) atau (None, daftar error)"""
+    if not isinstance(item, dict):
+        return None, ["item harus berupa object"]
+
+    errors = []
+    kode_setor = str(item.get("kode_setor") or "").strip()
+    if not kode_setor:
+        errors.append("kode_setor wajib diisi")
+    elif len(kode_setor) > KODE_SETOR_MAX_LENGTH:
+        errors.append(f"kode_setor maksimal {KODE_SETOR_MAX_LENGTH} karakter")
+
+    tanggal = item.get("tanggal")
+    try:
+        tanggal = date.fromisoformat(tanggal)
+    except (TypeError, ValueError):
+        errors.append("tanggal harus berformat YYYY-MM-DD")
+
+    try:
+        jumlah = Decimal(str(item.get("jumlah"))).quantize(Decimal("0.01"))
+        if not 0 < jumlah < JUMLAH_MAX:
+            errors.append("jumlah harus lebih dari 0 dan kurang dari 10^13")
+    except (InvalidOperation, ValueError):
+        errors.append("jumlah harus berupa angka")
+
+    if errors:
+        return None, errors
+    return {"kode_setor": kode_setor, "tanggal": tanggal, "jumlah": jumlah}, None
+
+
+def _dedupe_key(row):
+    return row["kode_setor"], row["tanggal"], row["jumlah"]
+
+
+def _existing_ids(keys):
+    """(kode_setor, tanggal, jumlah) yang sudah ada di database -> id"""
+    existing = {}
+    keys = list(keys)
+    for start in range(0, len(keys), DEDUPE_LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + DEDUPE_LOOKUP_CHUNK_SIZE]
+        rows = db.session.execute(
+            db.select(BuktiSetor.id, BuktiSetor.kode_setor, BuktiSetor.tanggal, BuktiSetor.jumlah)
+            .where(db.tuple_(BuktiSetor.kode_setor, BuktiSetor.tanggal, BuktiSetor.jumlah).in_(chunk))
+        )
+        for row in rows:
+            existing.setdefault((row.kode_setor, row.tanggal, Decimal(row.jumlah).quantize(Decimal("0.01"))), row.id)
+    return existing
+
+
+def _insert_returning(rows):
+    """
+    executemany INSERT ... RETURNING id: SQLAlchemy menggabungkannya menjadi
+    INSERT multi-row (insertmanyvalues, 1000 baris per statement) dengan urutan id
+    sesuai urutan rows
+    """
+    stmt = db.insert(BuktiSetor).returning(BuktiSetor.id, sort_by_parameter_order=True)
+    return list(db.session.execute(stmt, rows).scalars())
+
+
+def _copy_insert(rows):
+    """
+    Batch sangat besar di PostgreSQL: id diambil dulu dari sequence, lalu semua baris
+    dikirim dengan satu COPY FROM STDIN di transaksi yang sama (trigger rekap tetap jalan)
+    """
+    ids = list(db.session.execute(
+        db.text("SELECT nextval(pg_get_serial_sequence('bukti_setor', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(rows)}
+    ).scalars())
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_id, row in zip(ids, rows):
+        writer.writerow([row_id, row["tanggal"].isoformat(), row["kode_setor"], row["jumlah"], row["created_at"].isoformat()])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY bukti_setor (id, tanggal, kode_setor, jumlah, created_at) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return ids
+
+
+def bulk_save_bukti_setor(items, strict=False, copy_threshold=5000):
+    """
+    Simpan list bukti setor dalam satu transaksi.
+    1. Semua item divalidasi dulu; strict=True -> tidak ada yang disimpan jika ada item invalid
+    2. Duplikat (kode_setor, tanggal, jumlah) di payload maupun di database dilewati
+    3. Sisanya di-insert sekaligus (COPY jika jumlahnya >= copy_threshold di PostgreSQL)
+    Return (results per item sesuai urutan payload, ringkasan jumlah per status)
+    """
+    results = []
+    to_insert = []
+    seen = {}
+    for index, item in enumerate(items):
+        row, errors = _validate_item(item)
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+            continue
+        key = _dedupe_key(row)
+        if key in seen:
+            results.append({"index": index, "status": "duplicate", "duplicate_of_index": seen[key]})
+            continue
+        seen[key] = index
+        results.append({"index": index, "status": "pending"})
+        to_insert.append((index, row))
+
+    invalid_count = sum(1 for result in results if result["status"] == "invalid")
+    if strict and invalid_count:
+        for result in results:
+            if result["status"] != "invalid":
+                result["status"] = "skipped"
+        return results, _summary(results)
+
+    existing = _existing_ids(seen) if to_insert else {}
+    rows = []
+    indexes = []
+    created_at = datetime.utcnow()
+    for index, row in to_insert:
+        existing_id = existing.get(_dedupe_key(row))
+        if existing_id is not None:
+            results[index] = {"index": index, "status": "duplicate", "id": existing_id}
+            continue
+        rows.append({**row, "created_at": created_at})
+        indexes.append(index)
+
+    if rows:
+        try:
+            if db.engine.dialect.name == "postgresql" and len(rows) >= copy_threshold:
+                ids = _copy_insert(rows)
+            else:
+                ids = _insert_returning(rows)
+            bump_data_version("bukti_setor")
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for index, row_id in zip(indexes, ids):
+            results[index] = {"index": index, "status": "inserted", "id": row_id}
+
+    return results, _summary(results)
+
+
+def _summary(results):
+    summary = {"total": len(results), "inserted": 0, "duplicate": 0, "invalid": 0, "skipped": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    return summary
@@ -0,0 +1,35 @@
+# bukti_setor/services/data_version.py
+
+from datetime import datetime
+from models import db, DataVersion
+
+
+def _dialect_insert():
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def bump_data_version(nama="bukti_setor"):
+    """
+    Naikkan versi data di session aktif (tanpa commit): panggil sebelum db.session.commit()
+    pada save/delete supaya versi dan perubahan data ter-commit bersamaan
+    """
+    insert = _dialect_insert()
+    now = datetime.utcnow()
+    stmt = insert(DataVersion).values(nama=nama, versi=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["nama"],
+        set_={"versi": DataVersion.versi + 1, "updated_at": now}
+    )
+    db.session.execute(stmt)
+
+
+def get_data_version(nama="bukti_setor"):
+    """Versi data saat ini (0 jika belum pernah ada save/delete)"""
+    versi = db.session.execute(
+        db.select(DataVersion.versi).where(DataVersion.nama == nama)
+    ).scalar()
+    return versi or 0
@@ -2,6 +2,7 @@
 
 from flask import jsonify
 from models import db  # penting! karena lo butuh akses session
+from bukti_setor.services.data_version import bump_data_version
 
 def delete_bukti_setor(id):
     from models import BuktiSetor  # import di sini biar tidak circular
@@ -11,5 +12,6 @@ def delete_bukti_setor(id):
         return jsonify(message="Data bukti setor tidak ditemukan"), 404
 
     db.session.delete(bukti)
+    bump_data_version("bukti_setor")  # cache export jadi usang
     db.session.commit()
     return jsonify(message="Bukti setor berhasil dihapus!"), 200
@@ -1,66 +1,147 @@
 ## backend/bukti_setor/services/excel_exporter_bukti_setor.py
 # # ==============================================================================
 
-import os
 import tempfile
-from flask import send_file, jsonify
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Alignment, Border, Font, Side
+from flask import send_file, jsonify, request, current_app, Response
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Font, NamedStyle, Side
+from models import BuktiSetor
+from bukti_setor.services.history import build_history_filters
+from bukti_setor.services.pagination import InvalidQueryParam
+from bukti_setor.services.data_version import get_data_version
+from bukti_setor.services.export_cache import export_etag, cached_export_path, store_export
 # ==============================================================================
 # File: backend/bukti_setor/services/excel_exporter_bukti_setor.py
 
-def generate_excel_bukti_setor_export(db):
+# Kolom sama dengan templates/rekap_template_bukti_setor.xlsx: (judul, lebar kolom)
+EXPORT_COLUMNS = (
+    ("Kode Setor", 14),
+    ("Tanggal", 20.75),
+    ("Jumlah", 18),
+    ("Dibuat pada", 34.38),
+)
+EXPORT_BATCH_SIZE = 1000             # baris per fetch dari server-side cursor
+EXPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024  # file xlsx lebih besar dari ini dipindah ke disk
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _named_styles():
+    """Style dibuat sekali per workbook dan dipakai bersama semua cell (bukan Border baru per cell)"""
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    return {
+        "header": NamedStyle(name="bs_header", font=Font(bold=True), border=border),
+        "text": NamedStyle(name="bs_text", border=border),
+        "date": NamedStyle(name="bs_date", border=border, number_format="yyyy-mm-dd"),
+        "amount": NamedStyle(name="bs_amount", border=border, number_format="#,##0.00"),
+        "datetime": NamedStyle(name="bs_datetime", border=border, number_format="yyyy-mm-dd hh:mm:ss"),
+    }
+
+
+def _styled_cell(ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def write_bukti_setor_workbook(db, args, output):
+    """
+    Tulis rekap bukti setor ke output (path / file object) dengan workbook write-only:
+    baris dibaca per EXPORT_BATCH_SIZE dari server-side cursor dan langsung ditulis,
+    jadi memory tidak bergantung jumlah baris. Filter sama dengan /history
+    (tahun, bulan, tanggal_dari, tanggal_sampai, kode_setor, jumlah_min, jumlah_max).
+    Return (jumlah baris, filter yang dipakai)
+    """
+    conditions, filters = build_history_filters(args)
+
+    wb = Workbook(write_only=True)
+    styles = _named_styles()
+    for style in styles.values():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("Sheet1")
+    for index, (_, width) in enumerate(EXPORT_COLUMNS):
+        ws.column_dimensions[chr(ord("A") + index)].width = width
+    ws.freeze_panes = "A2"
+    ws.append([_styled_cell(ws, title, styles["header"].name) for title, _ in EXPORT_COLUMNS])
+
+    query = (
+        db.select(BuktiSetor.kode_setor, BuktiSetor.tanggal, BuktiSetor.jumlah, BuktiSetor.created_at)
+        .where(*conditions)
+        .order_by(BuktiSetor.tanggal.desc(), BuktiSetor.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    total = 0
+    for kode_setor, tanggal, jumlah, created_at in db.session.execute(query):
+        ws.append([
+            _styled_cell(ws, kode_setor, styles["text"].name),
+            _styled_cell(ws, tanggal, styles["date"].name),
+            _styled_cell(ws, float(jumlah), styles["amount"].name),
+            _styled_cell(ws, created_at, styles["datetime"].name),
+        ])
+        total += 1
+
+    wb.save(output)
+    return total, filters
+
+
+def _spooled_workbook(db, args):
+    # Buffer di memory; hanya export besar yang di-spill ke disk dan dihapus saat ditutup
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
     try:
-        from models import BuktiSetor  # Pastikan model ini diimpor dari tempat yang benar
-
-        BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        template_path = os.path.join(BASE_DIR, "templates", "rekap_template_bukti_setor.xlsx")
-        template_path = os.path.normpath(template_path)
-        
-        print(f"[DEBUG] Path template bukti setor: {template_path}")
-        print(f"[DEBUG] Exists? {os.path.exists(template_path)}")
-        # Cek apakah template ada
-        if not os.path.exists(template_path):
-            return jsonify(error=f"Template tidak ditemukan di path: {template_path}"), 404
-
-        wb = load_workbook(template_path)
-        ws = wb.active
-
-        # Ambil data dari database
-        data = db.session.execute(
-            db.select(BuktiSetor).order_by(BuktiSetor.tanggal.desc())
-        ).scalars().all()
-
-        thin_border = Border(
-            left=Side(style="thin"),
-            right=Side(style="thin"),
-            top=Side(style="thin"),
-            bottom=Side(style="thin"),
-        )
+        write_bukti_setor_workbook(db, args, buffer)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
 
-        start_row = 2  # Anggap template punya judul di baris 1-2
-        for idx, item in enumerate(data, start=start_row):
-            ws.cell(row=idx, column=1, value=item.tanggal.strftime("%Y-%m-%d")).border = thin_border
-            ws.cell(row=idx, column=2, value=item.kode_setor).border = thin_border
 
-            jumlah_cell = ws.cell(row=idx, column=3, value=float(item.jumlah))
-            jumlah_cell.number_format = "#,##0.00"
-            jumlah_cell.border = thin_border
+def generate_excel_bukti_setor_export(db, args=None):
+    """
+    Export dengan ETag = hash(filter, versi data). Versi dibaca sebelum data, jadi
+    file yang di-cache tidak pernah lebih lama dari versinya. Client dengan
+    If-None-Match yang cocok mendapat 304; export yang sama dari client lain
+    dilayani dari file cache tanpa query data.
+    """
+    args = args or {}
+    try:
+        _, filters = build_history_filters(args)
+        etag = export_etag("bukti_setor_xlsx", filters, get_data_version("bukti_setor"))
 
-            ws.cell(row=idx, column=4, value=item.created_at.strftime("%Y-%m-%d %H:%M:%S")).border = thin_border
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
 
-        # Simpan ke file sementara
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-        wb.save(temp.name)
-        print(f"[✅] Export Bukti Setor berhasil ke: {temp.name}")
+        cache_dir = current_app.config.get("EXPORT_CACHE_DIR")
+        cache_status = "bypass"
+        if cache_dir:
+            output = cached_export_path(cache_dir, etag, ".xlsx")
+            cache_status = "hit" if output else "miss"
+            if output is None:
+                output = store_export(
+                    cache_dir, etag, ".xlsx",
+                    lambda f: write_bukti_setor_workbook(db, args, f),
+                    current_app.config.get("EXPORT_CACHE_MAX_FILES", 50)
+                )
+        else:
+            output = _spooled_workbook(db, args)
+        print(f"[✅] Export Bukti Setor ({cache_status}), filter {filters}")
 
-        return send_file(
-            temp.name,
+        # send_file mengalirkan file/buffer ke client lalu menutupnya
+        response = send_file(
+            output,
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
-            download_name="rekap_bukti_setor.xlsx"
+            download_name="rekap_bukti_setor.xlsx",
+            etag=etag
         )
+        response.headers["X-Export-Cache"] = cache_status
+        return response
 
+    except InvalidQueryParam as e:
+        return jsonify(error=str(e)), 400
     except Exception as e:
         print(f"[❌] Error generate Excel Bukti Setor: {e}")
         return jsonify({"error": str(e)}), 500
-
@@ -0,0 +1,70 @@
+# bukti_setor/services/export_cache.py
+
+import os
+import json
+import hashlib
+import tempfile
+
+# Naikkan jika layout file export berubah, supaya file cache lama tidak dipakai lagi
+EXPORT_LAYOUT_VERSION = 1
+
+
+def export_etag(kind, filters, data_version):
+    """ETag deterministik dari jenis export, filter (sudah dinormalisasi) dan versi data"""
+    payload = json.dumps(
+        {"kind": kind, "filters": filters, "data_version": data_version, "layout": EXPORT_LAYOUT_VERSION},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _cache_path(directory, etag, suffix):
+    return os.path.join(directory, f"{etag}{suffix}")
+
+
+def cached_export_path(directory, etag, suffix):
+    """Path file export di cache, atau None. mtime diperbarui supaya file yang sering dipakai tidak di-prune"""
+    path = _cache_path(directory, etag, suffix)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def store_export(directory, etag, suffix, write_func, max_files):
+    """
+    write_func(file_object) menulis export ke file sementara di directory yang sama,
+    lalu os.replace (atomik) ke nama final: worker lain tidak pernah membaca file setengah jadi
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_func(f)
+        path = _cache_path(directory, etag, suffix)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    prune_exports(directory, suffix, max_files)
+    return path
+
+
+def prune_exports(directory, suffix, max_files):
+    """Simpan max_files file terbaru (mtime), sisanya dihapus"""
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(suffix):
+            path = os.path.join(directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    entries.sort(reverse=True)
+    for _, path in entries[max_files:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
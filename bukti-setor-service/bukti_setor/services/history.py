@@ -0,0 +1,109 @@
+# bukti_setor/services/history.py
+
+from datetime import date
+from models import db, BuktiSetor
+from bukti_setor.services.pagination import (
+    InvalidQueryParam, encode_cursor, decode_cursor, parse_limit, parse_date_arg,
+    parse_decimal_arg, parse_fields, keyset_before, serialize_rows, split_page
+)
+
+HISTORY_FIELDS = ("id", "tanggal", "kode_setor", "jumlah", "created_at")
+
+
+def period_range(tahun, bulan=None):
+    """(awal, akhir) eksklusif untuk satu tahun atau satu bulan: filter tanggal yang bisa pakai index"""
+    if bulan:
+        start = date(tahun, bulan, 1)
+        end = date(tahun + 1, 1, 1) if bulan == 12 else date(tahun, bulan + 1, 1)
+        return start, end
+    return date(tahun, 1, 1), date(tahun + 1, 1, 1)
+
+
+def _parse_period(args):
+    tahun = args.get("tahun")
+    bulan = args.get("bulan")
+    if not tahun and not bulan:
+        return None
+    if bulan and not tahun:
+        raise InvalidQueryParam("bulan harus disertai tahun")
+    try:
+        tahun = int(tahun)
+        bulan = int(bulan) if bulan else None
+    except ValueError:
+        raise InvalidQueryParam("tahun dan bulan harus berupa angka")
+    if bulan is not None and not 1 <= bulan <= 12:
+        raise InvalidQueryParam("bulan harus 1-12")
+    return period_range(tahun, bulan)
+
+
+def build_history_filters(args):
+    """Filter query string -> list predikat SQL + ringkasan filter untuk response"""
+    conditions = []
+    filters = {}
+
+    period = _parse_period(args)
+    if period:
+        conditions += [BuktiSetor.tanggal >= period[0], BuktiSetor.tanggal < period[1]]
+        filters.update(tahun=args.get("tahun"), bulan=args.get("bulan"))
+
+    tanggal_dari = parse_date_arg(args, "tanggal_dari")
+    tanggal_sampai = parse_date_arg(args, "tanggal_sampai")
+    if tanggal_dari:
+        conditions.append(BuktiSetor.tanggal >= tanggal_dari)
+        filters["tanggal_dari"] = tanggal_dari.isoformat()
+    if tanggal_sampai:
+        conditions.append(BuktiSetor.tanggal <= tanggal_sampai)
+        filters["tanggal_sampai"] = tanggal_sampai.isoformat()
+
+    kode_setor = args.get("kode_setor")
+    if kode_setor:
+        conditions.append(BuktiSetor.kode_setor == kode_setor)
+        filters["kode_setor"] = kode_setor
+
+    jumlah_min = parse_decimal_arg(args, "jumlah_min")
+    jumlah_max = parse_decimal_arg(args, "jumlah_max")
+    if jumlah_min is not None:
+        conditions.append(BuktiSetor.jumlah >= jumlah_min)
+        filters["jumlah_min"] = float(jumlah_min)
+    if jumlah_max is not None:
+        conditions.append(BuktiSetor.jumlah <= jumlah_max)
+        filters["jumlah_max"] = float(jumlah_max)
+
+    return conditions, filters
+
+
+def get_history_page(args, default_limit=100, max_limit=500):
+    """
+    Satu halaman history bukti setor, urut created_at DESC, id DESC.
+    args: cursor, limit, fields, tahun, bulan, tanggal_dari, tanggal_sampai,
+    kode_setor, jumlah_min, jumlah_max. Raise InvalidQueryParam untuk input salah.
+    """
+    limit = parse_limit(args.get("limit"), default_limit, max_limit)
+    query_fields, response_fields = parse_fields(args.get("fields"), HISTORY_FIELDS)
+    conditions, filters = build_history_filters(args)
+
+    cursor = args.get("cursor")
+    if cursor:
+        conditions.append(keyset_before(db, BuktiSetor.created_at, BuktiSetor.id, decode_cursor(cursor)))
+
+    query = (
+        db.select(*[getattr(BuktiSetor, field) for field in query_fields])
+        .where(*conditions)
+        .order_by(BuktiSetor.created_at.desc(), BuktiSetor.id.desc())
+        .limit(limit + 1)
+    )
+    rows, has_more = split_page(db.session.execute(query).mappings().all(), limit)
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor({"created_at": last["created_at"], "id": last["id"]})
+
+    return {
+        "data": serialize_rows(rows, response_fields),
+        "total": len(rows),
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "filters": filters,
+    }
@@ -0,0 +1,88 @@
+# bukti_setor/services/rekap.py
+
+from models import db, RekapBulanan, PpnMasukan, PpnKeluaran, BuktiSetor
+from bukti_setor.services.history import period_range
+
+REKAP_SOURCES = {
+    "ppn_masukan": PpnMasukan,
+    "ppn_keluaran": PpnKeluaran,
+    "bukti_setor": BuktiSetor,
+}
+REKAP_COLUMNS = ("tahun", "bulan", "jenis", "jumlah_dokumen", "total_dpp", "total_ppn", "total_jumlah")
+
+
+def _rekap_from_sources(jenis_list, tahun, bulan):
+    """Rekap dihitung langsung dari tabel sumber (database tanpa trigger rekap, mis. SQLite dev)"""
+    start, end = period_range(tahun, bulan)
+    selects = []
+    for jenis in jenis_list:
+        model = REKAP_SOURCES[jenis]
+        tahun_col = db.extract("year", model.tanggal)
+        bulan_col = db.extract("month", model.tanggal)
+        if jenis == "bukti_setor":
+            totals = [db.literal(0), db.literal(0), db.func.sum(model.jumlah)]
+        else:
+            totals = [db.func.sum(model.dpp), db.func.sum(model.ppn), db.literal(0)]
+        selects.append(
+            db.select(
+                tahun_col.label("tahun"), bulan_col.label("bulan"), db.literal(jenis).label("jenis"),
+                db.func.count().label("jumlah_dokumen"),
+                *[column.label(name) for column, name in zip(totals, REKAP_COLUMNS[4:])]
+            )
+            .where(model.tanggal >= start, model.tanggal < end)
+            .group_by(tahun_col, bulan_col)
+        )
+    return db.union_all(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+
+
+def get_rekap_bulanan(jenis_list, tahun, bulan=None):
+    """
+    Baris rekap per (bulan, jenis) untuk satu tahun (atau satu bulan), urut bulan.
+    PostgreSQL: dibaca dari rekap_bulanan (dijaga trigger), maksimal 12 baris per jenis.
+    Raise ValueError untuk bulan di luar 1-12.
+    """
+    if bulan is not None and not 1 <= bulan <= 12:
+        raise ValueError("bulan harus 1-12")
+
+    if db.engine.dialect.name == "postgresql":
+        conditions = [
+            RekapBulanan.tahun == tahun,
+            RekapBulanan.jenis.in_(jenis_list),
+            RekapBulanan.jumlah_dokumen > 0,
+        ]
+        if bulan:
+            conditions.append(RekapBulanan.bulan == bulan)
+        source = db.select(RekapBulanan).where(*conditions).subquery()
+    else:
+        source = _rekap_from_sources(jenis_list, tahun, bulan)
+
+    query = db.select(*[source.c[name] for name in REKAP_COLUMNS]).order_by(source.c.bulan, source.c.jenis)
+    return [
+        {
+            "tahun": int(row["tahun"]),
+            "bulan": int(row["bulan"]),
+            "jenis": row["jenis"],
+            "jumlah_dokumen": int(row["jumlah_dokumen"]),
+            "total_dpp": float(row["total_dpp"] or 0),
+            "total_ppn": float(row["total_ppn"] or 0),
+            "total_jumlah": float(row["total_jumlah"] or 0),
+        }
+        for row in db.session.execute(query).mappings()
+    ]
+
+
+def get_bukti_setor_summary(tahun, bulan=None):
+    """Total bukti setor setahun (atau sebulan) beserta rincian per bulan"""
+    rows = get_rekap_bulanan(["bukti_setor"], tahun, bulan)
+    summary = {
+        "tahun": tahun,
+        "total_bukti_setor": sum(row["jumlah_dokumen"] for row in rows),
+        "total_amount": sum(row["total_jumlah"] for row in rows),
+        "per_bulan": [
+            {"bulan": row["bulan"], "jumlah_dokumen": row["jumlah_dokumen"], "total_amount": row["total_jumlah"]}
+            for row in rows
+        ],
+    }
+    if bulan:
+        summary["bulan"] = bulan
+    return summary
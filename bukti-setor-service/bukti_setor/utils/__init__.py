@@ -4,4 +4,5 @@ from shared_utils.text_utils import clean_transaction_value, fuzzy_month_match
 from shared_utils.file_utils import allowed_file, is_valid_image
 from . import ocr_engine
 from . import bukti_setor_processor
-from . import parsing
\ No newline at end of file
+from . import parsing
+from . import warmup
\ No newline at end of file
@@ -3,9 +3,10 @@ import os
 from PIL import Image
 import numpy as np
 import cv2
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from flask import current_app
-from .ocr_engine import process_with_easyocr
+from .ocr_engine import get_easyocr_batcher
+from .ocr_rpc import get_ocr_rpc_client
 from .spellcheck import correct_spelling
 from shared_utils.text_utils import clean_transaction_value, fuzzy_month_match
 from shared_utils.file_utils import allowed_file, is_valid_image, is_image_file
@@ -15,9 +16,8 @@ from .parsing.tanggal import parse_tanggal
 from .parsing.jumlah import parse_jumlah
 from .parsing.kode_setor import parse_kode_setor
 
-def _extract_data_from_image(pil_image, upload_folder, page_num=1, original_filename="bukti_setor"):
-    start_total = time.time()
-    
+def _prepare_page_image(pil_image, upload_folder, page_num=1, original_filename="bukti_setor"):
+    """Simpan preview lalu siapkan gambar halaman untuk EasyOCR. Return (preview_filename, processed_img)"""
     current_app.logger.debug(f"[🔥] Mulai proses halaman {page_num} dari {original_filename}")
 
     # ✅ FIXED: Lengkapi semua argumen
@@ -34,21 +34,40 @@ def _extract_data_from_image(pil_image, upload_folder, page_num=1, original_file
 
     if not preview_filename:
         raise ValueError("Gagal menyimpan preview image.")
-    # ✅ FIXED: Pastikan konversi ke OpenCV format
-    img_cv = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    # Halaman sudah dirender / di-decode pada lebar OCR: langsung grayscale,
+    # tanpa salinan RGB->BGR dari halaman penuh
+    img_gray = np.asarray(pil_image.convert("L"))
 
-    # Resize jika terlalu besar
-    MAX_WIDTH = 1000
-    if img_cv.shape[1] > MAX_WIDTH:
-        ratio = MAX_WIDTH / img_cv.shape[1]
-        img_cv = cv2.resize(img_cv, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+    # Resize hanya jika gambar datang dari luar iterator (lebih lebar dari target)
+    max_width = current_app.config.get('OCR_TARGET_WIDTH', 1000)
+    if img_gray.shape[1] > max_width:
+        ratio = max_width / img_gray.shape[1]
+        img_gray = cv2.resize(img_gray, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
 
-    processed_img = preprocess_for_easyocr(img_cv)
-    
-    # Get OCR results using lazy-loaded EasyOCR with error handling
+    return preview_filename, preprocess_for_easyocr(img_gray)
+
+def _run_easyocr(processed_images):
+    """
+    OCR semua halaman lewat micro-batcher: halaman dari file ini dan dari request lain
+    yang masuk dalam EASYOCR_BATCH_WINDOW_MS digabung ke readtext_batched.
+    Jika OCR_RPC_ADDRESS di-set, batching dilakukan oleh ocr-worker
+    """
+    rpc_address = current_app.config.get('OCR_RPC_ADDRESS')
+    if rpc_address:
+        client = get_ocr_rpc_client(
+            rpc_address, current_app.config.get('OCR_RPC_AUTHKEY'), current_app.config.get('OCR_RPC_TIMEOUT', 300)
+        )
+        return client.call("easyocr.readtext_many", processed_images)
+
+    batcher = get_easyocr_batcher(
+        current_app.config.get('EASYOCR_BATCH_SIZE', 8),
+        current_app.config.get('EASYOCR_BATCH_WINDOW_MS', 20)
+    )
+    return batcher.readtext_many(processed_images)
+
+def _build_page_result(ocr_results, preview_filename, page_num):
+    """Parse hasil EasyOCR satu halaman menjadi kode_setor, jumlah dan tanggal"""
     try:
-        ocr_results = process_with_easyocr(processed_img)
-        
         if not ocr_results:
             current_app.logger.warning(f"[⚠️ PERINGATAN] Tidak ada hasil OCR untuk halaman {page_num}")
             return {
@@ -80,13 +99,7 @@ def _extract_data_from_image(pil_image, upload_folder, page_num=1, original_file
         
     except Exception as e:
         current_app.logger.error(f"[❌ ERROR OCR] Halaman {page_num}: {str(e)}")
-        return {
-            "kode_setor": "",
-            "jumlah": "",
-            "tanggal": None,
-            "preview_filename": preview_filename,
-            "error": f"Error OCR: {str(e)}"
-        }
+        return _ocr_error_result(preview_filename, e)
 
     kode_setor = parse_kode_setor(full_text_str)
     tanggal_obj = parse_tanggal(all_text_blocks)
@@ -99,108 +112,164 @@ def _extract_data_from_image(pil_image, upload_folder, page_num=1, original_file
         "preview_filename": preview_filename
     }
 
-def extract_bukti_setor_data(filepath, poppler_path):
-    print(f"🔍 [DEBUG] Starting extract_bukti_setor_data")
-    print(f"📁 [DEBUG] File path: {filepath}")
-    print(f"🔧 [DEBUG] Poppler path: {poppler_path}")
-    print(f"📂 [DEBUG] File exists: {os.path.exists(filepath)}")
+def _ocr_error_result(preview_filename, error):
+    return {
+        "kode_setor": "",
+        "jumlah": "",
+        "tanggal": None,
+        "preview_filename": preview_filename,
+        "error": f"Error OCR: {str(error)}"
+    }
+
+def _extract_data_from_pages(pil_images, upload_folder, original_filename="bukti_setor", first_page=1):
+    """Proses semua halaman dengan satu batch EasyOCR. Return list result_data per halaman"""
+    start_total = time.time()
+    prepared = [
+        _prepare_page_image(pil_image, upload_folder, page_num, original_filename)
+        for page_num, pil_image in enumerate(pil_images, start=first_page)
+    ]
+
+    try:
+        all_ocr_results = _run_easyocr([processed_img for _, processed_img in prepared])
+    except Exception as e:
+        current_app.logger.error(f"[❌ ERROR OCR] {original_filename}: {str(e)}")
+        return [_ocr_error_result(preview_filename, e) for preview_filename, _ in prepared]
+
+    current_app.logger.debug(
+        f"[⏱️] EasyOCR {len(prepared)} halaman dalam {time.time() - start_total:.2f}s"
+    )
+    return [
+        _build_page_result(ocr_results, preview_filename, page_num)
+        for page_num, ((preview_filename, _), ocr_results) in enumerate(zip(prepared, all_ocr_results), start=first_page)
+    ]
+
+def _extract_data_from_image(pil_image, upload_folder, page_num=1, original_filename="bukti_setor"):
+    preview_filename, processed_img = _prepare_page_image(pil_image, upload_folder, page_num, original_filename)
     
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    print(f"📁 [DEBUG] Upload folder: {upload_folder}")
+    # Get OCR results using lazy-loaded EasyOCR with error handling
+    try:
+        ocr_results = _run_easyocr([processed_img])[0]
+    except Exception as e:
+        current_app.logger.error(f"[❌ ERROR OCR] Halaman {page_num}: {str(e)}")
+        return _ocr_error_result(preview_filename, e)
+
+    return _build_page_result(ocr_results, preview_filename, page_num)
+
+def count_pdf_pages(filepath, poppler_path):
+    """Jumlah halaman PDF via pdfinfo (tanpa merender halaman)"""
+    return int(pdfinfo_from_path(filepath, poppler_path=poppler_path).get("Pages", 0))
+
+def iter_pdf_page_chunks(filepath, poppler_path, total_pages, chunk_size, target_width=1000):
+    """
+    Generator halaman PDF per chunk: hanya chunk_size halaman yang dirender ke memory,
+    chunk berikutnya dirender setelah chunk sebelumnya selesai diproses dan dilepas.
+    Halaman dirender langsung pada lebar target_width (bukan 200 DPI lalu di-resize).
+    Yield (nomor halaman pertama, list PIL image)
+    """
+    chunk_size = max(1, chunk_size)
+    for first_page in range(1, total_pages + 1, chunk_size):
+        last_page = min(first_page + chunk_size - 1, total_pages)
+        yield first_page, convert_from_path(
+            filepath, poppler_path=poppler_path, first_page=first_page, last_page=last_page,
+            size=(target_width, None)
+        )
+
+def open_image_at_width(filepath, target_width=1000):
+    """Buka gambar upload dan perkecil ke target_width (JPEG di-decode langsung pada skala kecil)"""
+    pil_image = Image.open(filepath)
+    if pil_image.width > target_width:
+        target_height = max(1, pil_image.height * target_width // pil_image.width)
+        pil_image.draft("RGB", (target_width, target_height))
+        pil_image.thumbnail((target_width, target_height), Image.LANCZOS)
+    return pil_image
+
+def _format_page_result(result_data, page_num):
+    """Format sesuai dengan struktur faktur untuk mendukung navigation"""
+    formatted_result = {
+        "preview_image": result_data.get("preview_filename"),
+        "data": {
+            "kode_setor": result_data.get("kode_setor", ""),
+            "tanggal": result_data.get("tanggal"),
+            "jumlah": result_data.get("jumlah", ""),
+            "halaman": page_num,
+        },
+        "halaman": page_num
+    }
     
-    # OCR akan di-initialize secara lazy saat process_with_easyocr dipanggil
-    list_of_results = []
+    # Tambahkan warning atau error jika ada
+    if "warning" in result_data:
+        formatted_result["warning_message"] = result_data["warning"]
+    if "error" in result_data:
+        formatted_result["error"] = result_data["error"]
+    return formatted_result
+
+def get_total_pages(filepath, poppler_path):
+    """Jumlah halaman file upload (gambar = 1 halaman)"""
+    if filepath.lower().endswith('.pdf'):
+        return count_pdf_pages(filepath, poppler_path)
+    return 1
+
+def iter_bukti_setor_results(filepath, poppler_path, total_pages=None):
+    """
+    Generator hasil OCR per halaman (sudah diformat untuk frontend).
+    PDF dirender dan di-OCR per chunk PDF_PAGE_CHUNK_SIZE halaman sehingga memory
+    tidak tergantung jumlah halaman dan hasil halaman pertama bisa langsung dikirim.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
     filename_only = os.path.basename(filepath)
-    total_pages = 1  # Default value
-    
-    print(f"📄 [DEBUG] Filename only: {filename_only}")
-    print(f"📄 [DEBUG] Is PDF: {filepath.lower().endswith('.pdf')}")
+    target_width = current_app.config.get('OCR_TARGET_WIDTH', 1000)
 
     if filepath.lower().endswith('.pdf'):
-        print(f"🔄 [DEBUG] Processing PDF file...")
-        try:
-            all_pages_as_images = convert_from_path(filepath, poppler_path=poppler_path)
-            total_pages = len(all_pages_as_images)
-            print(f"📊 [DEBUG] PDF has {total_pages} pages")
-            
-            for i, page_image in enumerate(all_pages_as_images):
-                print(f"🔄 [DEBUG] Processing page {i+1}/{total_pages}")
-                
-                result_data = _extract_data_from_image(
-                    pil_image=page_image,
-                    upload_folder=upload_folder,
-                    page_num=i + 1,
-                    original_filename=filename_only
-                )
-                
-                print(f"📊 [DEBUG] Page {i+1} result_data: {result_data}")
-                
-                # Format sesuai dengan struktur faktur untuk mendukung navigation
-                formatted_result = {
-                    "preview_image": result_data.get("preview_filename"),
-                    "data": {
-                        "kode_setor": result_data.get("kode_setor", ""),
-                        "tanggal": result_data.get("tanggal"),
-                        "jumlah": result_data.get("jumlah", ""),
-                        "halaman": i + 1,
-                    },
-                    "halaman": i + 1
-                }
-                
-                # Tambahkan warning atau error jika ada
-                if "warning" in result_data:
-                    formatted_result["warning_message"] = result_data["warning"]
-                if "error" in result_data:
-                    formatted_result["error"] = result_data["error"]
-                    
-                print(f"📊 [DEBUG] Page {i+1} formatted_result: {formatted_result}")
-                list_of_results.append(formatted_result)
-        except Exception as e:
-            print(f"❌ [DEBUG] Error processing PDF: {str(e)}")
-            import traceback
-            traceback.print_exc()
-    else:
-        print(f"🔄 [DEBUG] Processing image file...")
-        try:
-            pil_image = Image.open(filepath)
-            print(f"🖼️ [DEBUG] Image opened successfully, size: {pil_image.size}")
-            
-            result_data = _extract_data_from_image(
-                pil_image=pil_image,
+        if total_pages is None:
+            total_pages = count_pdf_pages(filepath, poppler_path)
+        chunk_size = current_app.config.get('PDF_PAGE_CHUNK_SIZE', 8)
+        print(f"📊 [DEBUG] PDF has {total_pages} pages, chunk size {chunk_size}")
+        
+        page_chunks = iter_pdf_page_chunks(filepath, poppler_path, total_pages, chunk_size, target_width)
+        for first_page, page_images in page_chunks:
+            print(f"🔄 [DEBUG] Processing pages {first_page}-{first_page + len(page_images) - 1}/{total_pages}")
+            # Halaman dalam satu chunk di-OCR dalam batch EasyOCR
+            results_data = _extract_data_from_pages(
+                page_images,
                 upload_folder=upload_folder,
-                page_num=1,
-                original_filename=filename_only
+                original_filename=filename_only,
+                first_page=first_page
             )
+            del page_images
             
-            print(f"📊 [DEBUG] Image result_data: {result_data}")
-            
-            # Format sesuai dengan struktur faktur untuk mendukung navigation
-            formatted_result = {
-                "preview_image": result_data.get("preview_filename"),
-                "data": {
-                    "kode_setor": result_data.get("kode_setor", ""),
-                    "tanggal": result_data.get("tanggal"),
-                    "jumlah": result_data.get("jumlah", ""),
-                    "halaman": 1,
-                },
-                "halaman": 1
-            }
-            
-            # Tambahkan warning atau error jika ada
-            if "warning" in result_data:
-                formatted_result["warning_message"] = result_data["warning"]
-            if "error" in result_data:
-                formatted_result["error"] = result_data["error"]
-                
-            print(f"📊 [DEBUG] Image formatted_result: {formatted_result}")
+            for page_num, result_data in enumerate(results_data, start=first_page):
+                yield _format_page_result(result_data, page_num)
+    else:
+        pil_image = open_image_at_width(filepath, target_width)
+        print(f"🖼️ [DEBUG] Image opened successfully, size: {pil_image.size}")
+        
+        result_data = _extract_data_from_image(
+            pil_image=pil_image,
+            upload_folder=upload_folder,
+            page_num=1,
+            original_filename=filename_only
+        )
+        yield _format_page_result(result_data, 1)
+
+def extract_bukti_setor_data(filepath, poppler_path):
+    print(f"🔍 [DEBUG] Starting extract_bukti_setor_data")
+    print(f"📁 [DEBUG] File path: {filepath}")
+    print(f"📂 [DEBUG] File exists: {os.path.exists(filepath)}")
+    
+    # OCR akan di-initialize secara lazy saat batch EasyOCR pertama dijalankan
+    list_of_results = []
+    total_pages = 1  # Default value
+
+    try:
+        total_pages = get_total_pages(filepath, poppler_path)
+        for formatted_result in iter_bukti_setor_results(filepath, poppler_path, total_pages):
+            print(f"📊 [DEBUG] Page {formatted_result['halaman']} formatted_result: {formatted_result}")
             list_of_results.append(formatted_result)
-            total_pages = 1
-        except Exception as e:
-            print(f"❌ [DEBUG] Error processing image: {str(e)}")
-            import traceback
-            traceback.print_exc()
+    except Exception as e:
+        print(f"❌ [DEBUG] Error processing file: {str(e)}")
+        import traceback
+        traceback.print_exc()
 
-    print(f"📊 [DEBUG] Final list_of_results: {list_of_results}")
     print(f"📊 [DEBUG] Total pages: {total_pages}")
     
     final_result = {
@@ -208,9 +277,8 @@ def extract_bukti_setor_data(filepath, poppler_path):
         "results": list_of_results,
         "total_halaman": total_pages
     }
-    
-    print(f"📤 [DEBUG] Final result to return: {final_result}")
     return final_result
+
 def extract_bukti_setor_from_request(request):
     if "file" not in request.files:
         raise ValueError("File tidak ditemukan dalam request.")
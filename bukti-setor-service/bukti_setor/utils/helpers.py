@@ -8,7 +8,8 @@ from flask import current_app
 
 def simpan_preview_image(pil_image, upload_folder, page_num, original_filename="preview"):
     try:
-        pil_image = pil_image.convert("RGB")
+        if pil_image.mode != "RGB":
+            pil_image = pil_image.convert("RGB")
         buffer = BytesIO()
         pil_image.save(buffer, format="JPEG", quality=85)
         img_bytes = buffer.getvalue()
@@ -1,5 +1,8 @@
-import easyocr
+import time
+import queue
 import threading
+import numpy as np
+from concurrent.futures import Future
 
 # Global variables for lazy loading
 _ocr_reader = None
@@ -16,11 +19,15 @@ def get_easyocr_reader():
         with _ocr_lock:
             if _ocr_reader is None:  # Double-check locking pattern
                 print("🤖 Inisialisasi EasyOCR Reader...")
+                import easyocr  # import di sini: client ocr-worker tidak butuh torch
                 _ocr_reader = easyocr.Reader(['id', 'en'], gpu=False)
                 print("✅ EasyOCR Reader berhasil diinisialisasi.")
     
     return _ocr_reader
 
+def is_easyocr_reader_loaded():
+    return _ocr_reader is not None
+
 def process_with_easyocr(image_array):
     """
     Process image dengan EasyOCR - lazy loaded
@@ -28,3 +35,115 @@ def process_with_easyocr(image_array):
     reader = get_easyocr_reader()
     results = reader.readtext(image_array)
     return results
+
+
+def _pad_to_same_size(images):
+    """
+    readtext_batched butuh semua gambar berukuran sama: pad (putih, kanan/bawah)
+    ke ukuran terbesar di batch, jadi koordinat bounding box tetap sama dengan gambar asli
+    """
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    padded = []
+    for image in images:
+        if image.shape[:2] == (height, width):
+            padded.append(image)
+            continue
+        canvas = np.full((height, width) + image.shape[2:], 255, dtype=image.dtype)
+        canvas[:image.shape[0], :image.shape[1]] = image
+        padded.append(canvas)
+    return padded
+
+
+def process_batch_with_easyocr(image_arrays, batch_size=1):
+    """
+    Process beberapa gambar sekaligus dengan EasyOCR readtext_batched.
+    Return list hasil readtext, urutan sama dengan image_arrays
+    """
+    if not image_arrays:
+        return []
+    reader = get_easyocr_reader()
+    if len(image_arrays) == 1:
+        return [reader.readtext(image_arrays[0], batch_size=batch_size)]
+    # Grayscale dan warna tidak bisa dicampur dalam satu batch
+    if len({image.ndim for image in image_arrays}) > 1:
+        return [reader.readtext(image, batch_size=batch_size) for image in image_arrays]
+    return reader.readtext_batched(_pad_to_same_size(image_arrays), batch_size=batch_size)
+
+
+class EasyOcrMicroBatcher:
+    """
+    Kumpulkan halaman dari semua request yang masuk dalam window singkat
+    lalu jalankan satu readtext_batched untuk maksimal batch_size halaman.
+    Satu dispatcher thread memegang Reader, jadi akses EasyOCR juga terserialisasi.
+    """
+
+    def __init__(self, batch_size, window_ms):
+        self.batch_size = max(1, batch_size)
+        self.window = max(0, window_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="easyocr-batcher", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.pages = 0
+
+    def submit(self, image_array):
+        """Antrikan satu halaman, return Future berisi hasil readtext"""
+        future = Future()
+        self._queue.put((image_array, future))
+        return future
+
+    def readtext_many(self, image_arrays):
+        """Antrikan semua halaman sekaligus lalu tunggu hasilnya (urutan dipertahankan)"""
+        futures = [self.submit(image_array) for image_array in image_arrays]
+        return [future.result() for future in futures]
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._collect_batch()
+            images = [image for image, _ in batch]
+            try:
+                results = process_batch_with_easyocr(images, batch_size=self.batch_size)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.pages += len(batch)
+            print(f"🤖 EasyOCR batch #{self.batches}: {len(batch)} halaman")
+
+    def stats(self):
+        return {
+            "batch_size": self.batch_size,
+            "window_ms": int(self.window * 1000),
+            "batches": self.batches,
+            "pages": self.pages,
+            "avg_batch": round(self.pages / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_easyocr_batcher(batch_size, window_ms):
+    """Lazy loading untuk micro-batcher EasyOCR (dibuat sekali per proses)"""
+    global _batcher
+
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:  # Double-check locking pattern
+                _batcher = EasyOcrMicroBatcher(batch_size, window_ms)
+
+    return _batcher
@@ -0,0 +1,98 @@
+"""
+OCR RPC Client untuk Bukti Setor Processing
+Jika Config.OCR_RPC_ADDRESS di-set, EasyOCR tidak dimuat di worker gunicorn:
+halaman dikirim ke proses ocr-worker (ocr-worker/ocr_worker.py) yang memegang
+engine Tesseract / EasyOCR untuk faktur-service dan bukti-setor-service.
+
+- Transport: multiprocessing.connection (Unix socket atau host:port localhost)
+- Autentikasi: HMAC challenge dengan OCR_RPC_AUTHKEY
+- Satu koneksi per thread, dibuat ulang sekali jika koneksi putus
+"""
+import logging
+import threading
+from multiprocessing.connection import Client
+
+logger = logging.getLogger(__name__)
+
+OCR_RPC_TIMEOUT = 300
+
+
+class OcrRpcError(Exception):
+    """Error yang dilaporkan oleh ocr-worker saat menjalankan method"""
+
+
+def parse_address(address):
+    """'/run/ocr.sock' -> (path, 'AF_UNIX'), 'host:port' -> ((host, port), 'AF_INET')"""
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return (host or '127.0.0.1', int(port)), 'AF_INET'
+    return address, 'AF_UNIX'
+
+
+class OcrRpcClient:
+    """Client RPC ke ocr-worker: call(method, *args) -> hasil method di worker"""
+
+    def __init__(self, address, authkey=None, timeout=OCR_RPC_TIMEOUT):
+        self.address, self.family = parse_address(address)
+        self.authkey = authkey.encode() if isinstance(authkey, str) and authkey else (authkey or None)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, family=self.family, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _request(self, method, args, timeout):
+        conn = self._connection()
+        conn.send((method, args))
+        if not conn.poll(timeout):
+            # Jawaban yang datang terlambat akan tertukar dengan request berikutnya
+            self.close()
+            raise TimeoutError(f"OCR worker tidak menjawab {method} dalam {timeout}s")
+        return conn.recv()
+
+    def call(self, method, *args, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            status, payload = self._request(method, args, timeout)
+        except TimeoutError:
+            raise
+        except (EOFError, ConnectionError, BrokenPipeError, OSError) as e:
+            # Worker di-restart / koneksi idle diputus: coba sekali lagi dengan koneksi baru
+            logger.warning(f"⚠️ Koneksi OCR worker terputus ({e}), menyambung ulang")
+            self.close()
+            status, payload = self._request(method, args, timeout)
+
+        if status != 'ok':
+            raise OcrRpcError(payload)
+        return payload
+
+
+# Global variables for lazy loading
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ocr_rpc_client(address, authkey=None, timeout=OCR_RPC_TIMEOUT):
+    """Lazy loading untuk OcrRpcClient (sekali per proses)"""
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:  # Double-check locking pattern
+                print(f"🔌 OCR RPC client -> {address}")
+                _client = OcrRpcClient(address, authkey, timeout)
+
+    return _client
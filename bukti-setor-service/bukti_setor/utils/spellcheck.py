@@ -1,48 +1,169 @@
-from spellchecker import SpellChecker
 import os
+import re
 import threading
+from collections import Counter
+from functools import lru_cache
+
+# Pengganti pyspellchecker: index deletion ala SymSpell dibangun sekali dari kamus,
+# lookup kata tinggal beberapa akses dict (bukan generate ribuan kandidat edit
+# distance 2 per kata), dan hasil koreksi per kata di-memoize dengan LRU.
+
+KAMUS_PATH = os.path.join(os.path.dirname(__file__), 'kamus_indonesia.txt')
+MAX_EDIT_DISTANCE = 2
+CORRECTION_CACHE_SIZE = 50000
+
+# Tokenizer sama dengan pyspellchecker saat memuat kamus
+WORD_PATTERN = re.compile(r"(\w[\w']*\w|\w)")
+# Token yang mengandung angka (nominal, tanggal, NTPN, kode setor) tidak dikoreksi
+DIGIT_PATTERN = re.compile(r"\d")
 
 # Global variables for lazy loading
-_spell_checker = None
+_spell_index = None
 _spell_lock = threading.Lock()
 
+
+def _deletes(word, max_distance):
+    """Semua variasi word dengan menghapus 1..max_distance karakter"""
+    results = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def _edit_distance(source, target, max_distance):
+    """Damerau-Levenshtein (optimal string alignment), berhenti lebih awal jika > max_distance"""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SpellIndex:
+    """
+    Index deletion SymSpell: setiap kata kamus dan hasil hapus 1-2 karakternya
+    dipetakan ke kata asal, jadi kandidat koreksi didapat dari deletion kata input
+    """
+
+    def __init__(self, frequencies, max_distance=MAX_EDIT_DISTANCE):
+        self.frequencies = dict(frequencies)
+        self.max_distance = max_distance
+        self.longest_word_length = max((len(word) for word in self.frequencies), default=0)
+        self.deletes = {}
+        for word in self.frequencies:
+            for variant in {word} | _deletes(word, max_distance):
+                self.deletes.setdefault(variant, []).append(word)
+
+    @classmethod
+    def from_text_file(cls, path, max_distance=MAX_EDIT_DISTANCE):
+        with open(path, encoding='utf-8') as f:
+            frequencies = Counter(word.lower() for word in WORD_PATTERN.findall(f.read()))
+        return cls(frequencies, max_distance)
+
+    def __contains__(self, word):
+        return word.lower() in self.frequencies
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def lookup(self, word):
+        """
+        Koreksi terbaik untuk word (lowercase): jarak edit terkecil, lalu frekuensi
+        tertinggi di kamus. None jika tidak ada kandidat dalam MAX_EDIT_DISTANCE.
+        """
+        word = word.lower()
+        if word in self.frequencies:
+            return word
+        if len(word) > self.longest_word_length + self.max_distance + 1:
+            return None
+
+        candidates = set()
+        for variant in {word} | _deletes(word, self.max_distance):
+            candidates.update(self.deletes.get(variant, ()))
+
+        best = None
+        best_key = None
+        for candidate in candidates:
+            distance = _edit_distance(word, candidate, self.max_distance)
+            if distance > self.max_distance:
+                continue
+            key = (distance, -self.frequencies[candidate], candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+
 def get_spell_checker():
     """
-    Lazy loading untuk SpellChecker
-    Hanya initialize ketika benar-benar dibutuhkan
+    Lazy loading untuk SpellIndex
+    Hanya dibangun ketika benar-benar dibutuhkan (sekali per proses)
     """
-    global _spell_checker
-    
-    if _spell_checker is None:
+    global _spell_index
+
+    if _spell_index is None:
         with _spell_lock:
-            if _spell_checker is None:  # Double-check locking pattern
+            if _spell_index is None:  # Double-check locking pattern
                 try:
-                    print("📚 Inisialisasi SpellChecker...")
-                    _spell_checker = SpellChecker(language=None, case_sensitive=False)
-                    kamus_path = os.path.join(os.path.dirname(__file__), 'kamus_indonesia.txt')
-                    _spell_checker.word_frequency.load_text_file(kamus_path)
-                    print(f"✅ Kamus Indonesia berhasil dimuat dari: {kamus_path}")
+                    print("📚 Inisialisasi SpellIndex...")
+                    _spell_index = SpellIndex.from_text_file(KAMUS_PATH)
+                    print(f"✅ Kamus Indonesia berhasil dimuat dari: {KAMUS_PATH} "
+                          f"({len(_spell_index)} kata, {len(_spell_index.deletes)} entri deletion)")
                 except Exception as e:
                     print(f"❌ Error memuat kamus Indonesia: {e}")
-                    _spell_checker = SpellChecker(language='id')  # fallback ke bahasa Indonesia default
-    
-    return _spell_checker
+                    _spell_index = SpellIndex({})  # tanpa kamus: teks dikembalikan apa adanya
+
+    return _spell_index
+
+
+def is_spell_checker_loaded():
+    return _spell_index is not None
+
+
+def should_correct(word):
+    """Token angka / nominal / kode (mengandung digit) dan tanda baca tunggal dilewati"""
+    return len(word) > 1 and not DIGIT_PATTERN.search(word)
+
+
+@lru_cache(maxsize=CORRECTION_CACHE_SIZE)
+def correct_word(word):
+    """Koreksi satu token; hasil di-memoize karena token OCR bukti setor sangat berulang"""
+    if not should_correct(word):
+        return word
+    spell = get_spell_checker()
+    if word in spell:
+        return word
+    return spell.lookup(word) or word
+
+
+def correction_cache_info():
+    return correct_word.cache_info()
+
 
 def correct_spelling(text):
     """
-    Correct spelling dengan lazy-loaded SpellChecker
+    Correct spelling dengan lazy-loaded SpellIndex
     """
     if not text or not text.strip():
         return text
-        
-    spell = get_spell_checker()
-    words = text.split()
-    corrected_words = []
-    
-    for word in words:
-        if word in spell or not spell.correction(word):
-            corrected_words.append(word)
-        else:
-            corrected_words.append(spell.correction(word))
-    
-    return ' '.join(corrected_words)
+
+    return ' '.join(correct_word(word) for word in text.split())
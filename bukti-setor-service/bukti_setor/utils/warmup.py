@@ -0,0 +1,92 @@
+import time
+import threading
+
+from .ocr_engine import get_easyocr_reader, is_easyocr_reader_loaded
+from .spellcheck import get_spell_checker, is_spell_checker_loaded
+from .ocr_rpc import OcrRpcClient
+
+# Backoff antar percobaan preload yang gagal (mis. download model EasyOCR timeout)
+PRELOAD_RETRY_BASE_SECONDS = 2
+PRELOAD_RETRY_MAX_SECONDS = 60
+
+# Status preload model, dibaca oleh endpoint /ready
+_preload_state = {"started": False, "running": False, "attempts": 0, "error": None, "duration_ms": None}
+_preload_lock = threading.Lock()
+
+
+def preload_models(rpc_address=None):
+    """
+    Muat EasyOCR Reader dan SpellIndex sekarang, bukan saat request pertama.
+    Dengan rpc_address (ocr-worker) hanya kamus yang dimuat di proses ini.
+    """
+    with _preload_lock:
+        _preload_state["started"] = True
+        _preload_state["attempts"] += 1
+
+    started_at = time.perf_counter()
+    try:
+        if not rpc_address:
+            get_easyocr_reader()
+        get_spell_checker()
+    except Exception as e:
+        _preload_state["error"] = str(e)
+        print(f"❌ Preload model gagal (percobaan {_preload_state['attempts']}): {e}")
+        return False
+
+    _preload_state["error"] = None
+    _preload_state["duration_ms"] = round((time.perf_counter() - started_at) * 1000, 1)
+    print(f"✅ Model siap dalam {_preload_state['duration_ms']} ms")
+    return True
+
+
+def _preload_with_retry(rpc_address):
+    """Ulangi preload dengan exponential backoff sampai berhasil, agar /ready tidak 503 selamanya"""
+    delay = PRELOAD_RETRY_BASE_SECONDS
+    try:
+        while not preload_models(rpc_address):
+            print(f"🔁 Preload model diulang dalam {delay} detik")
+            time.sleep(delay)
+            delay = min(delay * 2, PRELOAD_RETRY_MAX_SECONDS)
+    finally:
+        with _preload_lock:
+            _preload_state["running"] = False
+
+
+def start_background_preload(rpc_address=None):
+    """Preload di thread background jika belum ada yang berjalan (no-op selama thread masih mencoba)"""
+    with _preload_lock:
+        if _preload_state["running"] or (_preload_state["started"] and not _preload_state["error"]):
+            return
+        _preload_state["started"] = True
+        _preload_state["running"] = True
+    threading.Thread(
+        target=_preload_with_retry, args=(rpc_address,), name="model-preload", daemon=True
+    ).start()
+
+
+def _ocr_worker_ready(rpc_address, authkey):
+    """EasyOCR di ocr-worker: siap jika worker menjawab ping dan engine easyocr sudah dimuat"""
+    client = OcrRpcClient(rpc_address, authkey, timeout=2)
+    try:
+        info = client.call("ping")
+    except Exception:
+        return False
+    finally:
+        client.close()
+    return bool(info.get("engines", {}).get("easyocr"))
+
+
+def models_status(rpc_address=None, authkey=None):
+    """Status model untuk readiness check"""
+    models = {
+        "easyocr": _ocr_worker_ready(rpc_address, authkey) if rpc_address else is_easyocr_reader_loaded(),
+        "spellcheck": is_spell_checker_loaded(),
+    }
+    return {
+        "ready": all(models.values()),
+        "models": models,
+        "preload_started": _preload_state["started"],
+        "preload_attempts": _preload_state["attempts"],
+        "preload_ms": _preload_state["duration_ms"],
+        "error": _preload_state["error"],
+    }
@@ -51,6 +51,13 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     UPLOAD_FOLDER = "uploads"
     
+    # Cache file export Excel (kunci: filter + versi data). Kosong = tanpa cache
+    EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR', 'export_cache')
+    EXPORT_CACHE_MAX_FILES = int(os.getenv('EXPORT_CACHE_MAX_FILES', '50'))
+    
+    # Bulk save bukti setor: mulai jumlah baris ini PostgreSQL memakai COPY, bukan INSERT multi-row
+    BULK_SAVE_COPY_THRESHOLD = int(os.getenv('BULK_SAVE_COPY_THRESHOLD', '5000'))
+    
     # ========================================
     # OCR CONFIGURATION
     # ========================================
@@ -62,6 +69,26 @@ class Config:
     OCR_TIMEOUT = int(os.getenv('OCR_TIMEOUT', '30'))
     OCR_MAX_RETRIES = int(os.getenv('OCR_MAX_RETRIES', '3'))
     
+    # EasyOCR batching: halaman (dan request bersamaan dalam window) digabung ke readtext_batched
+    EASYOCR_BATCH_SIZE = int(os.getenv('EASYOCR_BATCH_SIZE', '8'))
+    EASYOCR_BATCH_WINDOW_MS = int(os.getenv('EASYOCR_BATCH_WINDOW_MS', '20'))
+    
+    # PDF dirender per chunk halaman (bukan seluruh dokumen sekaligus)
+    PDF_PAGE_CHUNK_SIZE = int(os.getenv('PDF_PAGE_CHUNK_SIZE', EASYOCR_BATCH_SIZE))
+    
+    # Lebar halaman (px) untuk OCR dan preview: PDF dirender langsung pada lebar ini
+    OCR_TARGET_WIDTH = int(os.getenv('OCR_TARGET_WIDTH', '1000'))
+    
+    # Muat EasyOCR + kamus di background saat worker start, bukan saat request pertama
+    # (jangan jalankan gunicorn dengan --preload: torch di master sebelum fork bisa hang)
+    PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', 'false').lower() == 'true'
+    
+    # OCR worker terpisah (ocr-worker/ocr_worker.py): Unix socket atau host:port.
+    # Kosong = EasyOCR dimuat di proses ini
+    OCR_RPC_ADDRESS = os.getenv('OCR_RPC_ADDRESS', '')
+    OCR_RPC_AUTHKEY = os.getenv('OCR_RPC_AUTHKEY', '')
+    OCR_RPC_TIMEOUT = int(os.getenv('OCR_RPC_TIMEOUT', '300'))
+    
     # ========================================
     # RAILWAY SPECIFIC CONFIGURATION
     # ========================================
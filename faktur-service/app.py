@@ -6,9 +6,14 @@ import os
 import sys
 import logging
 import io
+import json
+import time
+import zipfile
 import hashlib
+import functools
 from datetime import datetime
-from flask import Flask, jsonify, request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, jsonify, request, Response, send_file, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -33,22 +38,57 @@ logger.info(f"📊 Python version: {sys.version}")
 DATABASE_AVAILABLE = False
 try:
     from models import db, PpnMasukan, PpnKeluaran
+    from rekap import get_rekap_ppn
+    from idempotency import idempotent
     logger.info("✅ Database models imported successfully")
     DATABASE_AVAILABLE = True
 except ImportError as e:
     logger.error(f"❌ Database models import failed: {e}")
     logger.error("❌ Running without database functionality")
+    
+    def idempotent(endpoint):
+        # Tanpa database Idempotency-Key tidak bisa disimpan; view dipakai apa adanya
+        return lambda view: view
+
+import ocr_rpc
 
 # OCR Engine Import with Error Handling
+# Dengan OCR_RPC_ADDRESS semua OCR dijalankan ocr-worker: FakturOCR lokal tidak dimuat,
+# jadi container web tidak butuh Tesseract / poppler
 OCR_AVAILABLE = False
-try:
-    from ocr_engine import FakturOCR
-    ocr_engine = FakturOCR()
-    logger.info("✅ OCR engine imported successfully")
-    OCR_AVAILABLE = True
-except ImportError as e:
-    logger.error(f"❌ OCR engine import failed: {e}")
-    logger.error("❌ Running without OCR functionality")
+if ocr_rpc.rpc_enabled():
+    logger.info(f"🔌 OCR dijalankan oleh ocr-worker ({ocr_rpc.OCR_RPC_ADDRESS}), OCR engine lokal tidak dimuat")
+else:
+    try:
+        from ocr_engine import FakturOCR
+        ocr_engine = FakturOCR()
+        logger.info("✅ OCR engine imported successfully")
+        OCR_AVAILABLE = True
+    except ImportError as e:
+        logger.error(f"❌ OCR engine import failed: {e}")
+        logger.error("❌ Running without OCR functionality")
+OCR_ENABLED = OCR_AVAILABLE or ocr_rpc.rpc_enabled()
+
+# Async OCR job queue (process pool dibuat lazily saat job pertama)
+import ocr_pool
+from job_queue import OcrJobQueue, QueueFullError
+
+# OCR result cache berdasarkan hash isi file
+import ocr_cache
+ocr_result_cache = ocr_cache.create_ocr_cache()
+
+# Keyset pagination untuk endpoint history
+from pagination import (
+    InvalidQueryParam, encode_cursor, decode_cursor, parse_limit, parse_date_arg,
+    parse_decimal_arg, parse_fields, serialize_rows, split_page
+)
+
+# Export register PPN (CSV / XLSX / Parquet)
+import faktur_export
+
+# Preview store (memory + disk) menggantikan dict uploaded_files
+from preview_store import PreviewStore, PREVIEW_TTL
+preview_store = PreviewStore()
 
 # Create Flask app
 app = Flask(__name__)
@@ -57,7 +97,8 @@ app = Flask(__name__)
 CORS(app, 
      origins=["*", "https://pajak-ocr.vercel.app", "http://localhost:3000"],  # Allow Vercel domain
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "Accept"],
+     allow_headers=["Content-Type", "Authorization", "Accept", "Idempotency-Key"],
+     expose_headers=["Idempotent-Replayed", "Retry-After", "ETag"],
      supports_credentials=False)
 
 # Basic Configuration
@@ -118,7 +159,7 @@ def home():
         "service": "faktur-service-real-ocr",
         "status": "running",
         "database_available": DATABASE_AVAILABLE,
-        "ocr_available": OCR_AVAILABLE,
+        "ocr_available": OCR_ENABLED,
         "timestamp": str(datetime.utcnow()),
         "version": "2.0.0"
     })
@@ -131,7 +172,11 @@ def health():
         "service": "faktur-service", 
         "database_available": DATABASE_AVAILABLE,
         "database_url_set": bool(os.getenv('DATABASE_URL')),
-        "environment": os.getenv('ENVIRONMENT', 'production')
+        "environment": os.getenv('ENVIRONMENT', 'production'),
+        "ocr_pool": ocr_pool.pool_stats(),
+        "ocr_jobs": ocr_jobs.stats(),
+        "preview_store": preview_store.stats(),
+        "ocr_cache": ocr_result_cache.stats() if ocr_result_cache else {"enabled": False}
     })
 
 @app.route('/api/test-db', methods=['GET'])
@@ -174,8 +219,13 @@ def test_database():
         }), 500
 
 @app.route('/api/save-faktur', methods=['POST'])
+@idempotent("save-faktur")
 def save_faktur():
-    """Save faktur data to database"""
+    """
+    Save faktur data to database (upsert berdasarkan no_faktur).
+    ?on_conflict=update (default) menimpa faktur yang sudah ada, ?on_conflict=nothing membiarkannya.
+    201 jika faktur baru, 200 jika sudah ada (updated / duplicate)
+    """
     if not DATABASE_AVAILABLE:
         return jsonify({
             "status": "error",
@@ -194,49 +244,46 @@ def save_faktur():
                 "message": "Required fields: bulan, no_faktur, tanggal, npwp_lawan_transaksi, nama_lawan_transaksi, dpp, ppn"
             }), 400
         
-        # Parse date
-        tanggal_obj = datetime.strptime(data['tanggal'], '%Y-%m-%d').date()
-        
         # Determine which table to use based on jenis
         jenis = data.get('jenis', 'masukan').lower()
-        if jenis == 'masukan':
-            new_record = PpnMasukan(
-                bulan=data['bulan'],
-                no_faktur=data['no_faktur'],
-                tanggal=tanggal_obj,
-                keterangan=data.get('keterangan'),
-                npwp_lawan_transaksi=data['npwp_lawan_transaksi'],
-                nama_lawan_transaksi=data['nama_lawan_transaksi'],
-                dpp=float(data['dpp']),
-                ppn=float(data['ppn'])
-            )
-        elif jenis == 'keluaran':
-            new_record = PpnKeluaran(
-                bulan=data['bulan'],
-                no_faktur=data['no_faktur'],
-                tanggal=tanggal_obj,
-                keterangan=data.get('keterangan'),
-                npwp_lawan_transaksi=data['npwp_lawan_transaksi'],
-                nama_lawan_transaksi=data['nama_lawan_transaksi'],
-                dpp=float(data['dpp']),
-                ppn=float(data['ppn'])
-            )
-        else:
+        if jenis not in ('masukan', 'keluaran'):
             return jsonify({
                 "status": "error",
                 "message": "Jenis must be 'masukan' or 'keluaran'"
             }), 400
+        model = PpnMasukan if jenis == 'masukan' else PpnKeluaran
         
-        db.session.add(new_record)
-        db.session.commit()
+        on_conflict = request.args.get('on_conflict', 'update').lower()
+        if on_conflict not in ('nothing', 'update'):
+            return jsonify({
+                "status": "error",
+                "message": "on_conflict must be 'nothing' or 'update'"
+            }), 400
+        
+        row = {
+            "bulan": data['bulan'],
+            "no_faktur": data['no_faktur'],
+            "tanggal": datetime.strptime(data['tanggal'], '%Y-%m-%d').date(),
+            "keterangan": data.get('keterangan'),
+            "npwp_lawan_transaksi": data['npwp_lawan_transaksi'],
+            "nama_lawan_transaksi": data['nama_lawan_transaksi'],
+            "dpp": float(data['dpp']),
+            "ppn": float(data['ppn']),
+            "created_at": datetime.utcnow()
+        }
         
-        logger.info(f"✅ Record saved successfully: {new_record.no_faktur}")
+        # Satu INSERT ... ON CONFLICT (no_faktur): faktur yang sudah ada bukan error
+        written = _upsert_faktur(model, [row], on_conflict)[row["no_faktur"]]
+        record = db.session.get(model, written["id"])
+        
+        logger.info(f"✅ Record saved successfully: {row['no_faktur']} ({written['db_status']})")
         
         return jsonify({
             "status": "success",
-            "message": "Faktur saved successfully!",
-            "data": new_record.to_dict()
-        }), 201
+            "message": "Faktur saved successfully!" if written["db_status"] == "inserted" else f"Faktur already exists ({written['db_status']})",
+            "db_status": written["db_status"],
+            "data": record.to_dict()
+        }), 201 if written["db_status"] == "inserted" else 200
         
     except Exception as e:
         db.session.rollback()
@@ -246,6 +293,83 @@ def save_faktur():
             "message": f"Error: {str(e)}"
         }), 500
 
+FAKTUR_HISTORY_FIELDS = (
+    "id", "bulan", "tanggal", "keterangan", "npwp_lawan_transaksi",
+    "nama_lawan_transaksi", "no_faktur", "dpp", "ppn", "created_at"
+)
+
+def _faktur_history_filters(model, args):
+    """Filter history: tanggal_dari, tanggal_sampai, bulan, npwp, dpp_min, dpp_max"""
+    conditions = []
+    filters = {}
+    
+    tanggal_dari = parse_date_arg(args, 'tanggal_dari')
+    tanggal_sampai = parse_date_arg(args, 'tanggal_sampai')
+    if tanggal_dari:
+        conditions.append(model.tanggal >= tanggal_dari)
+        filters['tanggal_dari'] = tanggal_dari.isoformat()
+    if tanggal_sampai:
+        conditions.append(model.tanggal <= tanggal_sampai)
+        filters['tanggal_sampai'] = tanggal_sampai.isoformat()
+    
+    if args.get('bulan'):
+        conditions.append(model.bulan == args['bulan'])
+        filters['bulan'] = args['bulan']
+    if args.get('npwp'):
+        conditions.append(model.npwp_lawan_transaksi == args['npwp'])
+        filters['npwp'] = args['npwp']
+    
+    dpp_min = parse_decimal_arg(args, 'dpp_min')
+    dpp_max = parse_decimal_arg(args, 'dpp_max')
+    if dpp_min is not None:
+        conditions.append(model.dpp >= dpp_min)
+        filters['dpp_min'] = float(dpp_min)
+    if dpp_max is not None:
+        conditions.append(model.dpp <= dpp_max)
+        filters['dpp_max'] = float(dpp_max)
+    
+    return conditions, filters
+
+def _faktur_history_select(model, jenis, query_fields, conditions, cursor, limit):
+    """SELECT satu tabel faktur (limit + 1 baris) urut created_at DESC, id DESC, plus kolom jenis"""
+    if cursor:
+        key = db.tuple_(model.created_at, model.id)
+        before = db.tuple_(cursor['created_at'], cursor['id'])
+        # Baris dengan (created_at, id) sama di tabel lain: jenis menentukan urutan
+        conditions = conditions + [key <= before if jenis < cursor.get('jenis', jenis) else key < before]
+    
+    return (
+        db.select(*[getattr(model, field) for field in query_fields], db.literal(jenis).label('jenis'))
+        .where(*conditions)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+
+def _faktur_history_query(jenis_list, args, query_fields, cursor, limit):
+    """
+    Satu query untuk satu atau dua tabel: untuk jenis=all kedua SELECT (masing-masing
+    sudah dibatasi limit + 1 lewat index created_at, id) digabung dengan UNION ALL
+    lalu diurutkan ulang di database. Return (query, filters)
+    """
+    selects = []
+    filters = {}
+    for jenis in jenis_list:
+        model = PpnMasukan if jenis == 'masukan' else PpnKeluaran
+        conditions, filters = _faktur_history_filters(model, args)
+        selects.append(_faktur_history_select(model, jenis, query_fields, conditions, cursor, limit))
+    
+    if len(selects) == 1:
+        return selects[0], filters
+    
+    # ORDER BY/LIMIT per cabang harus dibungkus subquery (SQLite tidak mengizinkannya di compound SELECT)
+    merged = db.union_all(*[db.select(branch.subquery()) for branch in selects]).subquery()
+    query = (
+        db.select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc(), merged.c.jenis.desc())
+        .limit(limit + 1)
+    )
+    return query, filters
+
 @app.route('/api/faktur-history', methods=['GET'])
 def get_faktur_history():
     """Get faktur records"""
@@ -258,39 +382,44 @@ def get_faktur_history():
     try:
         # Get query parameters
         jenis = request.args.get('jenis', 'all')  # 'masukan', 'keluaran', or 'all'
-        limit = min(int(request.args.get('limit', 20)), 100)  # Max 100 records
-        
-        results = []
-        
-        if jenis == 'all' or jenis == 'masukan':
-            masukan_results = db.session.execute(
-                db.select(PpnMasukan)
-                .order_by(PpnMasukan.created_at.desc())
-                .limit(limit)
-            ).scalars().all()
-            results.extend([record.to_dict() for record in masukan_results])
-        
-        if jenis == 'all' or jenis == 'keluaran':
-            keluaran_results = db.session.execute(
-                db.select(PpnKeluaran)
-                .order_by(PpnKeluaran.created_at.desc())
-                .limit(limit)
-            ).scalars().all()
-            results.extend([record.to_dict() for record in keluaran_results])
-        
-        # Sort by created_at if getting all
+        if jenis not in ('all', 'masukan', 'keluaran'):
+            raise InvalidQueryParam("jenis harus masukan, keluaran atau all")
+        limit = parse_limit(request.args.get('limit'), 20, 100)  # Max 100 records
+        query_fields, response_fields = parse_fields(request.args.get('fields'), FAKTUR_HISTORY_FIELDS)
+        cursor = request.args.get('cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+        if cursor and cursor.get('jenis', 'masukan') not in ('masukan', 'keluaran'):
+            raise InvalidQueryParam("cursor tidak valid: jenis harus masukan atau keluaran")
+        
+        # Urutan global created_at DESC, id DESC, jenis DESC (tie-breaker antar tabel)
+        jenis_list = ['masukan', 'keluaran'] if jenis == 'all' else [jenis]
+        query, filters = _faktur_history_query(jenis_list, request.args, query_fields, cursor, limit)
+        results, has_more = split_page(db.session.execute(query).mappings().all(), limit)
         if jenis == 'all':
-            results.sort(key=lambda x: x['created_at'], reverse=True)
-            results = results[:limit]  # Apply limit after sorting
+            response_fields = response_fields + ['jenis']
+        
+        next_cursor = None
+        if has_more:
+            last = results[-1]
+            next_cursor = encode_cursor({"created_at": last['created_at'], "id": last['id'], "jenis": last['jenis']})
         
         return jsonify({
             "status": "success",
             "message": "Data retrieved successfully",
-            "data": results,
+            "data": serialize_rows(results, response_fields),
             "total": len(results),
-            "jenis": jenis
+            "jenis": jenis,
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "filters": filters
         })
         
+    except InvalidQueryParam as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Get history error: {str(e)}")
         return jsonify({
@@ -348,7 +477,422 @@ def delete_faktur(faktur_id):
             "message": f"Error: {str(e)}"
         }), 500
 
+@app.route('/api/faktur-summary', methods=['GET'])
+def get_faktur_summary():
+    """Rekap PPN masukan vs keluaran per bulan: ?tahun=2024[&bulan=3]"""
+    if not DATABASE_AVAILABLE:
+        return jsonify({
+            "status": "error",
+            "message": "Database not available"
+        }), 500
+    
+    try:
+        tahun = int(request.args.get('tahun', datetime.now().year))
+        bulan = int(request.args['bulan']) if request.args.get('bulan') else None
+        rekap = get_rekap_ppn(tahun, bulan)
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "tahun dan bulan (1-12) harus berupa angka"
+        }), 400
+    except Exception as e:
+        logger.error(f"Get faktur summary error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error: {str(e)}"
+        }), 500
+    
+    return jsonify({
+        "status": "success",
+        "message": "Summary retrieved successfully",
+        "summary": rekap
+    })
+
+def _faktur_export_query(jenis_list, args):
+    """SELECT kolom export untuk satu / dua tabel (UNION ALL), urut jenis, tanggal, id. Return (query, filters)"""
+    selects = []
+    filters = {}
+    for jenis in jenis_list:
+        model = PpnMasukan if jenis == 'masukan' else PpnKeluaran
+        conditions, filters = _faktur_history_filters(model, args)
+        columns = [
+            db.literal(jenis).label('jenis') if field == 'jenis' else getattr(model, field)
+            for field in faktur_export.EXPORT_FIELDS
+        ]
+        selects.append(db.select(*columns).where(*conditions))
+    
+    merged = (db.union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+    query = db.select(merged).order_by(merged.c.jenis, merged.c.tanggal, merged.c.id)
+    return query, filters
+
+@app.route('/api/faktur-export', methods=['GET'])
+def export_faktur():
+    """
+    Export register PPN: ?format=csv|xlsx|parquet&jenis=masukan|keluaran|all
+    plus filter history (bulan, npwp, tanggal_dari, tanggal_sampai, dpp_min, dpp_max)
+    """
+    if not DATABASE_AVAILABLE:
+        return jsonify({
+            "status": "error",
+            "message": "Database not available"
+        }), 500
+    
+    try:
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format not in faktur_export.EXPORT_FORMATS:
+            raise InvalidQueryParam("format harus csv, xlsx atau parquet")
+        jenis = request.args.get('jenis', 'all')
+        if jenis not in ('all', 'masukan', 'keluaran'):
+            raise InvalidQueryParam("jenis harus masukan, keluaran atau all")
+        if export_format == 'parquet' and not faktur_export.PARQUET_AVAILABLE:
+            return jsonify({
+                "status": "error",
+                "message": "Export parquet membutuhkan pyarrow"
+            }), 501
+        
+        jenis_list = ['masukan', 'keluaran'] if jenis == 'all' else [jenis]
+        query, filters = _faktur_export_query(jenis_list, request.args)
+        logger.info(f"📤 Export faktur {export_format} (jenis={jenis}, filter={filters})")
+        
+        # Server-side cursor: baris diambil per EXPORT_BATCH_SIZE, bukan semuanya sekaligus
+        result = db.session.execute(query.execution_options(yield_per=faktur_export.EXPORT_BATCH_SIZE))
+        mimetype, extension = faktur_export.EXPORT_FORMATS[export_format]
+        filename = f"ppn_{jenis}.{extension}"
+        
+        if export_format == 'csv':
+            return Response(
+                stream_with_context(faktur_export.stream_csv(result.partitions())),
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        
+        buffer = faktur_export.write_export_file(export_format, result.partitions())
+        return send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=filename)
+        
+    except InvalidQueryParam as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Export faktur error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error: {str(e)}"
+        }), 500
+
+# ========================================
+# OCR PIPELINE (SYNC & ASYNC)
+# ========================================
+
+def _generate_fallback_data(filename):
+    """Fallback data jika OCR gagal atau tidak tersedia"""
+    logger.warning("⚠️ Using fallback data generation")
+    
+    import random
+    
+    # Generate more realistic fake data
+    companies = [
+        "PT MITRA SEJAHTERA INDONESIA",
+        "CV BERKAH JAYA MANDIRI", 
+        "PT SUMBER REZEKI NUSANTARA",
+        "UD HARAPAN BERSAMA",
+        "PT CAHAYA BANGSA UTAMA"
+    ]
+    
+    extracted_data = {
+        "no_faktur": f"010.002-25.{random.randint(10000000, 99999999)}",
+        "tanggal": "2025-01-15",
+        "nama_lawan_transaksi": random.choice(companies),
+        "npwp_lawan_transaksi": f"{random.randint(10,99)}.{random.randint(100,999)}.{random.randint(100,999)}.{random.randint(1,9)}-{random.randint(100,999)}.{random.randint(100,999)}",
+        "dpp": round(random.uniform(500000, 2000000), 2),
+        "ppn": 0.0,
+        "bulan": "Januari 2025",
+        "keterangan": f"OCR processing from uploaded file: {filename}"
+    }
+    
+    # Calculate PPN (11% of DPP)
+    extracted_data["ppn"] = round(extracted_data["dpp"] * 0.11, 2)
+    return extracted_data
+
+def _fallback_ocr_result(filename):
+    """Hasil pipeline berisi fallback data"""
+    return {
+        "extracted_data": _generate_fallback_data(filename),
+        "confidence": 0.3,
+        "text_length": 0,
+        "processing_mode": "fallback",
+        "cache_hit": False
+    }
+
+def _run_ocr_pipeline(file_content, filename, file_hash, ocr_func):
+    """OCR + validasi kualitas + fallback data, dipakai oleh mode sync maupun job async"""
+    extracted_data = None
+    confidence = 0.0
+    text_length = 0
+    processing_mode = "fallback"
+    cache_hit = False
+    stage_timings = {}
+    
+    if OCR_ENABLED:
+        try:
+            cache_key = ocr_cache.make_cache_key(file_hash, ocr_pool.cache_signature())
+            cached = ocr_result_cache.get(cache_key) if ocr_result_cache else None
+            
+            if cached:
+                logger.info(f"⚡ OCR cache hit for {filename} ({file_hash})")
+                extracted_data = cached["extracted_data"]
+                confidence = cached["confidence"]
+                text_length = cached["text_length"]
+                processing_mode = cached["processing_mode"]
+                cache_hit = True
+            else:
+                logger.info(f"🔍 Starting enhanced OCR processing...")
+                extracted_data, confidence, text_length, processing_mode = ocr_func(file_content, filename, stage_timings)
+                if ocr_result_cache and extracted_data:
+                    ocr_result_cache.set(cache_key, {
+                        "extracted_data": extracted_data,
+                        "confidence": confidence,
+                        "text_length": text_length,
+                        "processing_mode": processing_mode
+                    })
+            logger.info(f"✅ {processing_mode} processing completed with confidence: {confidence}")
+            
+            # Validate extracted data quality
+            if _is_valid_extraction(extracted_data, confidence):
+                logger.info(f"🎯 High quality extraction achieved: {extracted_data['no_faktur']}")
+            else:
+                logger.warning(f"⚠️ Low quality extraction (confidence: {confidence}), using fallback")
+                extracted_data = None
+            
+        except Exception as ocr_error:
+            logger.error(f"❌ Enhanced OCR processing failed: {ocr_error}")
+            extracted_data = None
+            confidence = 0.1
+    
+    # Fallback data if OCR failed or unavailable
+    if not extracted_data or not extracted_data.get("no_faktur"):
+        return _fallback_ocr_result(filename)
+    
+    return {
+        "extracted_data": extracted_data,
+        "confidence": confidence,
+        "text_length": text_length,
+        "processing_mode": processing_mode,
+        "cache_hit": cache_hit,
+        "stage_timings_ms": stage_timings
+    }
+
+def _is_valid_extraction(extracted_data, confidence):
+    """Aturan kualitas minimal hasil OCR sebelum disimpan"""
+    return bool(extracted_data and extracted_data.get("no_faktur") and confidence > 0.2)
+
+def _run_multi_page_pipeline(file_content, filename, file_hash, pages_func):
+    """
+    OCR PDF multi-page: setiap halaman diperlakukan sebagai satu faktur.
+    pages_func(file_content, filename) -> (list hasil per halaman, total halaman)
+    """
+    if not OCR_ENABLED:
+        return _fallback_ocr_result(filename)
+    
+    cache_hit = False
+    try:
+        cache_key = ocr_cache.make_cache_key(file_hash, ocr_pool.cache_signature() + "|multi_page")
+        cached = ocr_result_cache.get(cache_key) if ocr_result_cache else None
+        
+        if cached:
+            logger.info(f"⚡ OCR cache hit for {filename} ({file_hash}, multi-page)")
+            pages, total_pages = cached["pages"], cached["total_halaman"]
+            cache_hit = True
+        else:
+            logger.info(f"🔍 Starting multi-page OCR processing...")
+            pages, total_pages = pages_func(file_content, filename)
+            if ocr_result_cache and any(page["extracted_data"] for page in pages):
+                ocr_result_cache.set(cache_key, {"pages": pages, "total_halaman": total_pages})
+    except Exception as ocr_error:
+        logger.error(f"❌ Multi-page OCR processing failed: {ocr_error}")
+        return _fallback_ocr_result(filename)
+    
+    invoices = []
+    for page in pages:
+        invoice = {
+            "halaman": page["halaman"],
+            "extracted_data": page["extracted_data"],
+            "confidence_score": round(page["confidence"], 2),
+            "text_length": page["text_length"],
+            "processing_mode": page["processing_mode"],
+            "stage_timings_ms": {} if cache_hit else page.get("stage_timings_ms", {}),
+            "error": page["error"]
+        }
+        if page["extracted_data"] and not _is_valid_extraction(page["extracted_data"], page["confidence"]):
+            logger.warning(f"⚠️ Low quality extraction on page {page['halaman']} (confidence: {page['confidence']})")
+            invoice["extracted_data"] = None
+            invoice["error"] = "Low quality extraction"
+        invoices.append(invoice)
+    
+    valid = [invoice for invoice in invoices if invoice["extracted_data"]]
+    if not valid:
+        logger.warning("⚠️ No valid invoice found in any page, using fallback")
+        return _fallback_ocr_result(filename)
+    
+    logger.info(f"🎯 Multi-page extraction: {len(valid)}/{len(invoices)} pages with valid faktur")
+    
+    # Mode keseluruhan: text_layer jika semua faktur valid diambil dari text layer
+    page_modes = {invoice["processing_mode"] for invoice in valid}
+    if page_modes == {"text_layer"}:
+        processing_mode = "text_layer_multi_page"
+    elif "text_layer" in page_modes:
+        processing_mode = "mixed_multi_page"
+    else:
+        processing_mode = "enhanced_ocr_multi_page"
+    
+    return {
+        "extracted_data": valid[0]["extracted_data"],
+        "confidence": valid[0]["confidence_score"],
+        "text_length": sum(invoice["text_length"] for invoice in invoices),
+        "processing_mode": processing_mode,
+        "cache_hit": cache_hit,
+        "invoices": invoices,
+        "total_halaman": total_pages
+    }
+
+def _save_ocr_result(ocr_result, on_conflict="nothing"):
+    """
+    Save hasil pipeline ke ppn_masukan dengan satu upsert (ON CONFLICT (no_faktur)).
+    Faktur yang sudah ada dihitung tersimpan (db_status duplicate / updated).
+    Untuk multi-page status dicatat per halaman.
+    Return (database_saved, db_info) dengan db_info = {"db_status", "record_id"} faktur utama
+    """
+    if "invoices" in ocr_result:
+        extracted = [invoice["extracted_data"] for invoice in ocr_result["invoices"] if invoice["extracted_data"]]
+    else:
+        extracted = [ocr_result["extracted_data"]]
+    
+    # no_faktur sama di beberapa halaman: yang terakhir menang
+    rows = {}
+    for extracted_data in extracted:
+        rows[extracted_data["no_faktur"]] = _faktur_row(extracted_data)
+    
+    try:
+        written = _upsert_faktur(PpnMasukan, list(rows.values()), on_conflict) if rows else {}
+        for no_faktur, info in written.items():
+            logger.info(f"✅ Data saved to database: {no_faktur} ({info['db_status']})")
+    except Exception as db_error:
+        logger.error(f"❌ Database save failed: {db_error}")
+        db.session.rollback()
+        written = None
+    
+    def db_info(no_faktur):
+        if written is None:
+            return {"db_status": "error"}
+        return {"db_status": written[no_faktur]["db_status"], "record_id": written[no_faktur]["id"]}
+    
+    if "invoices" not in ocr_result:
+        return written is not None, db_info(ocr_result["extracted_data"]["no_faktur"])
+    
+    for invoice in ocr_result["invoices"]:
+        if invoice["extracted_data"]:
+            invoice.update(db_info(invoice["extracted_data"]["no_faktur"]))
+            invoice["database_saved"] = written is not None
+        else:
+            invoice.update(database_saved=False, db_status="skipped")
+    all_saved = written is not None and all(invoice["extracted_data"] for invoice in ocr_result["invoices"])
+    return all_saved, db_info(ocr_result["extracted_data"]["no_faktur"])
+
+def _build_process_result(ocr_result, database_saved, filename, file_hash, db_info=None):
+    """Response structure expected by frontend"""
+    result = {
+        "status": "success",
+        "message": f"File processed successfully using {ocr_result['processing_mode']} mode",
+        "service_type": "faktur",
+        "extracted_data": ocr_result["extracted_data"],
+        "confidence_score": round(ocr_result["confidence"], 2),
+        "processing_mode": ocr_result["processing_mode"],
+        "cache_hit": ocr_result["cache_hit"],
+        "ocr_available": OCR_ENABLED,
+        "text_length": ocr_result["text_length"],
+        "database_saved": database_saved,
+        **(db_info or {}),
+        "filename": filename,
+        "preview_url": f"/preview/{file_hash}",
+        "file_hash": file_hash,
+        "stage_timings_ms": ocr_result.get("stage_timings_ms", {})
+    }
+    if "invoices" in ocr_result:
+        result["invoices"] = ocr_result["invoices"]
+        result["total_halaman"] = ocr_result["total_halaman"]
+    return result
+
+def _pdf_pages_in_pool(file_content, filename, on_page_done=None):
+    """OCR setiap halaman PDF secara paralel di OCR process pool (atau seluruh PDF di ocr-worker)"""
+    return ocr_pool.run_pdf_pages(file_content, filename, timeout=OCR_JOB_TIMEOUT, on_page_done=on_page_done)
+
+def _ocr_in_worker(content, name, stage_timings):
+    """OCR di ocr-worker terpisah (OCR_RPC_ADDRESS): proses web tidak menjalankan Tesseract"""
+    outcome = ocr_pool.run_ocr(content, name, timeout=OCR_JOB_TIMEOUT)
+    stage_timings.update(outcome["stage_timings_ms"])
+    return (
+        outcome["extracted_data"], outcome["confidence"],
+        outcome["text_length"], outcome["processing_mode"]
+    )
+
+def _run_ocr_job(job, file_content, filename, file_hash, multi_page=False, on_conflict="nothing"):
+    """Runner untuk job async - OCR di process pool, simpan ke database di app context"""
+    def ocr_in_pool(content, name, stage_timings):
+        outcome = ocr_pool.run_ocr(content, name, timeout=OCR_JOB_TIMEOUT)
+        stage_timings.update(outcome["stage_timings_ms"])
+        job.mark("ocr_started_at", outcome["ocr_started_at"])
+        job.mark("ocr_finished_at", outcome["ocr_finished_at"])
+        job.update(stage="saving", progress=80)
+        return (
+            outcome["extracted_data"], outcome["confidence"],
+            outcome["text_length"], outcome["processing_mode"]
+        )
+    
+    def on_page_done(done, total):
+        # Progress 10% - 80% dibagi rata per halaman
+        job.update(stage=f"ocr page {done}/{total}", progress=10 + int(70 * done / total))
+    
+    def pages_in_pool(content, name):
+        job.mark("ocr_started_at")
+        pages = _pdf_pages_in_pool(content, name, on_page_done=on_page_done)
+        job.mark("ocr_finished_at")
+        job.update(stage="saving", progress=80)
+        return pages
+    
+    with app.app_context():
+        if multi_page:
+            ocr_result = _run_multi_page_pipeline(file_content, filename, file_hash, pages_in_pool)
+        else:
+            ocr_result = _run_ocr_pipeline(file_content, filename, file_hash, ocr_in_pool)
+        if "ocr_finished_at" not in job.timings:
+            job.mark("ocr_finished_at")
+        database_saved, db_info = _save_ocr_result(ocr_result, on_conflict)
+    
+    return _build_process_result(ocr_result, database_saved, filename, file_hash, db_info)
+
+OCR_JOB_TIMEOUT = int(os.getenv('OCR_JOB_TIMEOUT', 300))
+ocr_jobs = OcrJobQueue(_run_ocr_job, max_workers=ocr_pool.OCR_POOL_WORKERS)
+
+OCR_MULTI_PAGE_DEFAULT = os.getenv('OCR_MULTI_PAGE_DEFAULT', 'false')
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'tiff', 'bmp'}
+
+def _request_flag(name, default=''):
+    """Baca flag boolean dari query string atau form field (mis. ?async=1)"""
+    flag = request.args.get(name, request.form.get(name, default))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def _is_async_request():
+    """Mode job async diminta lewat ?async=1"""
+    return _request_flag('async')
+
+def _is_multi_page_request(filename):
+    """Mode multi-page (?multi_page=1) hanya berlaku untuk PDF"""
+    return filename.lower().endswith('.pdf') and _request_flag('multi_page', OCR_MULTI_PAGE_DEFAULT)
+
 @app.route('/api/process', methods=['POST', 'OPTIONS'])
+@idempotent("process")
 def process_upload():
     """Process uploaded file - main endpoint for frontend with real OCR"""
     if request.method == 'OPTIONS':
@@ -384,8 +928,7 @@ def process_upload():
             }), 400
         
         # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'pdf', 'tiff', 'bmp'}
-        if '.' not in file.filename or file.filename.rsplit('.', 1)[1].lower() not in allowed_extensions:
+        if not _is_allowed_file(file.filename):
             return jsonify({
                 "status": "error",
                 "message": "File type not supported. Please upload PNG, JPG, JPEG, PDF, TIFF, or BMP files.",
@@ -403,152 +946,498 @@ def process_upload():
                 "error_code": "EMPTY_FILE_CONTENT"
             }), 400
         
-        # Store file for preview
-        safe_filename = file.filename.replace(' ', '_').replace('(', '').replace(')', '')
-        uploaded_files[safe_filename] = {
-            'content': file_content,
-            'original_name': file.filename,
-            'content_type': file.content_type or 'image/jpeg',
-            'timestamp': datetime.now()
-        }
-        
         # Generate file hash for deduplication
         file_hash = hashlib.md5(file_content).hexdigest()
         
-        logger.info(f"🔍 Processing file: {file.filename} (size: {len(file_content)} bytes)")
+        # Store file for preview (content-addressed, thumbnail dibuat saat /preview pertama)
+        try:
+            preview_store.put(file_hash, file_content, file.filename)
+        except Exception as preview_error:
+            logger.error(f"❌ Preview store failed: {preview_error}")
         
-        # Process with enhanced OCR engine if available
-        extracted_data = None
-        confidence = 0.0
-        text_length = 0
-        processing_mode = "fallback"
+        multi_page = _is_multi_page_request(file.filename)
         
-        if OCR_AVAILABLE:
-            try:
-                logger.info(f"🔍 Starting enhanced OCR processing...")
-                extracted_data, confidence, text_length = ocr_engine.process_file(file_content, file.filename)
-                processing_mode = "enhanced_ocr"
-                logger.info(f"✅ Enhanced OCR processing completed with confidence: {confidence}")
-                
-                # Validate extracted data quality
-                if extracted_data and extracted_data.get("no_faktur") and confidence > 0.2:
-                    logger.info(f"🎯 High quality extraction achieved: {extracted_data['no_faktur']}")
-                else:
-                    logger.warning(f"⚠️ Low quality extraction (confidence: {confidence}), using fallback")
-                    extracted_data = None
-                
-            except Exception as ocr_error:
-                logger.error(f"❌ Enhanced OCR processing failed: {ocr_error}")
-                extracted_data = None
-                confidence = 0.1
+        on_conflict = request.args.get('on_conflict', request.form.get('on_conflict', 'nothing')).lower()
+        if on_conflict not in ('nothing', 'update'):
+            return jsonify({
+                "status": "error",
+                "message": "on_conflict must be 'nothing' or 'update'"
+            }), 400
         
-        # Fallback data if OCR failed or unavailable
-        if not extracted_data or not extracted_data.get("no_faktur"):
-            logger.warning("⚠️ Using fallback data generation")
-            
-            import random
+        # Async mode: kembalikan job id, OCR dijalankan di background
+        if _is_async_request():
+            try:
+                job = ocr_jobs.submit(
+                    file.filename, file_content, file.filename, file_hash, multi_page, on_conflict
+                )
+            except QueueFullError as e:
+                logger.warning(f"⚠️ {e}")
+                response = jsonify({
+                    "status": "error",
+                    "message": "OCR queue is full, please retry later",
+                    "error_code": "QUEUE_FULL"
+                })
+                response.headers['Retry-After'] = '5'
+                return response, 429
             
-            # Generate more realistic fake data
-            companies = [
-                "PT MITRA SEJAHTERA INDONESIA",
-                "CV BERKAH JAYA MANDIRI", 
-                "PT SUMBER REZEKI NUSANTARA",
-                "UD HARAPAN BERSAMA",
-                "PT CAHAYA BANGSA UTAMA"
-            ]
+            return jsonify({
+                "status": "accepted",
+                "message": "File queued for OCR processing",
+                "service_type": "faktur",
+                "job_id": job.id,
+                "job_url": f"/api/jobs/{job.id}",
+                "events_url": f"/api/jobs/{job.id}/events",
+                "queue_depth": ocr_jobs.depth(),
+                "filename": file.filename,
+                "preview_url": f"/preview/{file_hash}",
+                "file_hash": file_hash
+            }), 202
+        
+        logger.info(f"🔍 Processing file: {file.filename} (size: {len(file_content)} bytes)")
+        
+        # Process with enhanced OCR engine if available (result cache dicek lebih dulu)
+        if multi_page:
+            # Halaman PDF di-OCR paralel di process pool, satu faktur per halaman
+            ocr_result = _run_multi_page_pipeline(file_content, file.filename, file_hash, _pdf_pages_in_pool)
+        else:
+            if ocr_rpc.rpc_enabled():
+                ocr_func = _ocr_in_worker
+            else:
+                ocr_func = ocr_engine.process_file if OCR_AVAILABLE else None
+            ocr_result = _run_ocr_pipeline(file_content, file.filename, file_hash, ocr_func)
+        
+        # Save to database (upsert, faktur yang sudah ada bukan error)
+        database_saved, db_info = _save_ocr_result(ocr_result, on_conflict)
+        
+        # Return response structure expected by frontend
+        return jsonify(_build_process_result(
+            ocr_result, database_saved, file.filename, file_hash, db_info
+        )), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Process upload error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Processing failed: {str(e)}",
+            "error_code": "PROCESS_ERROR"
+        }), 500
+
+# ========================================
+# BATCH UPLOAD
+# ========================================
+
+OCR_BATCH_MAX_FILES = int(os.getenv('OCR_BATCH_MAX_FILES', 500))
+OCR_BATCH_CONCURRENCY = int(os.getenv('OCR_BATCH_CONCURRENCY', ocr_pool.OCR_POOL_WORKERS))
+OCR_BATCH_MAX_FILE_BYTES = int(os.getenv('OCR_BATCH_MAX_FILE_BYTES', 16 * 1024 * 1024))
+# Total ukuran (setelah ekstrak ZIP) semua file dalam satu batch
+OCR_BATCH_MAX_TOTAL_BYTES = int(os.getenv('OCR_BATCH_MAX_TOTAL_BYTES', 256 * 1024 * 1024))
+
+class BatchTooLargeError(Exception):
+    """Batch melebihi OCR_BATCH_MAX_FILES / OCR_BATCH_MAX_TOTAL_BYTES (413)"""
+BULK_INSERT_CHUNK_SIZE = 500
+
+def _is_allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def _collect_batch_files():
+    """
+    Ambil semua file dari request: field 'files' (multiple) dan/atau arsip ZIP.
+    Jumlah file dan total ukuran dicek dari infolist() ZIP sebelum ada member yang
+    diekstrak; raise BatchTooLargeError jika melebihi batas.
+    Return (list (filename, content), list error per file)
+    """
+    pending = []  # (filename, ukuran, fungsi baca isi)
+    rejected = []
+    archives = []
+    
+    try:
+        for upload in request.files.getlist('files') + request.files.getlist('file'):
+            if not upload.filename:
+                continue
+            content = upload.read()
             
-            extracted_data = {
-                "no_faktur": f"010.002-25.{random.randint(10000000, 99999999)}",
-                "tanggal": "2025-01-15",
-                "nama_lawan_transaksi": random.choice(companies),
-                "npwp_lawan_transaksi": f"{random.randint(10,99)}.{random.randint(100,999)}.{random.randint(100,999)}.{random.randint(1,9)}-{random.randint(100,999)}.{random.randint(100,999)}",
-                "dpp": round(random.uniform(500000, 2000000), 2),
-                "ppn": 0.0,
-                "bulan": "Januari 2025",
-                "keterangan": f"OCR processing from uploaded file: {file.filename}"
+            if upload.filename.lower().endswith('.zip'):
+                try:
+                    archive = zipfile.ZipFile(io.BytesIO(content))
+                except zipfile.BadZipFile:
+                    rejected.append({"filename": upload.filename, "error": "Invalid ZIP archive"})
+                    continue
+                archives.append(archive)
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    if member.is_dir() or not name or member.filename.startswith('__MACOSX'):
+                        continue
+                    if not _is_allowed_file(name):
+                        rejected.append({"filename": name, "error": "File type not supported"})
+                    elif member.file_size > OCR_BATCH_MAX_FILE_BYTES:
+                        rejected.append({"filename": name, "error": "File too large"})
+                    else:
+                        pending.append((name, member.file_size, functools.partial(archive.read, member)))
+            elif not _is_allowed_file(upload.filename):
+                rejected.append({"filename": upload.filename, "error": "File type not supported"})
+            else:
+                pending.append((upload.filename, len(content), lambda content=content: content))
+        
+        if len(pending) > OCR_BATCH_MAX_FILES:
+            raise BatchTooLargeError(f"Too many files in batch (max {OCR_BATCH_MAX_FILES})")
+        total_bytes = sum(size for _, size, _ in pending)
+        if total_bytes > OCR_BATCH_MAX_TOTAL_BYTES:
+            raise BatchTooLargeError(
+                f"Batch too large ({total_bytes} bytes, max {OCR_BATCH_MAX_TOTAL_BYTES} bytes)"
+            )
+        
+        collected = []
+        for name, _, read in pending:
+            try:
+                collected.append((name, read()))
+            except zipfile.BadZipFile:
+                rejected.append({"filename": name, "error": "Corrupt file in ZIP archive"})
+        return collected, rejected
+    finally:
+        for archive in archives:
+            archive.close()
+
+def _ocr_batch_file(filename, file_content, multi_page):
+    """OCR satu file dari batch (dijalankan di thread, CPU-bound bagian di OCR process pool)"""
+    file_hash = hashlib.md5(file_content).hexdigest()
+    try:
+        preview_store.put(file_hash, file_content, filename)
+    except Exception as preview_error:
+        logger.error(f"❌ Preview store failed for {filename}: {preview_error}")
+    
+    def ocr_in_pool(content, name, stage_timings):
+        outcome = ocr_pool.run_ocr(content, name, timeout=OCR_JOB_TIMEOUT)
+        stage_timings.update(outcome["stage_timings_ms"])
+        return (
+            outcome["extracted_data"], outcome["confidence"],
+            outcome["text_length"], outcome["processing_mode"]
+        )
+    
+    if multi_page and filename.lower().endswith('.pdf'):
+        ocr_result = _run_multi_page_pipeline(file_content, filename, file_hash, _pdf_pages_in_pool)
+    else:
+        ocr_result = _run_ocr_pipeline(file_content, filename, file_hash, ocr_in_pool)
+    return file_hash, ocr_result
+
+def _faktur_row(extracted_data):
+    """Konversi extracted_data ke dict kolom tabel ppn_masukan / ppn_keluaran"""
+    try:
+        tanggal_obj = datetime.strptime(extracted_data["tanggal"], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        tanggal_obj = datetime.now().date()
+    
+    return {
+        "no_faktur": extracted_data["no_faktur"],
+        "tanggal": tanggal_obj,
+        "nama_lawan_transaksi": extracted_data["nama_lawan_transaksi"],
+        "npwp_lawan_transaksi": extracted_data["npwp_lawan_transaksi"],
+        "dpp": float(extracted_data["dpp"]),
+        "ppn": float(extracted_data["ppn"]),
+        "bulan": extracted_data["bulan"],
+        "keterangan": extracted_data.get("keterangan"),
+        "created_at": datetime.utcnow()
+    }
+
+def _bulk_insert_faktur(model, rows, on_conflict="nothing"):
+    """
+    Bulk INSERT ... ON CONFLICT (no_faktur) DO NOTHING / DO UPDATE dalam satu transaksi.
+    Return dict no_faktur -> {"id", "db_status"} untuk baris yang ditulis
+    (baris yang tidak ada di hasil berarti duplikat yang dilewati).
+    """
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    
+    written = {}
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_INSERT_CHUNK_SIZE]
+        stmt = dialect_insert(model).values(chunk)
+        
+        if on_conflict == "update":
+            update_columns = {
+                column: stmt.excluded[column]
+                for column in chunk[0]
+                if column not in ("no_faktur", "created_at")
             }
-            
-            # Calculate PPN (11% of DPP)
-            extracted_data["ppn"] = round(extracted_data["dpp"] * 0.11, 2)
-            confidence = 0.3
-            processing_mode = "fallback"
+            stmt = stmt.on_conflict_do_update(index_elements=["no_faktur"], set_=update_columns)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["no_faktur"])
+        
+        existing = set()
+        if db.engine.dialect.name == 'postgresql':
+            # xmax = 0 hanya untuk baris yang baru di-insert (bukan hasil DO UPDATE)
+            inserted_flag = db.literal_column("(xmax = 0)")
+        else:
+            # SQLite (dev) tidak punya xmax: faktur yang sudah ada dicek dulu
+            inserted_flag = db.literal(True)
+            if on_conflict == "update":
+                existing = set(db.session.execute(
+                    db.select(model.no_faktur).where(model.no_faktur.in_([row["no_faktur"] for row in chunk]))
+                ).scalars())
+        stmt = stmt.returning(model.id, model.no_faktur, inserted_flag.label("inserted"))
         
-        # Save to database
+        for row in db.session.execute(stmt):
+            written[row.no_faktur] = {
+                "id": row.id,
+                "db_status": "inserted" if row.inserted and row.no_faktur not in existing else "updated"
+            }
+    
+    db.session.commit()
+    return written
+
+def _upsert_faktur(model, rows, on_conflict="nothing"):
+    """
+    _bulk_insert_faktur + id faktur yang dilewati ON CONFLICT DO NOTHING (db_status "duplicate"),
+    jadi setiap no_faktur di rows punya hasil. Retry / upload ulang tidak pernah IntegrityError.
+    """
+    written = _bulk_insert_faktur(model, rows, on_conflict)
+    skipped = [row["no_faktur"] for row in rows if row["no_faktur"] not in written]
+    for start in range(0, len(skipped), BULK_INSERT_CHUNK_SIZE):
+        chunk = skipped[start:start + BULK_INSERT_CHUNK_SIZE]
+        for row in db.session.execute(db.select(model.id, model.no_faktur).where(model.no_faktur.in_(chunk))):
+            written[row.no_faktur] = {"id": row.id, "db_status": "duplicate"}
+    return written
+
+@app.route('/api/process-batch', methods=['POST', 'OPTIONS'])
+@idempotent("process-batch")
+def process_batch_upload():
+    """Batch upload: banyak file (atau ZIP), OCR paralel terbatas, satu bulk insert per batch"""
+    if request.method == 'OPTIONS':
+        return jsonify({"status": "ok"}), 200
+    
+    if not DATABASE_AVAILABLE:
+        return jsonify({
+            "status": "error",
+            "message": "Database service temporarily unavailable",
+            "error_code": "DB_UNAVAILABLE"
+        }), 503
+    
+    started_at = time.time()
+    try:
         try:
-            # Parse tanggal safely
+            files, rejected = _collect_batch_files()
+        except BatchTooLargeError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e),
+                "error_code": "BATCH_TOO_LARGE"
+            }), 413
+        
+        if not files and not rejected:
+            return jsonify({
+                "status": "error",
+                "message": "No file uploaded",
+                "error_code": "NO_FILE"
+            }), 400
+        
+        jenis = request.args.get('jenis', request.form.get('jenis', 'masukan')).lower()
+        if jenis not in ('masukan', 'keluaran'):
+            return jsonify({
+                "status": "error",
+                "message": "Jenis must be 'masukan' or 'keluaran'"
+            }), 400
+        model = PpnMasukan if jenis == 'masukan' else PpnKeluaran
+        
+        on_conflict = request.args.get('on_conflict', request.form.get('on_conflict', 'nothing')).lower()
+        if on_conflict not in ('nothing', 'update'):
+            return jsonify({
+                "status": "error",
+                "message": "on_conflict must be 'nothing' or 'update'"
+            }), 400
+        
+        multi_page = _request_flag('multi_page', OCR_MULTI_PAGE_DEFAULT)
+        logger.info(f"📦 Processing batch of {len(files)} files ({len(rejected)} rejected)")
+        
+        # OCR paralel, jumlah file yang berjalan bersamaan dibatasi OCR_BATCH_CONCURRENCY
+        results = [None] * len(files)
+        with ThreadPoolExecutor(max_workers=max(1, OCR_BATCH_CONCURRENCY)) as executor:
+            futures = {
+                executor.submit(_ocr_batch_file, filename, content, multi_page): index
+                for index, (filename, content) in enumerate(files)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                filename = files[index][0]
+                try:
+                    file_hash, ocr_result = future.result()
+                    results[index] = {
+                        "filename": filename,
+                        "file_hash": file_hash,
+                        "preview_url": f"/preview/{file_hash}",
+                        "ocr_result": ocr_result
+                    }
+                    if ocr_result["processing_mode"] == "fallback":
+                        # Data fallback (no_faktur acak) tidak pernah disimpan
+                        logger.warning(f"⚠️ Batch OCR for {filename} produced no valid faktur, skipped")
+                        del results[index]["ocr_result"]
+                        results[index]["error"] = "No valid faktur extracted (OCR failed or low confidence)"
+                except Exception as e:
+                    logger.error(f"❌ Batch OCR failed for {filename}: {e}")
+                    results[index] = {"filename": filename, "error": str(e)}
+        ocr_finished_at = time.time()
+        
+        # Kumpulkan semua faktur (multi-page: satu baris per halaman valid)
+        # no_faktur duplikat dalam batch: yang terakhir menang
+        rows = {}
+        for result in results:
+            ocr_result = result.get("ocr_result")
+            if not ocr_result:
+                continue
+            if "invoices" in ocr_result:
+                invoices = [invoice["extracted_data"] for invoice in ocr_result["invoices"] if invoice["extracted_data"]]
+            else:
+                invoices = [ocr_result["extracted_data"]]
+            for extracted_data in invoices:
+                rows[extracted_data["no_faktur"]] = _faktur_row(extracted_data)
+        
+        written = {}
+        database_error = None
+        if rows:
             try:
-                tanggal_obj = datetime.strptime(extracted_data["tanggal"], '%Y-%m-%d').date()
-            except:
-                tanggal_obj = datetime.now().date()
-            
-            ppn_record = PpnMasukan(
-                no_faktur=extracted_data["no_faktur"],
-                tanggal=tanggal_obj,
-                nama_lawan_transaksi=extracted_data["nama_lawan_transaksi"],
-                npwp_lawan_transaksi=extracted_data["npwp_lawan_transaksi"],
-                dpp=float(extracted_data["dpp"]),
-                ppn=float(extracted_data["ppn"]),
-                bulan=extracted_data["bulan"],
-                keterangan=extracted_data["keterangan"]
-            )
-            
-            db.session.add(ppn_record)
-            db.session.commit()
-            
-            logger.info(f"✅ Data saved to database: {extracted_data['no_faktur']}")
-            database_saved = True
+                written = _upsert_faktur(model, list(rows.values()), on_conflict)
+            except Exception as db_error:
+                db.session.rollback()
+                database_error = str(db_error)
+                logger.error(f"❌ Batch bulk insert failed: {db_error}")
+        
+        def db_status(no_faktur):
+            if database_error:
+                return {"database_saved": False, "db_status": "error"}
+            return {"database_saved": True, "record_id": written[no_faktur]["id"], "db_status": written[no_faktur]["db_status"]}
+        
+        # Susun hasil per file
+        response_results = []
+        for result in results:
+            ocr_result = result.pop("ocr_result", None)
+            if not ocr_result:
+                result.update(status="error", database_saved=False, db_status="skipped")
+                response_results.append(result)
+                continue
             
-        except Exception as db_error:
-            logger.error(f"❌ Database save failed: {db_error}")
-            db.session.rollback()
-            database_saved = False
+            result.update({
+                "status": "success",
+                "extracted_data": ocr_result["extracted_data"],
+                "confidence_score": round(ocr_result["confidence"], 2),
+                "processing_mode": ocr_result["processing_mode"],
+                "cache_hit": ocr_result["cache_hit"]
+            })
+            if "invoices" in ocr_result:
+                for invoice in ocr_result["invoices"]:
+                    if invoice["extracted_data"]:
+                        invoice.update(db_status(invoice["extracted_data"]["no_faktur"]))
+                    else:
+                        invoice.update(database_saved=False, db_status="skipped")
+                result["invoices"] = ocr_result["invoices"]
+                result["total_halaman"] = ocr_result["total_halaman"]
+            result.update(db_status(ocr_result["extracted_data"]["no_faktur"]))
+            response_results.append(result)
         
-        # Return response structure expected by frontend
+        for item in rejected:
+            response_results.append(dict(item, status="rejected", database_saved=False))
+        
+        summary = {
+            "total_files": len(files) + len(rejected),
+            "processed": sum(1 for r in response_results if r["status"] == "success"),
+            "rejected": len(rejected),
+            "failed": sum(1 for r in response_results if r["status"] == "error"),
+            "inserted": sum(1 for w in written.values() if w["db_status"] == "inserted"),
+            "updated": sum(1 for w in written.values() if w["db_status"] == "updated"),
+            "duplicates": sum(1 for w in written.values() if w["db_status"] == "duplicate")
+        }
+        
+        logger.info(f"✅ Batch processed: {summary}")
         return jsonify({
-            "status": "success",
-            "message": f"File processed successfully using {processing_mode} mode",
+            "status": "success" if not database_error else "partial",
+            "message": f"Batch processed: {summary['processed']} files, {summary['inserted']} records inserted",
             "service_type": "faktur",
-            "extracted_data": extracted_data,
-            "confidence_score": round(confidence, 2),
-            "processing_mode": processing_mode,
-            "ocr_available": OCR_AVAILABLE,
-            "text_length": text_length,
-            "database_saved": database_saved,
-            "filename": file.filename,
-            "preview_url": f"/preview/{safe_filename}",
-            "file_hash": file_hash
+            "jenis": jenis,
+            "results": response_results,
+            "summary": summary,
+            "database_error": database_error,
+            "timings_ms": {
+                "ocr_ms": round((ocr_finished_at - started_at) * 1000, 1),
+                "save_ms": round((time.time() - ocr_finished_at) * 1000, 1),
+                "total_ms": round((time.time() - started_at) * 1000, 1)
+            }
         }), 200
         
     except Exception as e:
-        logger.error(f"❌ Process upload error: {str(e)}")
+        logger.error(f"❌ Process batch error: {str(e)}")
         return jsonify({
             "status": "error",
-            "message": f"Processing failed: {str(e)}",
+            "message": f"Batch processing failed: {str(e)}",
             "error_code": "PROCESS_ERROR"
         }), 500
 
-# Store uploaded files temporarily untuk preview
-uploaded_files = {}
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll status dan hasil job OCR async"""
+    job = ocr_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found or expired",
+            "error_code": "JOB_NOT_FOUND"
+        }), 404
+    
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-sent events: kirim progress job sampai selesai"""
+    job = ocr_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found or expired",
+            "error_code": "JOB_NOT_FOUND"
+        }), 404
+    
+    def event_stream():
+        last_version = -1
+        while True:
+            version = job.wait_for_change(last_version, timeout=15)
+            if version == last_version:
+                # Heartbeat supaya proxy tidak menutup koneksi idle
+                yield ": keep-alive\n\n"
+                continue
+            last_version = version
+            event = "done" if job.finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                break
+    
+    return Response(
+        event_stream(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 @app.route('/preview/<filename>')
 def preview_image(filename):
-    """Serve preview images for frontend"""
+    """Serve preview images for frontend (filename = MD5 file upload)"""
     try:
         logger.info(f"📷 Preview requested for: {filename}")
         
-        # Check if file exists in uploaded_files storage
-        if filename in uploaded_files:
-            file_data = uploaded_files[filename]
+        preview = preview_store.get(filename) if PreviewStore.is_valid_key(filename) else None
+        if preview:
+            tier, content, mimetype = preview
             
-            from flask import Response
-            return Response(
-                file_data['content'],
-                mimetype=file_data['content_type'],
-                headers={
-                    'Cache-Control': 'public, max-age=3600',
-                    'Content-Disposition': f'inline; filename="{file_data["original_name"]}"'
-                }
-            )
+            if tier == 'disk':
+                # send_file memakai wsgi.file_wrapper (sendfile) dan mendukung If-None-Match
+                response = send_file(content, mimetype=mimetype, conditional=True, etag=filename)
+            else:
+                response = Response(content, mimetype=mimetype)
+                response.set_etag(filename)
+                response.make_conditional(request)
+            
+            # Content-addressed: isi untuk key yang sama tidak pernah berubah
+            response.headers['Cache-Control'] = f'public, max-age={PREVIEW_TTL}, immutable'
+            return response
         
         # If not found, return 404 
         logger.warning(f"⚠️ Preview file not found: {filename}")
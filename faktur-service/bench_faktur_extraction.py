@@ -0,0 +1,240 @@
+"""
+Microbenchmark extractor faktur: enam extractor terpisah vs extract_faktur_fields (satu pass)
+
+Usage:
+    python bench_faktur_extraction.py [--variants 200] [--repeat 15] [ocr_text.txt ...]
+
+Corpus = contoh teks OCR di bawah + file teks tambahan (opsional), diperbanyak dengan
+variasi noise OCR (salah baca karakter, baris duplikat, spasi). Setiap teks dicek
+menghasilkan field yang identik di kedua implementasi sebelum latency diukur.
+Output print debug extractor lama dibuang ke /dev/null agar tidak ikut terukur.
+
+Kedua implementasi diukur bergantian per repeat (satu putaran pemanasan dibuang),
+lalu dilaporkan median + rentang latency dan median rasio per repeat. Jika rentang
+rasio mencakup 1.0x hasilnya ditulis "dalam noise", bukan sebagai speedup.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import contextlib
+
+from faktur.utils.extraction import (
+    extract_faktur_tanggal, extract_jenis_pajak,
+    extract_npwp_nama_rekanan, extract_dpp,
+    extract_ppn, extract_keterangan, extract_faktur_fields
+)
+
+SAMPLE_OCR_TEXTS = [
+    """Faktur Pajak
+Kode dan Nomor Seri Faktur Pajak : 010.002-24.12345678
+Pengusaha Kena Pajak
+Nama : PT SUMBER MAKMUR ABADI
+Alamat : JL. INDUSTRI RAYA NO. 12, BEKASI
+NPWP : 01.234.567.8-431.000
+Pembeli Barang Kena Pajak / Penerima Jasa Kena Pajak
+Nama : PT UTAMA
+Alamat : JL. SUDIRMAN KAV 21, JAKARTA
+NPWP : 02.345.678.9-012.000
+No. Nama Barang Kena Pajak / Jasa Kena Pajak Harga Jual
+1 DECA R UNIT 2 SET Rp 45.000.000,00
+2 MATER INSTALASI Rp 5.000.000,00
+Harga Jual / Penggantian 50.000.000,00
+Dikurangi Potongan Harga 0,00
+Dasar Pengenaan Pajak 50.000.000,00
+Total PPN 5.500.000,00
+BEKASI, 12 Maret 2024
+""",
+    """FAKTUR PAJAK
+Kode dan Nomor Seri Faktur Pajak: O1O.OO3-24.8765432l
+Pengusaha Kena Pajak
+Nama : CV MITRA TEKNIK
+NPWP : 03.456.789.0-123.000
+Pembeli Kena Pajak
+Nama : PT UTAMA
+NPWP: 010.003-24.87654321
+Nama Barang Kena Pajak / Jasa Kena Pajak
+DESAND YCLON 1 UNIT
+PESIFIKA -SUA KONTRAK
+oh ka
+Dasar Pengenaan Pajak 125.750.000,00
+PPN = 11% x Dasar Pengenaan Pajak 13.832.500,00
+SURABAYA, 3 Januari 2025
+""",
+    """Faktur Pajak
+Nomor Seri 010 004 24 11223344
+Pengusaha Kena Pajak
+Nama PT UTAMA
+NPWP 02.345.678.9-012.000
+Pembeli Barang Kena Pajak
+Nama : PT GLOBAL SARANA NIAGA
+NPWP : 04.567.890.1-234.000
+Nama Barang Kena Pajak
+JASA KONSULTASI
+Dasar Pengenaan Pajak
+Tanggal 15/08/2024
+""",
+    """faktur pajak
+nomor 010.005-24.55667788
+Nama: TOKO SINAR JAYA
+NPWP 045678901234000
+Harga jual 12.500.000
+PPN Pajak Pertambahan Nilai 1.375.000
+2024-11-30
+""",
+    """Lembar ke-1 : untuk Pembeli
+tidak ada nomor faktur di sini
+Dasar Pengenaan Pajak 1.000.000
+""",
+    """Faktur Pajak
+Kode dan Nomor Seri Faktur Pajak : 010.006-24.99887766
+Pembeli Barang Kena Pajak
+Nama : PT UTAMA
+Pembeli Kena Pajak
+Nama : PT DOUBLE SPLIT
+Dasar Pengenaan Pajak .
+Total 250.000.000,00
+JAKARTA, 31 Februari 2024
+31-01-2024
+""",
+]
+
+OCR_CONFUSIONS = {"0": "O", "1": "l", "5": "S", "8": "B", "a": "e", " ": "  "}
+
+
+def legacy_extract(raw_text, pt_utama="PT UTAMA"):
+    """Alur lama parse_faktur_data: enam extractor terpisah"""
+    no_faktur, tanggal_obj = extract_faktur_tanggal(raw_text)
+    fields = {"no_faktur": no_faktur, "tanggal_obj": tanggal_obj}
+    if not no_faktur:
+        return fields
+
+    jenis_pajak, blok_rekanan, _ = extract_jenis_pajak(raw_text, pt_utama)
+    if not jenis_pajak:
+        blok_rekanan = raw_text
+    nama_rekanan, npwp_rekanan = extract_npwp_nama_rekanan(blok_rekanan)
+    dpp, _, override_ppn, _ = extract_dpp(raw_text)
+    ppn, _ = extract_ppn(raw_text, dpp, override_ppn)
+
+    fields.update(
+        jenis_pajak=jenis_pajak,
+        nama_rekanan=nama_rekanan,
+        npwp_rekanan=npwp_rekanan,
+        dpp=dpp,
+        ppn=ppn,
+        keterangan=extract_keterangan(raw_text),
+    )
+    return fields
+
+
+ITEM_LINES = [
+    "{no} SPARE PART POMPA SENTRIFUGAL TYPE {code} Rp {amount}",
+    "{no} JASA PEMELIHARAAN BULANAN AREA {code} Rp {amount}",
+    "{no} MATERIAL PIPA BAJA 4 INCH SCH {code} Rp {amount}",
+]
+
+
+def with_item_lines(text, rng, count):
+    """Faktur nyata sering berisi puluhan baris barang di antara header dan DPP"""
+    items = [
+        rng.choice(ITEM_LINES).format(
+            no=number, code=rng.randint(10, 99), amount=f"{rng.randint(1, 900):,}.000,00".replace(",", ".", 1)
+        )
+        for number in range(1, count + 1)
+    ]
+    lines = text.splitlines()
+    for position, line in enumerate(lines):
+        if "nama barang" in line.lower():
+            return "\n".join(lines[:position + 1] + items + lines[position + 1:])
+    return text
+
+
+def make_variant(text, rng):
+    """Variasi noise OCR: salah baca karakter, baris duplikat / hilang"""
+    chars = [
+        OCR_CONFUSIONS[char] if char in OCR_CONFUSIONS and rng.random() < 0.03 else char
+        for char in text
+    ]
+    lines = "".join(chars).splitlines()
+    for _ in range(rng.randint(0, 2)):
+        if lines:
+            position = rng.randrange(len(lines))
+            if rng.random() < 0.5:
+                lines.insert(position, lines[position])
+            else:
+                lines.pop(position)
+    return "\n".join(lines)
+
+
+def build_corpus(extra_files, variants, seed=42):
+    base = list(SAMPLE_OCR_TEXTS)
+    for path in extra_files:
+        with open(path, encoding="utf-8") as f:
+            base.append(f.read())
+
+    rng = random.Random(seed)
+    corpus = list(base)
+    for _ in range(variants):
+        text = with_item_lines(rng.choice(base), rng, rng.randint(0, 40))
+        corpus.append(make_variant(text, rng))
+    return corpus
+
+
+def _run_once(func, corpus):
+    started_at = time.perf_counter()
+    for text in corpus:
+        func(text)
+    return time.perf_counter() - started_at
+
+
+def timed_pairs(funcs, corpus, repeat):
+    """Jalankan setiap func bergantian sebanyak repeat kali; return list durasi per func"""
+    timings = [[] for _ in funcs]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for func in funcs:
+            _run_once(func, corpus)  # pemanasan (cache regex, import lazy)
+        for _ in range(repeat):
+            for index, func in enumerate(funcs):
+                timings[index].append(_run_once(func, corpus))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--variants", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.files, args.variants)
+
+    mismatches = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = [(legacy_extract(text), extract_faktur_fields(text)) for text in corpus]
+    for index, (legacy, unified) in enumerate(results):
+        if legacy != unified:
+            mismatches += 1
+            print(f"❌ Mismatch pada teks #{index}:\n  lama    : {legacy}\n  unified : {unified}")
+
+    print(f"🔍 Output identik: {len(corpus) - mismatches}/{len(corpus)} teks")
+
+    legacy_runs, unified_runs = timed_pairs((legacy_extract, extract_faktur_fields), corpus, args.repeat)
+    per_text = lambda seconds: seconds / len(corpus) * 1_000_000
+    for label, runs in (("lama   ", legacy_runs), ("unified", unified_runs)):
+        print(
+            f"{label} : median {per_text(statistics.median(runs)):7.1f} µs/teks "
+            f"(min {per_text(min(runs)):.1f}, max {per_text(max(runs)):.1f}, {len(runs)} repeat)"
+        )
+
+    ratios = [legacy / unified for legacy, unified in zip(legacy_runs, unified_runs)]
+    median_ratio = statistics.median(ratios)
+    verdict = "dalam noise" if min(ratios) <= 1.0 <= max(ratios) else ("lebih cepat" if median_ratio > 1 else "lebih lambat")
+    print(f"rasio lama/unified: median {median_ratio:.2f}x (rentang {min(ratios):.2f}-{max(ratios):.2f}x) -> {verdict}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
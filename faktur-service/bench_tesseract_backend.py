@@ -0,0 +1,83 @@
+"""
+Benchmark latency OCR per halaman: pytesseract (subprocess) vs tesserocr (persistent)
+
+Usage:
+    python bench_tesseract_backend.py faktur1.pdf faktur2.png --repeat 5
+
+PDF dirender sekali di awal (300 DPI, sama seperti FakturOCR) supaya yang diukur
+hanya waktu Tesseract. Halaman pertama backend tesserocr dicatat terpisah karena
+termasuk waktu memuat traineddata.
+"""
+import sys
+import time
+import argparse
+import statistics
+import cv2
+import numpy as np
+from PIL import Image
+from pdf2image import convert_from_path
+
+from ocr_engine import FakturOCR
+from tesseract_backend import PytesseractBackend, TesserocrBackend
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        if path.lower().endswith('.pdf'):
+            images = convert_from_path(path, dpi=FakturOCR.PDF_DPI)
+        else:
+            images = [Image.open(path)]
+        for image in images:
+            pages.append(cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR))
+    return pages
+
+
+def bench(backend_cls, pages, repeat):
+    started_at = time.perf_counter()
+    backend = backend_cls(FakturOCR.TESSERACT_LANG, FakturOCR.TESSERACT_CONFIG)
+    init_ms = (time.perf_counter() - started_at) * 1000
+
+    latencies = []
+    texts = []
+    for _ in range(repeat):
+        for page in pages:
+            started_at = time.perf_counter()
+            texts.append(backend.image_to_string(page))
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    return init_ms, latencies, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.files)
+    print(f"📄 {len(pages)} halaman x {args.repeat} repeat")
+
+    results = {}
+    for backend_cls in (PytesseractBackend, TesserocrBackend):
+        try:
+            init_ms, latencies, texts = bench(backend_cls, pages, args.repeat)
+        except Exception as e:
+            print(f"❌ {backend_cls.name}: {e}")
+            continue
+        results[backend_cls.name] = texts
+        print(
+            f"{backend_cls.name:12s} init {init_ms:8.1f} ms | "
+            f"first {latencies[0]:8.1f} ms | "
+            f"median {statistics.median(latencies):8.1f} ms | "
+            f"p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:8.1f} ms | "
+            f"total {sum(latencies):9.1f} ms"
+        )
+
+    if len(results) == 2:
+        same = sum(a.strip() == b.strip() for a, b in zip(results['pytesseract'], results['tesserocr']))
+        print(f"🔍 Output identik: {same}/{len(results['tesserocr'])} halaman")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,5 +11,6 @@ from .extraction import (
     extract_npwp_nama_rekanan,
     extract_dpp,
     extract_ppn,
-    extract_keterangan
+    extract_keterangan,
+    extract_faktur_fields
 )
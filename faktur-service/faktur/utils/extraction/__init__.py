@@ -6,3 +6,4 @@ from .npwp_nama import extract_npwp_nama_rekanan
 from .dpp import extract_dpp
 from .ppn import extract_ppn
 from .keterangan import extract_keterangan
+from .unified import extract_faktur_fields
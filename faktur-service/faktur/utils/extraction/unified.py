@@ -0,0 +1,285 @@
+# utils/extraction/unified.py
+
+"""
+Extractor faktur satu pass.
+
+Hasilnya sama dengan rangkaian extract_faktur_tanggal, extract_jenis_pajak,
+extract_npwp_nama_rekanan, extract_dpp, extract_ppn dan extract_keterangan,
+tetapi teks OCR hanya di-split sekali menjadi line index, semua pola
+di-compile sekali di level modul, dan tanpa print debug per extractor.
+"""
+
+import re
+from datetime import datetime
+from thefuzz import fuzz
+from shared_utils.text_utils import clean_number
+
+# Nomor faktur
+FAKTUR_TOLERANT_PATTERN = re.compile(
+    r"0[0-9a-zA-Z]{2}[-.\s]?[0-9a-zA-Z]{3}[-.\s]?[0-9a-zA-Z]{2}[-.\s]?[0-9a-zA-Z]{8,}", re.IGNORECASE
+)
+FAKTUR_STRICT_PATTERN = re.compile(r"\d{3}[.\s]?\d{3}[-.\s]?\d{2}[.\s]?\d{8}")
+FAKTUR_OCR_CORRECTIONS = str.maketrans({
+    "O": "0", "o": "0", "I": "1", "i": "1", "l": "1", "t": "1",
+    "S": "5", "s": "5", "E": "6", "e": "6", "B": "8", "g": "9",
+})
+NON_DIGIT_PATTERN = re.compile(r"\D")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Tanggal
+BULAN_MAP = {
+    "januari": "January", "februari": "February", "maret": "March", "april": "April",
+    "mei": "May", "juni": "June", "juli": "July", "agustus": "August",
+    "september": "September", "oktober": "October", "november": "November", "desember": "December",
+}
+TANGGAL_INDONESIA_PATTERN = re.compile(
+    rf"(\d{{1,2}})\s+({'|'.join(name.capitalize() for name in BULAN_MAP)})\s+(\d{{4}})", re.IGNORECASE
+)
+TANGGAL_DMY_PATTERN = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})")
+TANGGAL_YMD_PATTERN = re.compile(r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})")
+
+# Jenis pajak
+PEMBELI_SPLIT_PATTERN = re.compile(r"Pembeli\s+(?:Barang\s+)?Kena\s+Pajak", re.IGNORECASE)
+NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+
+# NPWP & nama rekanan
+NPWP_PATTERNS = [
+    re.compile(r"([0-9]{2}\.?[0-9]{3}\.?[0-9]{3}\.?[0-9]-[0-9]{3}\.?[0-9]{3})"),
+    re.compile(r"([0-9]{15})"),
+]
+COMPANY_PATTERNS = [
+    re.compile(r"(?:PT\.?\s+|CV\.?\s+|UD\.?\s+|TOKO\s+)([A-Z\s&]+?)(?=\n|NPWP|ALAMAT|TLP)"),
+    re.compile(r"PT\.?\s+([A-Z\s&]+)"),
+]
+
+# DPP / PPN
+NUMBER_PATTERN = re.compile(r"[\d.,]+")
+LARGE_NUMBER_PATTERN = re.compile(r"[\d.]{1,3}(?:[.,]\d{3}){2,}")
+
+# Keterangan
+KETERANGAN_START_PATTERN = re.compile(r"Nama\s+Barang\s+Kena\s+Pajak.*?", re.IGNORECASE)
+KETERANGAN_END_PATTERN = re.compile(r"Dasar\s+Pengenaan\s+Pajak", re.IGNORECASE)
+KETERANGAN_CLEAN_PATTERN = re.compile(r"[^\w\s.,:;/\-()Rp]")
+KETERANGAN_NOISE_WORDS = {"oh", "ka", "bah", "iai", "aa", "tr", "id", "na", "in", "5", "2", "3", "4", "es", "po", "sz"}
+KETERANGAN_TYPO_MAP = {
+    "DECA R": "DECANTER", "DESAND YCLON": "DESANDING CYCLONE",
+    "PESIFIKA -SUA": "SPESIFIKASI SESUAI", "MATERI Tera": "MATERIAL",
+    "MATER INSTALASI": "MATERIAL INSTALASI", "ikurangi": "Dikurangi",
+}
+
+
+class OcrLineIndex:
+    """Teks OCR yang di-split sekali: baris asli + versi lowercase"""
+
+    def __init__(self, raw_text):
+        self.raw_text = raw_text
+        self.lower_text = raw_text.lower()
+        self.lines = raw_text.splitlines()
+        self.lower_lines = self.lower_text.splitlines()
+        self.npwp_lines = [
+            line for line, lower in zip(self.lines, self.lower_lines)
+            if "npwp" in lower or "nitku" in lower
+        ]
+
+    def lines_containing(self, *keywords):
+        """Baris (asli) yang mengandung semua keyword (lowercase)"""
+        if not all(keyword in self.lower_text for keyword in keywords):
+            return []
+        return [
+            line for line, lower in zip(self.lines, self.lower_lines)
+            if all(keyword in lower for keyword in keywords)
+        ]
+
+
+def _extract_no_faktur(index):
+    candidates = FAKTUR_TOLERANT_PATTERN.findall(index.raw_text)
+    # Kandidat yang muncul di baris NPWP/NITKU bukan nomor faktur
+    valid_candidates = [
+        candidate for candidate in candidates
+        if not any(candidate in line for line in index.npwp_lines)
+    ]
+
+    if valid_candidates:
+        digits_only = NON_DIGIT_PATTERN.sub("", valid_candidates[0].translate(FAKTUR_OCR_CORRECTIONS))[:16]
+        if len(digits_only) >= 14:
+            return f"{digits_only[:3]}.{digits_only[3:6]}-{digits_only[6:8]}.{digits_only[8:]}"
+
+    strict_candidates = [
+        WHITESPACE_PATTERN.sub("", candidate)
+        for candidate in FAKTUR_STRICT_PATTERN.findall(index.raw_text.replace(",", "."))
+    ]
+    if strict_candidates:
+        return max(strict_candidates, key=len)
+    return None
+
+
+def _extract_tanggal(index):
+    matches = TANGGAL_INDONESIA_PATTERN.findall(index.raw_text)
+    if matches:
+        # Ambil temuan terakhir (biasanya yang paling benar di dekat ttd)
+        hari, bulan, tahun = matches[-1]
+        try:
+            return datetime.strptime(f"{hari} {BULAN_MAP[bulan.lower()]} {tahun}", "%d %B %Y")
+        except ValueError:
+            pass
+
+    match = TANGGAL_DMY_PATTERN.search(index.raw_text)
+    if match:
+        try:
+            return datetime.strptime(match.group(0).replace("/", "-"), "%d-%m-%Y")
+        except ValueError:
+            pass
+
+    match = TANGGAL_YMD_PATTERN.search(index.raw_text)
+    if match:
+        try:
+            return datetime.strptime(match.group(0).replace("/", "-"), "%Y-%m-%d")
+        except ValueError:
+            pass
+    return None
+
+
+def _clean_pt_name(value):
+    return NON_WORD_PATTERN.sub("", value).strip().upper()
+
+
+def _fuzzy_match(line, pt_clean, threshold):
+    """fuzz.ratio(line, pt_clean) > threshold, dengan skip baris yang panjangnya tidak mungkin cocok"""
+    line_clean = _clean_pt_name(line)
+    total_length = len(line_clean) + len(pt_clean)
+    # Batas atas fuzz.ratio = 200 * min(len) / (len1 + len2)
+    if not total_length or round(200 * min(len(line_clean), len(pt_clean)) / total_length) <= threshold:
+        return False
+    return fuzz.ratio(line_clean, pt_clean) > threshold
+
+
+def _extract_jenis_pajak(index, pt_utama):
+    pt_clean = _clean_pt_name(pt_utama)
+    parts = PEMBELI_SPLIT_PATTERN.split(index.raw_text)
+
+    if len(parts) < 2:
+        for line in index.lines:
+            if _fuzzy_match(line, pt_clean, 80):
+                return "PPN_MASUKAN", "", index.raw_text
+        return None, None, None
+    if len(parts) > 2:
+        return None, None, None
+
+    blok_penjual, blok_pembeli = parts
+    for line in blok_pembeli.splitlines():
+        if _fuzzy_match(line, pt_clean, 70):
+            return "PPN_MASUKAN", blok_penjual, blok_pembeli
+    for line in blok_penjual.splitlines():
+        if _fuzzy_match(line, pt_clean, 70):
+            return "PPN_KELUARAN", blok_pembeli, blok_penjual
+    return None, None, None
+
+
+def _extract_npwp_nama(blok_rekanan):
+    npwp = ""
+    for pattern in NPWP_PATTERNS:
+        match = pattern.search(blok_rekanan)
+        if match:
+            npwp = match.group(1)
+            if len(npwp) >= 15:
+                digits = NON_DIGIT_PATTERN.sub("", npwp)
+                if len(digits) >= 15:
+                    npwp = f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}.{digits[8]}-{digits[9:12]}.{digits[12:15]}"
+            break
+
+    nama = ""
+    blok_upper = blok_rekanan.upper()
+    for pattern in COMPANY_PATTERNS:
+        match = pattern.search(blok_upper)
+        if match:
+            nama = match.group(1).strip()
+            if len(nama) > 3:
+                break
+    return nama, npwp
+
+
+def _extract_dpp(index):
+    dpp = 0.0
+    for line in index.lines_containing("dasar pengenaan pajak"):
+        numbers = NUMBER_PATTERN.findall(line)
+        if numbers:
+            dpp = clean_number(numbers[-1])
+            break
+    if dpp > 0:
+        return dpp
+
+    # Fallback ke angka besar (> 10 juta) terbesar di seluruh teks
+    candidates = [
+        value for value in (clean_number(n) for n in LARGE_NUMBER_PATTERN.findall(index.raw_text))
+        if value > 10_000_000
+    ]
+    return max(candidates) if candidates else 0.0
+
+
+def _extract_ppn(index, dpp):
+    if dpp > 0:
+        return round(dpp * 0.11, 2)
+    for line in index.lines_containing("ppn", "pajak pertambahan nilai"):
+        numbers = NUMBER_PATTERN.findall(line)
+        if numbers:
+            return clean_number(numbers[-1])
+    return 0.0
+
+
+def _extract_keterangan(raw_text):
+    start_match = KETERANGAN_START_PATTERN.search(raw_text)
+    end_match = KETERANGAN_END_PATTERN.search(raw_text)
+    if not start_match or not end_match:
+        return "Tidak ditemukan"
+
+    block = raw_text[start_match.end():end_match.start()]
+    cleaned_lines = []
+    seen_lines = set()
+    for line in block.splitlines():
+        line = line.strip()
+        if not line or line in seen_lines:
+            continue
+        seen_lines.add(line)
+
+        line = KETERANGAN_CLEAN_PATTERN.sub("", line).strip()
+        for typo, correct in KETERANGAN_TYPO_MAP.items():
+            if typo in line:
+                line = line.replace(typo, correct)
+
+        tokens = [token for token in line.split() if token.lower() not in KETERANGAN_NOISE_WORDS]
+        if tokens:
+            cleaned_lines.append(" ".join(tokens))
+
+    return " || ".join(cleaned_lines) if cleaned_lines else "Tidak ditemukan"
+
+
+def extract_faktur_fields(raw_text, pt_utama="PT UTAMA"):
+    """
+    Extract semua field faktur dalam satu pass.
+    Return dict: no_faktur, tanggal_obj, jenis_pajak, nama_rekanan, npwp_rekanan,
+    dpp, ppn, keterangan. Jika nomor faktur tidak ditemukan hanya no_faktur (None)
+    dan tanggal_obj yang diisi.
+    """
+    index = OcrLineIndex(raw_text)
+    fields = {
+        "no_faktur": _extract_no_faktur(index),
+        "tanggal_obj": _extract_tanggal(index),
+    }
+    if not fields["no_faktur"]:
+        return fields
+
+    jenis_pajak, blok_rekanan, _ = _extract_jenis_pajak(index, pt_utama)
+    if not jenis_pajak:
+        blok_rekanan = raw_text
+    nama_rekanan, npwp_rekanan = _extract_npwp_nama(blok_rekanan)
+    dpp = _extract_dpp(index)
+
+    fields.update(
+        jenis_pajak=jenis_pajak,
+        nama_rekanan=nama_rekanan,
+        npwp_rekanan=npwp_rekanan,
+        dpp=dpp,
+        ppn=_extract_ppn(index, dpp),
+        keterangan=_extract_keterangan(raw_text),
+    )
+    return fields
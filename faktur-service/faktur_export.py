@@ -0,0 +1,162 @@
+"""
+Export register PPN masukan / keluaran untuk Faktur Service
+Baris dibaca per batch dari server-side cursor (yield_per) dan langsung ditulis,
+jadi memory tetap konstan berapa pun jumlah faktur yang diexport.
+
+- CSV: dialirkan ke client per batch (UTF-8, tanggal ISO, desimal titik tanpa pemisah ribuan)
+- XLSX: openpyxl write-only workbook di SpooledTemporaryFile
+- Parquet: pyarrow ParquetWriter dengan schema bertipe (date32, decimal128(15, 2), timestamp),
+  satu row group per batch; siap di-load ke data warehouse tanpa parsing ulang
+"""
+import io
+import os
+import csv
+import logging
+import tempfile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Font, NamedStyle, Side
+
+logger = logging.getLogger(__name__)
+
+# Parquet opsional: tanpa pyarrow endpoint mengembalikan 501
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 2000))
+EXPORT_SPOOL_MAX_SIZE = int(os.getenv('EXPORT_SPOOL_MAX_SIZE', 16 * 1024 * 1024))
+
+# (kolom, tipe, judul XLSX, lebar kolom XLSX)
+EXPORT_COLUMNS = (
+    ("id", "int", "ID", 8),
+    ("jenis", "text", "Jenis PPN", 12),
+    ("bulan", "text", "Bulan", 12),
+    ("tanggal", "date", "Tanggal", 12),
+    ("no_faktur", "text", "No. Faktur", 24),
+    ("npwp_lawan_transaksi", "text", "NPWP Lawan Transaksi", 24),
+    ("nama_lawan_transaksi", "text", "Nama Lawan Transaksi", 34),
+    ("keterangan", "text", "Keterangan", 30),
+    ("dpp", "decimal", "DPP (Rupiah)", 18),
+    ("ppn", "decimal", "PPN (Rupiah)", 18),
+    ("created_at", "datetime", "Dibuat pada", 20),
+)
+EXPORT_FIELDS = tuple(column[0] for column in EXPORT_COLUMNS)
+
+# format -> (mimetype, ekstensi file)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def stream_csv(batches):
+    """Generator potongan CSV: header lalu satu potongan per batch baris"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    total = 0
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        total += len(rows)
+        yield buffer.getvalue()
+    logger.info(f"📤 Export CSV selesai: {total} baris")
+
+
+def _xlsx_styles():
+    """Satu NamedStyle per tipe kolom, dipakai bersama semua cell"""
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    return {
+        "header": NamedStyle(name="ppn_header", font=Font(bold=True), border=border),
+        "int": NamedStyle(name="ppn_int", border=border, number_format="0"),
+        "text": NamedStyle(name="ppn_text", border=border),
+        "date": NamedStyle(name="ppn_date", border=border, number_format="yyyy-mm-dd"),
+        "decimal": NamedStyle(name="ppn_decimal", border=border, number_format="#,##0.00"),
+        "datetime": NamedStyle(name="ppn_datetime", border=border, number_format="yyyy-mm-dd hh:mm:ss"),
+    }
+
+
+def write_xlsx(batches, output):
+    wb = Workbook(write_only=True)
+    styles = _xlsx_styles()
+    for style in styles.values():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("PPN")
+    ws.freeze_panes = "A2"
+
+    column_styles = []
+    for index, (_, kind, _, width) in enumerate(EXPORT_COLUMNS):
+        ws.column_dimensions[chr(ord("A") + index)].width = width
+        column_styles.append((kind, styles[kind].name))
+
+    def cell(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([cell(title, styles["header"].name) for _, _, title, _ in EXPORT_COLUMNS])
+
+    total = 0
+    for rows in batches:
+        for row in rows:
+            ws.append([
+                cell(float(value) if kind == "decimal" and value is not None else value, style)
+                for value, (kind, style) in zip(row, column_styles)
+            ])
+        total += len(rows)
+
+    wb.save(output)
+    logger.info(f"📤 Export XLSX selesai: {total} baris")
+    return total
+
+
+def _parquet_schema():
+    types = {
+        "int": pa.int64(),
+        "text": pa.string(),
+        "date": pa.date32(),
+        "decimal": pa.decimal128(15, 2),
+        "datetime": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind, _, _ in EXPORT_COLUMNS])
+
+
+def write_parquet(batches, output):
+    """Satu row group per batch; schema tetap walaupun hasil kosong"""
+    schema = _parquet_schema()
+    total = 0
+    with pq.ParquetWriter(output, schema, compression="snappy") as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            total += len(rows)
+    logger.info(f"📤 Export Parquet selesai: {total} baris")
+    return total
+
+
+def write_export_file(export_format, batches):
+    """XLSX / Parquet ke SpooledTemporaryFile (disk hanya jika lebih dari EXPORT_SPOOL_MAX_SIZE)"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    try:
+        if export_format == "parquet":
+            write_parquet(batches, buffer)
+        else:
+            write_xlsx(batches, buffer)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
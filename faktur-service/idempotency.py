@@ -0,0 +1,191 @@
+"""
+Idempotency-Key untuk endpoint yang menyimpan faktur
+Client mengirim header Idempotency-Key (mis. UUID per upload). Request pertama
+mengklaim key di tabel idempotency_keys lalu diproses; response-nya disimpan.
+Retry dengan key yang sama:
+- request identik, sudah selesai -> response tersimpan dikirim ulang (Idempotent-Replayed: true)
+- request identik, masih diproses -> 409 + Retry-After
+- isi request berbeda             -> 422
+Hanya response 2xx dan error validasi 4xx yang disimpan. Response sementara (5xx,
+429 antrian penuh, 409, 413) dan 202 job async (job_id hanya hidup di memory worker)
+tidak disimpan: klaim dilepas supaya retry diproses ulang.
+"""
+import os
+import time
+import hashlib
+import logging
+import functools
+from datetime import datetime, timedelta
+
+from flask import request, jsonify, make_response, Response
+
+from models import db, IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+# Klaim tanpa response lebih lama dari ini dianggap milik proses yang mati
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 900))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Hapus key kadaluarsa paling sering sekali per interval ini (detik) per proses
+PURGE_INTERVAL = 600
+_last_purge = 0.0
+
+# Status yang bergantung kondisi saat itu (atau menunjuk state sementara): tidak di-replay
+TRANSIENT_STATUS_CODES = {202, 408, 409, 413, 425, 429}
+
+
+def _dialect_insert():
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def request_fingerprint():
+    """SHA-256 dari method, path + query, form field dan isi file / body JSON"""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.full_path}".encode())
+    for name, value in sorted(request.form.items(multi=True)):
+        digest.update(f"\0{name}={value}".encode())
+    if request.files:
+        for name, storage in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f"\0{name}:{storage.filename}\0".encode())
+            for chunk in iter(lambda: storage.stream.read(1024 * 1024), b''):
+                digest.update(chunk)
+            storage.stream.seek(0)
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _purge_expired():
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    cutoff = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+    db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+
+
+def _try_claim(key, endpoint, fingerprint):
+    now = datetime.utcnow()
+    insert = _dialect_insert()
+    claimed = db.session.execute(
+        insert(IdempotencyKey)
+        .values(key=key, endpoint=endpoint, request_hash=fingerprint, created_at=now)
+        .on_conflict_do_nothing(index_elements=['key'])
+        .returning(IdempotencyKey.key)
+    ).scalar()
+    if claimed is None:
+        claimed = db.session.execute(
+            db.update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.request_hash == fingerprint,
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT)
+            )
+            .values(created_at=now)
+            .returning(IdempotencyKey.key)
+        ).scalar()
+    return claimed is not None
+
+
+def _claim(key, endpoint, fingerprint):
+    """
+    INSERT ... ON CONFLICT DO NOTHING; klaim basi (proses mati) diambil alih.
+    Return None jika key berhasil diklaim, atau record IdempotencyKey yang sudah ada
+    """
+    _purge_expired()
+    for _ in range(2):
+        claimed = _try_claim(key, endpoint, fingerprint)
+        db.session.commit()
+        if claimed:
+            return None
+        record = db.session.get(IdempotencyKey, key)
+        if record is not None:
+            return record
+        # Klaim lain baru saja dilepas (response 5xx): coba klaim sekali lagi
+    raise RuntimeError(f"Idempotency-Key {key} tidak bisa diklaim")
+
+
+def _existing_response(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return jsonify({
+            "status": "error",
+            "message": "Idempotency-Key sudah dipakai untuk request yang berbeda",
+            "error_code": "IDEMPOTENCY_KEY_REUSED"
+        }), 422
+    if record.status_code is None:
+        response = jsonify({
+            "status": "error",
+            "message": "Request dengan Idempotency-Key ini masih diproses",
+            "error_code": "IDEMPOTENCY_IN_PROGRESS"
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 409
+    response = Response(record.response_body, status=record.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def is_replayable(status_code):
+    """2xx dan error 4xx yang pasti sama jika request diulang (validasi, 404, 422)"""
+    if status_code in TRANSIENT_STATUS_CODES:
+        return False
+    return 200 <= status_code < 300 or 400 <= status_code < 500
+
+
+def _finish(key, response):
+    """Simpan response yang bisa di-replay atau lepas klaim, di transaksi baru"""
+    try:
+        if not is_replayable(response.status_code):
+            db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        else:
+            db.session.execute(
+                db.update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=response.status_code, response_body=response.get_data(as_text=True))
+            )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"❌ Gagal menyimpan response Idempotency-Key {key}: {e}")
+
+
+def idempotent(endpoint):
+    """Decorator view: aktif hanya jika request membawa header Idempotency-Key"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if not key or request.method == 'OPTIONS':
+                return view(*args, **kwargs)
+            if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return jsonify({
+                    "status": "error",
+                    "message": f"Idempotency-Key maksimal {IDEMPOTENCY_KEY_MAX_LENGTH} karakter",
+                    "error_code": "INVALID_IDEMPOTENCY_KEY"
+                }), 400
+
+            fingerprint = request_fingerprint()
+            try:
+                record = _claim(key, endpoint, fingerprint)
+            except Exception as e:
+                # Database bermasalah: proses tanpa jaminan idempotency (view akan melaporkan error DB-nya)
+                db.session.rollback()
+                logger.error(f"❌ Idempotency-Key claim failed: {e}")
+                return view(*args, **kwargs)
+            if record is not None:
+                logger.info(f"🔁 Idempotency-Key {key} ({endpoint}) sudah ada, status {record.status_code}")
+                return _existing_response(record, fingerprint)
+
+            response = make_response(view(*args, **kwargs))
+            _finish(key, response)
+            return response
+        return wrapper
+    return decorator
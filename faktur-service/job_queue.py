@@ -0,0 +1,172 @@
+"""
+Job Queue untuk OCR Faktur asynchronous
+Endpoint upload langsung mengembalikan job id, OCR dijalankan di background,
+client melakukan polling /api/jobs/<id> atau subscribe ke stream SSE.
+
+Catatan: registry job disimpan di memory per gunicorn worker, jadi polling
+harus mengenai worker yang sama (default Dockerfile memakai --workers 1).
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+OCR_JOB_QUEUE_LIMIT = int(os.getenv('OCR_JOB_QUEUE_LIMIT', 20))
+OCR_JOB_TTL = int(os.getenv('OCR_JOB_TTL', 3600))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+TERMINAL_STATES = {JOB_DONE, JOB_FAILED}
+
+
+class QueueFullError(Exception):
+    """Antrian job penuh - client harus mencoba lagi nanti (HTTP 429)"""
+
+
+class OcrJob:
+    """State satu job OCR beserta field timing untuk sizing pool"""
+
+    def __init__(self, filename, condition):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = JOB_QUEUED
+        self.stage = "queued"
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.version = 0
+        self.timings = {"submitted_at": time.time()}
+        self._condition = condition
+
+    def update(self, **fields):
+        """Update state job dan bangunkan semua subscriber SSE"""
+        with self._condition:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.version += 1
+            self._condition.notify_all()
+
+    def mark(self, timing_name, value=None):
+        """Catat timestamp sebuah tahap (epoch seconds)"""
+        self.timings[timing_name] = value if value is not None else time.time()
+
+    def wait_for_change(self, last_version, timeout):
+        """Blok sampai version berubah atau timeout, kembalikan version terbaru"""
+        with self._condition:
+            if self.version == last_version:
+                self._condition.wait(timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATES
+
+    def durations_ms(self):
+        """Hitung durasi antar tahap dalam milidetik"""
+        t = self.timings
+
+        def span(start, end):
+            if start in t and end in t:
+                return round((t[end] - t[start]) * 1000, 1)
+            return None
+
+        return {
+            "queue_wait_ms": span("submitted_at", "started_at"),
+            "ocr_wait_ms": span("started_at", "ocr_started_at"),
+            "ocr_ms": span("ocr_started_at", "ocr_finished_at"),
+            "save_ms": span("ocr_finished_at", "finished_at"),
+            "total_ms": span("submitted_at", "finished_at"),
+        }
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "timings": {key: round(value, 3) for key, value in self.timings.items()},
+            "durations": self.durations_ms(),
+        }
+
+
+class OcrJobQueue:
+    """
+    Antrian job OCR dengan backpressure.
+    Dispatch thread hanya menunggu; pekerjaan CPU-bound dijalankan runner di OCR process pool.
+    """
+
+    def __init__(self, runner, max_workers, max_depth=OCR_JOB_QUEUE_LIMIT, ttl=OCR_JOB_TTL):
+        self._runner = runner
+        self._max_depth = max_depth
+        self._ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-job")
+
+    def depth(self):
+        """Jumlah job yang belum selesai (queued + running)"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, filename, *args):
+        """Daftarkan job baru atau raise QueueFullError jika antrian penuh"""
+        self._expire_old_jobs()
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self._max_depth:
+                raise QueueFullError(f"OCR queue full ({pending}/{self._max_depth} jobs pending)")
+            job = OcrJob(filename, self._condition)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, *args)
+        logger.info(f"📥 OCR job {job.id} queued for {filename} (depth: {pending + 1})")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, *args):
+        job.mark("started_at")
+        job.update(status=JOB_RUNNING, stage="ocr", progress=10)
+        try:
+            result = self._runner(job, *args)
+            job.mark("finished_at")
+            job.update(status=JOB_DONE, stage="done", progress=100, result=result)
+            logger.info(f"✅ OCR job {job.id} done in {job.durations_ms()['total_ms']} ms")
+        except Exception as e:
+            job.mark("finished_at")
+            job.update(status=JOB_FAILED, stage="failed", error=str(e))
+            logger.error(f"❌ OCR job {job.id} failed: {e}")
+
+    def _expire_old_jobs(self):
+        """Hapus job yang sudah selesai lebih lama dari TTL"""
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished and job.timings.get("finished_at", 0) < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "depth_limit": self._max_depth,
+            "jobs": counts,
+        }
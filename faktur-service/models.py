@@ -1,12 +1,18 @@
 # models.py
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
 
 db = SQLAlchemy()
 
 class PpnMasukan(db.Model):
     __tablename__ = "ppn_masukan"
+    __table_args__ = (
+        # Keyset pagination history (ORDER BY created_at DESC, id DESC)
+        db.Index("idx_ppn_masukan_created_at_id", "created_at", "id"),
+        db.Index("idx_ppn_masukan_npwp_created_at", "npwp_lawan_transaksi", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     bulan = db.Column(db.String(20), nullable=False)
@@ -38,6 +44,11 @@ class PpnMasukan(db.Model):
 
 class PpnKeluaran(db.Model):
     __tablename__ = "ppn_keluaran"
+    __table_args__ = (
+        # Keyset pagination history (ORDER BY created_at DESC, id DESC)
+        db.Index("idx_ppn_keluaran_created_at_id", "created_at", "id"),
+        db.Index("idx_ppn_keluaran_npwp_created_at", "npwp_lawan_transaksi", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     bulan = db.Column(db.String(20), nullable=False)
@@ -69,6 +80,12 @@ class PpnKeluaran(db.Model):
 
 class BuktiSetor(db.Model):
     __tablename__ = 'bukti_setor'
+    __table_args__ = (
+        # Keyset pagination history (ORDER BY created_at DESC, id DESC)
+        db.Index("idx_bukti_setor_created_at_id", "created_at", "id"),
+        # Summary per tahun/bulan: range tanggal + SUM(jumlah) dari index saja
+        db.Index("idx_bukti_setor_tanggal_jumlah", "tanggal", postgresql_include=["jumlah"]),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -86,4 +103,161 @@ class BuktiSetor(db.Model):
         }
 
     def __repr__(self):
-        return f'<BuktiSetor {self.kode_setor}>'
\ No newline at end of file
+        return f'<BuktiSetor {self.kode_setor}>'
+
+class RekapBulanan(db.Model):
+    """
+    Rekap per (tahun, bulan, jenis) dari tanggal dokumen; jenis = nama tabel sumber
+    (ppn_masukan, ppn_keluaran, bukti_setor). Di PostgreSQL dijaga oleh trigger
+    REKAP_BULANAN_DDL, jadi summary cukup membaca maksimal 12 baris per jenis per tahun.
+    """
+    __tablename__ = 'rekap_bulanan'
+
+    tahun = db.Column(db.Integer, primary_key=True)
+    bulan = db.Column(db.Integer, primary_key=True)
+    jenis = db.Column(db.String(20), primary_key=True)
+    jumlah_dokumen = db.Column(db.Integer, nullable=False, default=0)
+    total_dpp = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    total_ppn = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    total_jumlah = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'tahun': self.tahun,
+            'bulan': self.bulan,
+            'jenis': self.jenis,
+            'jumlah_dokumen': self.jumlah_dokumen,
+            'total_dpp': float(self.total_dpp),
+            'total_ppn': float(self.total_ppn),
+            'total_jumlah': float(self.total_jumlah),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<RekapBulanan {self.jenis} {self.tahun}-{self.bulan:02d}>'
+
+
+
+class DataVersion(db.Model):
+    """
+    Counter versi data per tabel, dinaikkan di transaksi yang sama dengan save/delete.
+    Dipakai sebagai kunci cache export: versi sama = isi export sama.
+    """
+    __tablename__ = 'data_version'
+
+    nama = db.Column(db.String(50), primary_key=True)
+    versi = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.nama}={self.versi}>'
+
+
+
+class IdempotencyKey(db.Model):
+    """
+    Request dengan header Idempotency-Key: key diklaim sebelum diproses, lalu
+    status + body response disimpan supaya retry dengan key sama mendapat
+    response yang sama tanpa memproses / menyimpan ulang
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(255), primary_key=True)
+    endpoint = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)  # NULL = masih diproses
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key} {self.status_code}>'
+
+
+# ========================================
+# TRIGGER REKAP BULANAN (PostgreSQL)
+# ========================================
+# Trigger per statement dengan transition table: bulk INSERT / ON CONFLICT DO UPDATE /
+# DELETE mengubah rekap sekali per (bulan, statement), bukan sekali per baris.
+# Sama dengan migrations/002_rekap_bulanan.sql (untuk database yang sudah berjalan).
+
+def _rekap_upsert_sql(source, sign, values):
+    return f"""
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               {sign}COUNT(*), {values}, NOW()
+        FROM {source} GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();"""
+
+
+def _rekap_function_sql(name, values, negated_values):
+    return f"""
+CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN{_rekap_upsert_sql('new_rows', '', values)}
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN{_rekap_upsert_sql('old_rows', '-', negated_values)}
+    END IF;
+    RETURN NULL;
+END;
+$$;
+"""
+
+
+def _rekap_triggers_sql(table, function):
+    return f"""
+DROP TRIGGER IF EXISTS trg_rekap_{table}_insert ON {table};
+CREATE TRIGGER trg_rekap_{table}_insert AFTER INSERT ON {table}
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+DROP TRIGGER IF EXISTS trg_rekap_{table}_update ON {table};
+CREATE TRIGGER trg_rekap_{table}_update AFTER UPDATE ON {table}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+DROP TRIGGER IF EXISTS trg_rekap_{table}_delete ON {table};
+CREATE TRIGGER trg_rekap_{table}_delete AFTER DELETE ON {table}
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+"""
+
+
+REKAP_BULANAN_DDL = (
+    _rekap_function_sql("rekap_bulanan_faktur", "SUM(dpp), SUM(ppn), 0", "-SUM(dpp), -SUM(ppn), 0")
+    + _rekap_function_sql("rekap_bulanan_bukti_setor", "0, 0, SUM(jumlah)", "0, 0, -SUM(jumlah)")
+    + """
+-- Hitung ulang seluruh rekap dari tabel sumber (backfill / perbaikan manual)
+CREATE OR REPLACE FUNCTION rekap_bulanan_rebuild() RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE ppn_masukan, ppn_keluaran, bukti_setor IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM rekap_bulanan;
+    INSERT INTO rekap_bulanan (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_masukan',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_masukan GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_keluaran',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_keluaran GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'bukti_setor',
+           COUNT(*), 0, 0, SUM(jumlah), NOW()
+    FROM bukti_setor GROUP BY 1, 2;
+END;
+$$;
+"""
+    + _rekap_triggers_sql("ppn_masukan", "rekap_bulanan_faktur")
+    + _rekap_triggers_sql("ppn_keluaran", "rekap_bulanan_faktur")
+    + _rekap_triggers_sql("bukti_setor", "rekap_bulanan_bukti_setor")
+)
+
+
+@event.listens_for(db.metadata, "after_create")
+def _install_rekap_bulanan_triggers(metadata, connection, tables=(), **kw):
+    """create_all() yang membuat tabel rekap_bulanan juga memasang trigger dan mengisi rekap awal"""
+    if connection.dialect.name != "postgresql" or RekapBulanan.__table__ not in tables:
+        return
+    connection.exec_driver_sql(REKAP_BULANAN_DDL)
+    connection.exec_driver_sql("SELECT rekap_bulanan_rebuild()")
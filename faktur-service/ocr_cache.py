@@ -0,0 +1,180 @@
+"""
+OCR Result Cache untuk Faktur Processing
+Hasil OCR disimpan berdasarkan MD5 isi file + signature engine/config,
+sehingga upload ulang file yang sama tidak menjalankan rasterisasi + Tesseract lagi.
+
+Tier:
+- MemoryTier: LRU in-process dengan batas jumlah entry dan TTL
+- SqliteTier (opsional): persisten di disk, dipakai bersama oleh semua gunicorn worker
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+OCR_CACHE_MAX_ENTRIES = int(os.getenv('OCR_CACHE_MAX_ENTRIES', 256))
+OCR_CACHE_TTL = int(os.getenv('OCR_CACHE_TTL', 86400))
+OCR_CACHE_SQLITE_PATH = os.getenv('OCR_CACHE_SQLITE_PATH', '')
+
+
+def make_cache_key(file_hash, engine_signature):
+    """Key cache = hash isi file + versi engine/config OCR"""
+    return f"{file_hash}:{engine_signature}"
+
+
+class MemoryTier:
+    """LRU in-process dengan eviction berdasarkan jumlah entry dan TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload):
+        with self._lock:
+            self._entries[key] = (time.time(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteTier:
+    """Cache persisten di SQLite, aman dipakai beberapa proses sekaligus (WAL)"""
+
+    name = "sqlite"
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "cache_key TEXT PRIMARY KEY, payload TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Koneksi baru per operasi: sqlite3 connection tidak boleh dipakai lintas thread
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:  # commit / rollback otomatis
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, stored_at FROM ocr_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, stored_at = row
+            if time.time() - stored_at > self.ttl:
+                conn.execute("DELETE FROM ocr_cache WHERE cache_key = ?", (key,))
+                return None
+            return payload
+
+    def set(self, key, payload):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (cache_key, payload, stored_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            conn.execute("DELETE FROM ocr_cache WHERE stored_at < ?", (time.time() - self.ttl,))
+
+
+class OcrResultCache:
+    """Cache berlapis: tier pertama paling cepat, hit di tier berikutnya dipromosikan ke tier atas"""
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits = {tier.name: 0 for tier in tiers}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            try:
+                payload = tier.get(key)
+            except Exception as e:
+                logger.error(f"❌ OCR cache {tier.name} get failed: {e}")
+                continue
+            if payload is not None:
+                for upper in self.tiers[:index]:
+                    upper.set(key, payload)
+                with self._lock:
+                    self.hits += 1
+                    self.tier_hits[tier.name] += 1
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        for tier in self.tiers:
+            try:
+                tier.set(key, payload)
+            except Exception as e:
+                logger.error(f"❌ OCR cache {tier.name} set failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "tiers": [tier.name for tier in self.tiers],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "tier_hits": dict(self.tier_hits),
+                "memory_entries": len(self.tiers[0]) if self.tiers else 0,
+            }
+
+
+def create_ocr_cache():
+    """Buat cache sesuai environment, return None jika cache dimatikan"""
+    if not OCR_CACHE_ENABLED:
+        return None
+
+    tiers = [MemoryTier(OCR_CACHE_MAX_ENTRIES, OCR_CACHE_TTL)]
+    if OCR_CACHE_SQLITE_PATH:
+        try:
+            tiers.append(SqliteTier(OCR_CACHE_SQLITE_PATH, OCR_CACHE_TTL))
+            logger.info(f"✅ OCR cache SQLite tier enabled: {OCR_CACHE_SQLITE_PATH}")
+        except Exception as e:
+            logger.error(f"❌ OCR cache SQLite tier failed, memory only: {e}")
+
+    return OcrResultCache(tiers)
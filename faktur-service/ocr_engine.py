@@ -7,30 +7,109 @@ import re
 import io
 import cv2
 import numpy as np
-import pytesseract
 from PIL import Image
-from pdf2image import convert_from_bytes
+import tempfile
+import subprocess
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_path
 from datetime import datetime
+import time
 import logging
 
 # Import extraction modules sesuai arsitektur referensi
-from faktur.utils import (
-    extract_faktur_tanggal, extract_jenis_pajak,
-    extract_npwp_nama_rekanan, extract_dpp,
-    extract_ppn, extract_keterangan
-)
-from shared_utils.image_utils import preprocess_for_tesseract
+from faktur.utils import extract_faktur_fields
+from shared_utils.image_utils import apply_preprocess_profile, TESSERACT_PREPROCESS_PROFILES
 from shared_utils.file_utils import simpan_preview_image
+from tesseract_backend import create_tesseract_backend
 
 logger = logging.getLogger(__name__)
 
+# Batas halaman untuk mode multi-page (satu faktur per halaman)
+OCR_MAX_PDF_PAGES = int(os.getenv('OCR_MAX_PDF_PAGES', 50))
+
+# Fast path: pakai text layer bawaan PDF e-Faktur (pdftotext) sebelum OCR
+OCR_TEXT_LAYER_ENABLED = os.getenv('OCR_TEXT_LAYER_ENABLED', 'true').lower() == 'true'
+POPPLER_PATH = os.getenv('POPPLER_PATH', '')
+
+# Preprocessing sebelum OCR: none | light | full (lihat shared_utils.image_utils)
+OCR_PREPROCESS_PROFILE = os.getenv('OCR_PREPROCESS_PROFILE', 'none').lower()
+# Profil untuk pass OCR kedua jika confidence pass pertama rendah ('none' = tanpa retry)
+OCR_PREPROCESS_RETRY_PROFILE = os.getenv('OCR_PREPROCESS_RETRY_PROFILE', 'full').lower()
+OCR_RETRY_CONFIDENCE = float(os.getenv('OCR_RETRY_CONFIDENCE', 0.6))
+
+# Adaptive DPI: pass pertama pada OCR_LOW_DPI, hanya region faktur yang field-nya
+# belum ketemu yang di-OCR ulang pada PDF_DPI
+OCR_ADAPTIVE_DPI = os.getenv('OCR_ADAPTIVE_DPI', 'false').lower() == 'true'
+OCR_LOW_DPI = int(os.getenv('OCR_LOW_DPI', 150))
+# Gambar upload lebih kecil dari ini (px) tidak diperkecil untuk pass pertama
+OCR_ADAPTIVE_MIN_WIDTH = 1600
+
+# Penanda yang hampir selalu ada di text layer faktur pajak
+TEXT_LAYER_MARKERS = re.compile(
+    r"faktur\s+pajak|dasar\s+pengenaan\s+pajak|pengusaha\s+kena\s+pajak|\d{3}[.\-]\d{3}[.\-]\d{2}[.\-]\d{8}",
+    re.IGNORECASE
+)
+
 class FakturOCR:
-    def __init__(self):
-        # Set Tesseract path untuk Railway
-        pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'
+    # Naikkan ENGINE_VERSION setiap kali logika OCR/parsing berubah
+    # supaya hasil lama di OCR result cache tidak dipakai lagi
+    ENGINE_VERSION = "2.3"
+    TESSERACT_LANG = "ind"
+    TESSERACT_CONFIG = "--psm 6"
+    PDF_DPI = 300
+    # Heuristik kualitas text layer
+    TEXT_LAYER_MIN_CHARS = 200
+    TEXT_LAYER_MIN_PRINTABLE_RATIO = 0.9
+    TEXT_LAYER_MIN_CONFIDENCE = 0.5
+    # Layout faktur pajak standar: band vertikal (y0, y1) sebagai fraksi tinggi halaman
+    FAKTUR_REGIONS = {
+        "header": (0.0, 0.22),   # Kode dan nomor seri faktur pajak
+        "pihak": (0.12, 0.50),   # Blok Pengusaha Kena Pajak (penjual) dan Pembeli
+        "total": (0.50, 1.0),    # DPP / PPN dan tanggal di dekat tanda tangan
+    }
+    FIELD_REGIONS = {
+        "no_faktur": "header",
+        "nama_lawan_transaksi": "pihak",
+        "npwp_lawan_transaksi": "pihak",
+        "dpp": "total",
+        "tanggal": "total",
+    }
+    # Nilai default parse_faktur_data saat field tidak ditemukan
+    DEFAULT_NAMA = "PERUSAHAAN REKANAN"
+    DEFAULT_NPWP = "00.000.000.0-000.000"
+    DEFAULT_BULAN = "Januari 2025"
+
+    def __init__(self, preprocess_profile=OCR_PREPROCESS_PROFILE, retry_profile=OCR_PREPROCESS_RETRY_PROFILE):
+        # Backend Tesseract dibuat saat OCR pertama (lihat OCR_BACKEND di tesseract_backend.py)
+        self._tesseract = None
+        for profile in (preprocess_profile, retry_profile):
+            if profile not in TESSERACT_PREPROCESS_PROFILES:
+                raise ValueError(f"Unknown preprocess profile: {profile}")
+        self.preprocess_profile = preprocess_profile
+        self.retry_profile = retry_profile
+
+    @property
+    def tesseract(self):
+        """Instance backend Tesseract milik engine ini, dibuat sekali lalu dipakai ulang"""
+        if self._tesseract is None:
+            self._tesseract = create_tesseract_backend(self.TESSERACT_LANG, self.TESSERACT_CONFIG)
+        return self._tesseract
+
+    def cache_signature(self):
+        """Signature engine + config, dipakai sebagai bagian dari key OCR result cache"""
+        return (
+            f"v{self.ENGINE_VERSION}|{self.TESSERACT_LANG}|{self.TESSERACT_CONFIG}|{self.PDF_DPI}dpi"
+            f"|pre={self.preprocess_profile}/{self.retry_profile}@{OCR_RETRY_CONFIDENCE}"
+            + (f"|adaptive{OCR_LOW_DPI}" if OCR_ADAPTIVE_DPI else "")
+        )
+
+    @staticmethod
+    def _add_timing(timings, stage, started_at):
+        """Tambahkan durasi stage (ms) ke dict timings jika diminta caller"""
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + (time.perf_counter() - started_at) * 1000, 1)
         
-    def extract_text_from_image(self, image):
-        """Extract text menggunakan Tesseract OCR dengan preprocessing yang tepat"""
+    def extract_text_from_image(self, image, profile=None, timings=None):
+        """Extract text menggunakan Tesseract OCR dengan profil preprocessing (default: profil engine)"""
         try:
             # Convert PIL to OpenCV format jika perlu
             if isinstance(image, Image.Image):
@@ -38,15 +117,15 @@ class FakturOCR:
             else:
                 img_cv = image
             
-            # Apply preprocessing sesuai repo referensi
-            processed_img = preprocess_for_tesseract(img_cv)
+            started_at = time.perf_counter()
+            processed_img = apply_preprocess_profile(img_cv, profile or self.preprocess_profile)
+            self._add_timing(timings, "preprocess_ms", started_at)
             
-            # OCR dengan config yang sesuai repo referensi
-            raw_text = pytesseract.image_to_string(
-                img_cv,  # Gunakan original image seperti di repo referensi
-                lang="ind", 
-                config="--psm 6"
-            )
+            started_at = time.perf_counter()
+            raw_text = self.tesseract.image_to_string(processed_img)
+            self._add_timing(timings, "ocr_ms", started_at)
+            if timings is not None:
+                timings["ocr_pixels"] = timings.get("ocr_pixels", 0) + processed_img.shape[0] * processed_img.shape[1]
             
             logger.info(f"✅ OCR extraction successful, text length: {len(raw_text)}")
             return raw_text.strip()
@@ -54,26 +133,281 @@ class FakturOCR:
         except Exception as e:
             logger.error(f"❌ OCR extraction failed: {e}")
             return ""
+
+    def ocr_and_parse(self, image, filename, timings=None):
+        """
+        OCR + parsing satu gambar halaman.
+        Jika confidence pass pertama di bawah OCR_RETRY_CONFIDENCE, OCR diulang dengan
+        retry_profile dan hasil dengan confidence tertinggi yang dipakai.
+        Return (extracted_data, confidence, text_length)
+        """
+        text = self.extract_text_from_image(image, timings=timings)
+        started_at = time.perf_counter()
+        extracted_data, confidence = self.parse_faktur_data(text, filename) if text else (None, 0.0)
+        self._add_timing(timings, "parse_ms", started_at)
+
+        if confidence < OCR_RETRY_CONFIDENCE and self.retry_profile not in ("none", self.preprocess_profile):
+            logger.info(f"🔁 Low confidence ({confidence}) for {filename}, retry OCR with '{self.retry_profile}' preprocessing")
+            if timings is not None:
+                timings["retry"] = True
+            retry_text = self.extract_text_from_image(image, profile=self.retry_profile, timings=timings)
+            started_at = time.perf_counter()
+            retry_data, retry_confidence = self.parse_faktur_data(retry_text, filename) if retry_text else (None, 0.0)
+            self._add_timing(timings, "parse_ms", started_at)
+            if retry_data and retry_confidence > confidence:
+                extracted_data, confidence, text = retry_data, retry_confidence, retry_text
+
+        if not text:
+            raise Exception("No text extracted from file")
+        if not extracted_data:
+            raise Exception("Failed to parse faktur data")
+
+        return extracted_data, confidence, len(text)
     
-    def extract_text_from_pdf(self, pdf_bytes):
-        """Extract text dari PDF file"""
+    def missing_fields(self, data):
+        """Field faktur yang tidak ditemukan (masih berisi nilai default parse_faktur_data)"""
+        if not data:
+            return set(self.FIELD_REGIONS)
+        missing = set()
+        if data["bulan"] == self.DEFAULT_BULAN:
+            missing.add("tanggal")
+        if data["nama_lawan_transaksi"] == self.DEFAULT_NAMA:
+            missing.add("nama_lawan_transaksi")
+        if data["npwp_lawan_transaksi"] == self.DEFAULT_NPWP:
+            missing.add("npwp_lawan_transaksi")
+        if not data["dpp"] or data["dpp"] <= 0:
+            missing.add("dpp")
+        return missing
+
+    def confidence_for(self, data):
+        """calculate_confidence untuk extracted_data yang sudah jadi (mis. hasil merge ROI)"""
+        tanggal_obj = None
+        if data["bulan"] != self.DEFAULT_BULAN:
+            tanggal_obj = datetime.strptime(data["tanggal"], "%Y-%m-%d")
+        return self.calculate_confidence(
+            data, data["no_faktur"], tanggal_obj,
+            data["nama_lawan_transaksi"], data["npwp_lawan_transaksi"]
+        )
+
+    def region_bands(self, missing):
+        """Gabungkan region untuk field yang hilang menjadi band vertikal yang tidak overlap"""
+        bands = sorted({self.FAKTUR_REGIONS[self.FIELD_REGIONS[field]] for field in missing})
+        merged = []
+        for y0, y1 in bands:
+            if merged and y0 <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], y1))
+            else:
+                merged.append((y0, y1))
+        return merged
+
+    def ocr_page(self, render_page, filename, timings=None, adaptive=OCR_ADAPTIVE_DPI):
+        """
+        OCR satu halaman. render_page(dpi) mengembalikan PIL image halaman tersebut.
+        Return (extracted_data, confidence, text_length, processing_mode)
+        """
+        if not adaptive:
+            extracted_data, confidence, text_length = self.ocr_and_parse(
+                render_page(self.PDF_DPI), filename, timings=timings
+            )
+            return extracted_data, confidence, text_length, "enhanced_ocr"
+
+        # Pass 1: seluruh halaman pada DPI rendah
+        low_image = render_page(OCR_LOW_DPI)
+        text = self.extract_text_from_image(low_image, timings=timings)
+        del low_image
+        started_at = time.perf_counter()
+        data, confidence = self.parse_faktur_data(text, filename) if text else (None, 0.0)
+        self._add_timing(timings, "parse_ms", started_at)
+
+        missing = self.missing_fields(data)
+        if not missing:
+            return data, confidence, len(text), "adaptive_ocr"
+
+        # Pass 2: hanya region field yang hilang, dari render resolusi penuh
+        high_image = render_page(self.PDF_DPI)
+        img_cv = cv2.cvtColor(np.array(high_image.convert("RGB")), cv2.COLOR_RGB2BGR)
+        height = img_cv.shape[0]
+        bands = self.region_bands(missing)
+        roi_texts = [
+            self.extract_text_from_image(img_cv[int(y0 * height):int(y1 * height)], timings=timings)
+            for y0, y1 in bands
+        ]
+        if timings is not None:
+            timings["roi_bands"] = [[y0, y1] for y0, y1 in bands]
+        roi_text = "\n".join(roi_texts)
+
+        # Nomor faktur dari pass 1 tetap dibutuhkan parse_faktur_data jika header tidak di-OCR ulang
+        if data and "no_faktur" not in missing:
+            roi_text = f"Kode dan Nomor Seri Faktur Pajak: {data['no_faktur']}\n{roi_text}"
+        started_at = time.perf_counter()
+        roi_data, _ = self.parse_faktur_data(roi_text, filename) if roi_text.strip() else (None, 0.0)
+        self._add_timing(timings, "parse_ms", started_at)
+
+        merged = dict(data) if data else roi_data
+        if data and roi_data:
+            for field in missing - self.missing_fields(roi_data):
+                merged[field] = roi_data[field]
+                if field == "tanggal":
+                    merged["bulan"] = roi_data["bulan"]
+                elif field == "dpp":
+                    merged["ppn"] = roi_data["ppn"]
+
+        if merged:
+            confidence = self.confidence_for(merged)
+            if confidence >= OCR_RETRY_CONFIDENCE:
+                logger.info(f"🎯 Adaptive OCR for {filename}: {len(bands)} region(s) re-OCR'd at {self.PDF_DPI} DPI")
+                return merged, confidence, len(text) + len(roi_text), "adaptive_ocr"
+
+        # Region belum cukup: OCR seluruh halaman resolusi penuh (perilaku non-adaptive)
+        logger.info(f"🔁 Adaptive OCR insufficient for {filename}, full page OCR at {self.PDF_DPI} DPI")
         try:
-            # Convert PDF to images
-            images = convert_from_bytes(pdf_bytes, dpi=300, first_page=1, last_page=1)
-            
-            if not images:
-                raise Exception("No pages found in PDF")
-            
-            # Process first page
-            text = self.extract_text_from_image(images[0])
-            
-            logger.info(f"✅ PDF extraction successful")
-            return text
-            
+            full_data, full_confidence, text_length = self.ocr_and_parse(img_cv, filename, timings=timings)
+        except Exception:
+            if merged:
+                return merged, confidence, len(text) + len(roi_text), "adaptive_ocr"
+            raise
+        if merged and confidence >= full_confidence:
+            return merged, confidence, len(text) + len(roi_text), "adaptive_ocr"
+        return full_data, full_confidence, text_length, "enhanced_ocr"
+
+    def render_pdf_page(self, pdf_bytes, page_number=1, timings=None, dpi=None):
+        """Render satu halaman PDF (bytes) ke PIL image (default pada PDF_DPI)"""
+        started_at = time.perf_counter()
+        images = convert_from_bytes(pdf_bytes, dpi=dpi or self.PDF_DPI, first_page=page_number, last_page=page_number)
+        self._add_timing(timings, "render_ms", started_at)
+        if not images:
+            raise Exception("No pages found in PDF")
+        return images[0]
+
+    def extract_text_layer(self, pdf_path, page_number=1):
+        """Ambil text layer PDF langsung dengan pdftotext (tanpa rasterisasi / OCR)"""
+        pdftotext = os.path.join(POPPLER_PATH, 'pdftotext') if POPPLER_PATH else 'pdftotext'
+        try:
+            completed = subprocess.run(
+                [pdftotext, '-layout', '-enc', 'UTF-8',
+                 '-f', str(page_number), '-l', str(page_number), pdf_path, '-'],
+                capture_output=True, timeout=30
+            )
+            if completed.returncode != 0:
+                logger.warning(f"⚠️ pdftotext failed: {completed.stderr.decode(errors='ignore').strip()}")
+                return ""
+            text = completed.stdout.decode('utf-8', errors='ignore')
+            # Rapatkan spasi hasil -layout supaya mirip output Tesseract per baris
+            lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+            return "\n".join(line for line in lines if line)
         except Exception as e:
-            logger.error(f"❌ PDF extraction failed: {e}")
+            logger.warning(f"⚠️ Text layer extraction failed: {e}")
             return ""
 
+    def is_usable_text_layer(self, text):
+        """Heuristik: text layer cukup panjang, bukan sampah encoding, dan berisi penanda faktur"""
+        if not text or len(text) < self.TEXT_LAYER_MIN_CHARS:
+            return False
+        printable = sum(1 for char in text if char.isprintable() or char == "\n")
+        if printable / len(text) < self.TEXT_LAYER_MIN_PRINTABLE_RATIO:
+            return False
+        return bool(TEXT_LAYER_MARKERS.search(text))
+
+    def process_text_layer(self, pdf_path, filename, page_number=1):
+        """
+        Fast path e-Faktur: parse text layer halaman PDF.
+        Return (extracted_data, confidence, text_length) atau None jika harus fallback ke OCR.
+        """
+        if not OCR_TEXT_LAYER_ENABLED:
+            return None
+
+        text = self.extract_text_layer(pdf_path, page_number)
+        if not self.is_usable_text_layer(text):
+            logger.info(f"📄 Text layer not usable for {filename} (hal {page_number}), fallback to OCR")
+            return None
+
+        extracted_data, confidence = self.parse_faktur_data(text, filename)
+        if not extracted_data or confidence < self.TEXT_LAYER_MIN_CONFIDENCE:
+            logger.info(f"📄 Text layer parse quality too low for {filename} (confidence: {confidence}), fallback to OCR")
+            return None
+
+        logger.info(f"⚡ Text layer fast path used for {filename} (hal {page_number})")
+        return extracted_data, confidence, len(text)
+
+    def count_pdf_pages(self, pdf_path):
+        """Jumlah halaman PDF via pdfinfo (tanpa merender halaman)"""
+        info = pdfinfo_from_path(pdf_path)
+        return int(info.get("Pages", 0))
+
+    def process_pdf_page(self, pdf_path, page_number, filename, timings=None):
+        """
+        Proses satu halaman PDF: text layer dulu, OCR hanya jika text layer tidak layak.
+        Halaman dirender sendiri agar hanya satu gambar 300 DPI di memory.
+        Return (extracted_data, confidence, text_length, processing_mode)
+        """
+        page_name = f"{filename} (hal {page_number})"
+        started_at = time.perf_counter()
+        text_layer_result = self.process_text_layer(pdf_path, page_name, page_number)
+        self._add_timing(timings, "text_layer_ms", started_at)
+        if text_layer_result:
+            return (*text_layer_result, "text_layer")
+
+        def render_page(dpi):
+            started_at = time.perf_counter()
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+            self._add_timing(timings, "render_ms", started_at)
+            if not images:
+                raise Exception(f"Page {page_number} not found in PDF")
+            return images.pop()
+
+        return self.ocr_page(render_page, page_name, timings=timings)
+
+    def process_pdf_page_safe(self, pdf_path, page_number, filename):
+        """Seperti process_pdf_page tapi error dikembalikan per halaman, bukan di-raise"""
+        result = {
+            "halaman": page_number,
+            "extracted_data": None,
+            "confidence": 0.0,
+            "text_length": 0,
+            "processing_mode": None,
+            "stage_timings_ms": {},
+            "error": None
+        }
+        try:
+            extracted_data, confidence, text_length, processing_mode = self.process_pdf_page(
+                pdf_path, page_number, filename, timings=result["stage_timings_ms"]
+            )
+            result.update(
+                extracted_data=extracted_data, confidence=confidence,
+                text_length=text_length, processing_mode=processing_mode
+            )
+        except Exception as e:
+            logger.error(f"❌ OCR failed for {filename} page {page_number}: {e}")
+            result["error"] = str(e)
+        return result
+
+    def process_pdf_pages(self, pdf_bytes, filename, page_runner=None):
+        """
+        Proses setiap halaman PDF sebagai faktur terpisah.
+        page_runner(pdf_path, page_numbers, filename) menentukan cara eksekusi
+        (default sequential; ocr_pool.map_pdf_pages untuk paralel per halaman).
+        Return (list hasil per halaman, total halaman di PDF)
+        """
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(pdf_bytes)
+            pdf_path = tmp.name
+
+        try:
+            total_pages = self.count_pdf_pages(pdf_path)
+            if total_pages > OCR_MAX_PDF_PAGES:
+                logger.warning(f"⚠️ {filename} has {total_pages} pages, only first {OCR_MAX_PDF_PAGES} processed")
+            page_numbers = list(range(1, min(total_pages, OCR_MAX_PDF_PAGES) + 1))
+
+            if page_runner is None:
+                pages = [self.process_pdf_page_safe(pdf_path, page, filename) for page in page_numbers]
+            else:
+                pages = page_runner(pdf_path, page_numbers, filename)
+
+            logger.info(f"✅ Multi-page OCR completed for {filename}: {len(pages)} pages")
+            return pages, total_pages
+        finally:
+            os.remove(pdf_path)
+
     def parse_faktur_data(self, raw_text, filename):
         """Parse extracted text menggunakan extraction modules sesuai repo referensi"""
         try:
@@ -81,34 +415,24 @@ class FakturOCR:
             print(raw_text[:500] + "..." if len(raw_text) > 500 else raw_text)
             print("--------------------------------------------")
             
-            # Extract faktur dan tanggal - module utama
-            no_faktur, tanggal_obj = extract_faktur_tanggal(raw_text)
+            # Semua field diambil dalam satu pass (faktur/utils/extraction/unified.py)
+            nama_pt_utama = "PT UTAMA"  # Sesuaikan dengan PT yang digunakan
+            fields = extract_faktur_fields(raw_text, nama_pt_utama)
+            no_faktur = fields["no_faktur"]
+            tanggal_obj = fields["tanggal_obj"]
             
             if not no_faktur:
                 logger.warning("⚠️ Nomor faktur tidak ditemukan")
                 return None, 0.0
             
-            # Extract jenis pajak dan blok rekanan
-            nama_pt_utama = "PT UTAMA"  # Sesuaikan dengan PT yang digunakan
-            jenis_pajak, blok_rekanan, _ = extract_jenis_pajak(raw_text, nama_pt_utama)
-            
-            if not jenis_pajak:
+            if not fields["jenis_pajak"]:
                 logger.warning("⚠️ Jenis pajak tidak dapat ditentukan")
-                # Set default values untuk testing
-                blok_rekanan = raw_text
-                jenis_pajak = "PPN_MASUKAN"
-            
-            # Extract nama dan NPWP rekanan
-            nama_rekanan, npwp_rekanan = extract_npwp_nama_rekanan(blok_rekanan)
-            
-            # Extract DPP
-            dpp, dpp_str, override_ppn, override_ppn_str = extract_dpp(raw_text)
             
-            # Extract PPN
-            ppn, ppn_str = extract_ppn(raw_text, dpp, override_ppn)
-            
-            # Extract keterangan
-            keterangan = extract_keterangan(raw_text)
+            nama_rekanan = fields["nama_rekanan"]
+            npwp_rekanan = fields["npwp_rekanan"]
+            dpp = fields["dpp"]
+            ppn = fields["ppn"]
+            keterangan = fields["keterangan"]
             
             # Build result sesuai dengan format repo referensi
             extracted_data = {
@@ -126,7 +450,7 @@ class FakturOCR:
             confidence = self.calculate_confidence(extracted_data, no_faktur, tanggal_obj, nama_rekanan, npwp_rekanan)
             
             logger.info(f"✅ Faktur parsing completed with confidence: {confidence}")
-            print(f"[✅ HASIL] Faktur: {no_faktur} | DPP: {dpp_str} | PPN: {ppn_str}")
+            print(f"[✅ HASIL] Faktur: {no_faktur} | DPP: {dpp:,.2f} | PPN: {ppn:,.2f}")
             
             return extracted_data, confidence
             
@@ -154,8 +478,25 @@ class FakturOCR:
         
         return min(score, 1.0)
 
-    def process_file(self, file_bytes, filename):
-        """Main method untuk memproses file sesuai dengan workflow repo referensi"""
+    def process_pdf_text_layer(self, pdf_bytes, filename):
+        """Fast path text layer untuk halaman pertama PDF (bytes)"""
+        if not OCR_TEXT_LAYER_ENABLED:
+            return None
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(pdf_bytes)
+            pdf_path = tmp.name
+        try:
+            return self.process_text_layer(pdf_path, filename, page_number=1)
+        finally:
+            os.remove(pdf_path)
+
+    def process_file(self, file_bytes, filename, timings=None):
+        """
+        Main method untuk memproses file sesuai dengan workflow repo referensi
+        Return (extracted_data, confidence, text_length, processing_mode)
+        Durasi per stage (ms) ditulis ke dict timings jika diberikan.
+        """
         try:
             logger.info(f"🔍 Starting OCR processing for: {filename}")
             
@@ -163,24 +504,41 @@ class FakturOCR:
             file_ext = filename.lower().split('.')[-1]
             
             if file_ext == 'pdf':
-                # Process PDF
-                text = self.extract_text_from_pdf(file_bytes)
+                # e-Faktur dari DJP biasanya punya text layer: tidak perlu OCR
+                started_at = time.perf_counter()
+                text_layer_result = self.process_pdf_text_layer(file_bytes, filename)
+                self._add_timing(timings, "text_layer_ms", started_at)
+                if text_layer_result:
+                    return (*text_layer_result, "text_layer")
+                
+                # Process PDF (halaman pertama)
+                def render_page(dpi):
+                    return self.render_pdf_page(file_bytes, timings=timings, dpi=dpi)
+                adaptive = OCR_ADAPTIVE_DPI
             else:
                 # Process image
+                started_at = time.perf_counter()
                 image = Image.open(io.BytesIO(file_bytes))
-                text = self.extract_text_from_image(image)
-            
-            if not text:
-                raise Exception("No text extracted from file")
-            
-            # Parse extracted text dengan extraction modules
-            extracted_data, confidence = self.parse_faktur_data(text, filename)
+                image.load()
+                self._add_timing(timings, "decode_ms", started_at)
+
+                def render_page(dpi):
+                    if dpi >= self.PDF_DPI:
+                        return image
+                    scale = dpi / self.PDF_DPI
+                    return image.resize((int(image.width * scale), int(image.height * scale)), Image.BOX)
+                # Gambar kecil tidak diperkecil lagi untuk pass pertama
+                adaptive = OCR_ADAPTIVE_DPI and image.width >= OCR_ADAPTIVE_MIN_WIDTH
             
-            if not extracted_data:
-                raise Exception("Failed to parse faktur data")
+            # OCR + parse (adaptive DPI / retry preprocessing jika confidence rendah)
+            extracted_data, confidence, text_length, processing_mode = self.ocr_page(
+                render_page, filename, timings=timings, adaptive=adaptive
+            )
             
             logger.info(f"✅ OCR processing completed for: {filename}")
-            return extracted_data, confidence, len(text)
+            if timings:
+                logger.info(f"⏱️ OCR stage timings for {filename}: {timings}")
+            return extracted_data, confidence, text_length, processing_mode
             
         except Exception as e:
             logger.error(f"❌ OCR processing failed for {filename}: {e}")
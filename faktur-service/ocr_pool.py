@@ -0,0 +1,214 @@
+"""
+OCR Process Pool untuk Faktur Processing
+Tesseract/OpenCV bersifat CPU-bound, jadi OCR dijalankan di proses terpisah
+agar worker gunicorn tidak terkunci selama rasterisasi + OCR berjalan.
+"""
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import ocr_rpc
+
+logger = logging.getLogger(__name__)
+
+OCR_POOL_WORKERS = int(os.getenv('OCR_POOL_WORKERS', os.cpu_count() or 1))
+# 'spawn' supaya child process tidak mewarisi koneksi database / thread milik Flask
+OCR_POOL_START_METHOD = os.getenv('OCR_POOL_START_METHOD', 'spawn')
+
+# Global variables for lazy loading
+_pool = None
+_pool_lock = threading.Lock()
+
+# FakturOCR milik masing-masing worker process
+_worker_engine = None
+
+# FakturOCR di proses pemanggil (hitung halaman PDF, cache signature), dibuat saat pertama dipakai
+_local_engine = None
+_local_engine_lock = threading.Lock()
+
+# Signature engine ocr-worker dibaca ulang lewat ping paling lama setiap interval ini (detik)
+RPC_SIGNATURE_TTL = 300
+_rpc_signature = (None, 0.0)
+
+
+def _init_worker():
+    """Initializer untuk setiap worker process: buat FakturOCR sekali saja"""
+    global _worker_engine
+    from ocr_engine import FakturOCR
+    _worker_engine = FakturOCR()
+    # Muat traineddata Tesseract sekarang, bukan saat halaman pertama masuk
+    _worker_engine.tesseract
+
+
+def _ocr_file_task(file_bytes, filename):
+    """Dijalankan di worker process - OCR satu file dan catat waktu eksekusi"""
+    started_at = time.time()
+    stage_timings = {}
+    extracted_data, confidence, text_length, processing_mode = _worker_engine.process_file(
+        file_bytes, filename, timings=stage_timings
+    )
+    return {
+        "extracted_data": extracted_data,
+        "confidence": confidence,
+        "text_length": text_length,
+        "processing_mode": processing_mode,
+        "stage_timings_ms": stage_timings,
+        "ocr_started_at": started_at,
+        "ocr_finished_at": time.time(),
+        "worker_pid": os.getpid(),
+    }
+
+
+def _ocr_pdf_page_task(pdf_path, page_number, filename):
+    """Dijalankan di worker process - render + OCR satu halaman PDF"""
+    started_at = time.time()
+    result = _worker_engine.process_pdf_page_safe(pdf_path, page_number, filename)
+    result.update(
+        ocr_started_at=started_at,
+        ocr_finished_at=time.time(),
+        worker_pid=os.getpid(),
+    )
+    return result
+
+
+def get_local_engine():
+    """FakturOCR di proses ini; Tesseract baru dimuat jika engine ini sendiri melakukan OCR"""
+    global _local_engine
+
+    if _local_engine is None:
+        with _local_engine_lock:
+            if _local_engine is None:
+                from ocr_engine import FakturOCR
+                _local_engine = FakturOCR()
+
+    return _local_engine
+
+
+def cache_signature():
+    """
+    Signature engine untuk key OCR result cache. Dengan OCR_RPC_ADDRESS signature
+    diambil dari ping ocr-worker (engine yang benar-benar menjalankan OCR), jadi
+    proses web tidak perlu FakturOCR / Tesseract sendiri
+    """
+    global _rpc_signature
+
+    if not ocr_rpc.rpc_enabled():
+        return get_local_engine().cache_signature()
+
+    signature, fetched_at = _rpc_signature
+    if signature is None or time.time() - fetched_at > RPC_SIGNATURE_TTL:
+        status = ocr_rpc.get_ocr_rpc_client().call("ping", timeout=10)
+        signature = status.get("faktur_cache_signature")
+        if not signature:
+            raise ocr_rpc.OcrRpcError("OCR worker tidak memuat engine faktur")
+        _rpc_signature = (signature, time.time())
+    return signature
+
+
+def get_ocr_pool():
+    """
+    Lazy loading untuk ProcessPoolExecutor
+    Pool baru dibuat saat job OCR pertama masuk
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:  # Double-check locking pattern
+                logger.info(f"🧵 Inisialisasi OCR process pool ({OCR_POOL_WORKERS} workers, {OCR_POOL_START_METHOD})")
+                _pool = ProcessPoolExecutor(
+                    max_workers=OCR_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context(OCR_POOL_START_METHOD),
+                    initializer=_init_worker,
+                )
+
+    return _pool
+
+
+def _reset_pool(broken_pool):
+    """Buang pool yang rusak (mis. worker di-kill OOM) supaya submit berikutnya membuat pool baru"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken_pool:
+            logger.error("❌ OCR process pool rusak, pool akan dibuat ulang")
+            _pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn, *args):
+    """Submit task ke OCR pool, buat ulang pool sekali jika pool sebelumnya rusak"""
+    pool = get_ocr_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return get_ocr_pool().submit(fn, *args)
+
+
+def run_ocr(file_bytes, filename, timeout=None):
+    """Jalankan FakturOCR.process_file di pool (atau di ocr-worker via RPC) dan tunggu hasilnya"""
+    if ocr_rpc.rpc_enabled():
+        return ocr_rpc.get_ocr_rpc_client().call("faktur.process_file", file_bytes, filename, timeout=timeout)
+
+    future = submit(_ocr_file_task, file_bytes, filename)
+    try:
+        return future.result(timeout=timeout)
+    except BrokenProcessPool:
+        if _pool is not None:
+            _reset_pool(_pool)
+        raise
+
+
+def map_pdf_pages(pdf_path, page_numbers, filename, timeout=None, on_page_done=None):
+    """
+    Page runner untuk FakturOCR.process_pdf_pages: setiap halaman di-OCR paralel di pool.
+    Hasil dikembalikan berurutan sesuai nomor halaman.
+    """
+    futures = [submit(_ocr_pdf_page_task, pdf_path, page, filename) for page in page_numbers]
+    results = []
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            results.append(future.result())
+            if on_page_done:
+                on_page_done(len(results), len(futures))
+    except BaseException:
+        # File PDF sementara akan dihapus, jangan biarkan halaman sisa tetap antri
+        for future in futures:
+            future.cancel()
+        raise
+
+    return sorted(results, key=lambda result: result["halaman"])
+
+
+def run_pdf_pages(pdf_bytes, filename, timeout=None, on_page_done=None):
+    """
+    OCR multi-page: setiap halaman PDF di-OCR paralel di pool.
+    Dengan OCR_RPC_ADDRESS isi PDF dikirim utuh ke ocr-worker, yang menghitung halaman,
+    merender dan meng-OCR semuanya (proses web tidak butuh poppler / file sementara).
+    Return (list hasil per halaman, total halaman di PDF)
+    """
+    if ocr_rpc.rpc_enabled():
+        pages, total_pages = ocr_rpc.get_ocr_rpc_client().call(
+            "faktur.process_pdf_pages", pdf_bytes, filename, timeout=timeout
+        )
+        if on_page_done:
+            on_page_done(len(pages), len(pages))
+        return pages, total_pages
+
+    def page_runner(pdf_path, page_numbers, name):
+        return map_pdf_pages(pdf_path, page_numbers, name, timeout=timeout, on_page_done=on_page_done)
+    return get_local_engine().process_pdf_pages(pdf_bytes, filename, page_runner=page_runner)
+
+
+def pool_stats():
+    """Informasi pool untuk health check"""
+    return {
+        "workers": OCR_POOL_WORKERS,
+        "start_method": OCR_POOL_START_METHOD,
+        "started": _pool is not None,
+        "rpc_address": ocr_rpc.OCR_RPC_ADDRESS or None,
+    }
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination untuk endpoint history.
+Halaman berikutnya diambil dengan WHERE (created_at, id) < (cursor) memakai index
+(created_at, id), jadi biaya query sama untuk halaman pertama maupun ke-1000
+(tidak ada OFFSET yang harus melewati semua baris sebelumnya).
+"""
+import json
+import base64
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+
+class InvalidQueryParam(ValueError):
+    """Parameter query tidak valid (dikembalikan ke client sebagai 400)"""
+
+
+def encode_cursor(values):
+    """dict -> string base64 url-safe; datetime/date disimpan sebagai ISO string"""
+    payload = {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Kebalikan encode_cursor; created_at dikembalikan sebagai datetime"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        values["created_at"] = datetime.fromisoformat(values["created_at"])
+        values["id"] = int(values["id"])
+        return values
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidQueryParam(f"cursor tidak valid: {e}")
+
+
+def parse_limit(value, default, maximum):
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidQueryParam("limit harus berupa angka")
+    return max(1, min(limit, maximum))
+
+
+def parse_date_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise InvalidQueryParam(f"{name} harus berformat YYYY-MM-DD")
+
+
+def parse_decimal_arg(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise InvalidQueryParam(f"{name} harus berupa angka")
+
+
+def parse_fields(value, allowed, always=("id", "created_at")):
+    """
+    fields=a,b,c -> daftar kolom yang di-select. Kolom keyset (always) selalu ikut
+    di-query; return (kolom query, kolom yang dikirim ke client)
+    """
+    if not value:
+        return list(allowed), list(allowed)
+    requested = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise InvalidQueryParam(f"fields tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(allowed)})")
+    selected = list(dict.fromkeys(list(always) + requested))
+    return selected, requested
+
+
+def keyset_before(db, created_at_column, id_column, cursor):
+    """Predikat (created_at, id) < cursor untuk urutan created_at DESC, id DESC"""
+    return db.tuple_(created_at_column, id_column) < db.tuple_(cursor["created_at"], cursor["id"])
+
+
+def serialize_value(value):
+    """Format sama dengan to_dict() model"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def serialize_rows(rows, fields):
+    """Row mapping -> dict JSON hanya berisi kolom yang diminta"""
+    return [{field: serialize_value(row[field]) for field in fields} for row in rows]
+
+
+def split_page(rows, limit):
+    """Query dijalankan dengan LIMIT limit+1: baris ekstra hanya menandakan ada halaman berikutnya"""
+    has_more = len(rows) > limit
+    return rows[:limit], has_more
@@ -0,0 +1,248 @@
+"""
+Preview Store untuk Faktur Processing
+Menggantikan dict uploaded_files yang menyimpan bytes setiap upload selamanya.
+
+- Key content-addressed (MD5 file upload), jadi upload duplikat berbagi storage
+- Upload disimpan mentah ke disk (tanpa render, request upload tidak menunggu
+  rasterisasi PDF); thumbnail JPEG dibuat sekali saat preview pertama diminta,
+  lalu file asli dihapus
+- Memory tier: LRU dengan batas total bytes + TTL
+- Disk tier: file di PREVIEW_DIR, dipakai bersama semua gunicorn worker dan
+  dikirim dengan send_file (sendfile / zero-copy bila didukung server)
+"""
+import os
+import io
+import re
+import time
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = os.getenv('PREVIEW_DIR', os.path.join('uploads', 'previews'))
+PREVIEW_MEMORY_BUDGET = int(os.getenv('PREVIEW_MEMORY_BUDGET', 32 * 1024 * 1024))
+PREVIEW_DISK_BUDGET = int(os.getenv('PREVIEW_DISK_BUDGET', 512 * 1024 * 1024))
+PREVIEW_TTL = int(os.getenv('PREVIEW_TTL', 86400))
+PREVIEW_MAX_WIDTH = int(os.getenv('PREVIEW_MAX_WIDTH', 1000))
+PREVIEW_JPEG_QUALITY = int(os.getenv('PREVIEW_JPEG_QUALITY', 80))
+
+# Sweep disk paling sering sekali per interval ini (detik)
+DISK_SWEEP_INTERVAL = 60
+
+PREVIEW_KEY_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+MIMETYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'bmp': 'image/bmp',
+    'tiff': 'image/tiff',
+    'pdf': 'application/pdf',
+}
+
+
+def make_thumbnail(file_content, filename, max_width=PREVIEW_MAX_WIDTH, quality=PREVIEW_JPEG_QUALITY):
+    """Buat thumbnail JPEG dari halaman pertama PDF atau dari gambar upload"""
+    if filename.lower().endswith('.pdf'):
+        from pdf2image import convert_from_bytes
+        # Render langsung ke lebar preview, bukan 300 DPI lalu resize
+        pages = convert_from_bytes(file_content, first_page=1, last_page=1, size=(max_width, None))
+        if not pages:
+            raise ValueError("No pages found in PDF")
+        image = pages[0]
+    else:
+        image = Image.open(io.BytesIO(file_content))
+        # JPEG bisa di-decode langsung pada skala kecil
+        image.draft('RGB', (max_width, max_width * 2))
+        image.thumbnail((max_width, max_width * 2))
+
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+class PreviewStore:
+    """Preview store dua tier (memory + disk) dengan key MD5 file"""
+
+    def __init__(self, directory=PREVIEW_DIR, memory_budget=PREVIEW_MEMORY_BUDGET,
+                 disk_budget=PREVIEW_DISK_BUDGET, ttl=PREVIEW_TTL):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (stored_at, content, mimetype)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def is_valid_key(key):
+        return bool(PREVIEW_KEY_PATTERN.match(key or ''))
+
+    def _disk_path(self, key):
+        """Cari file preview di disk untuk key (thumbnail .jpg atau file asli)"""
+        for ext in ['jpg'] + [e for e in MIMETYPES if e != 'jpg']:
+            path = os.path.join(self.directory, f"{key}.{ext}")
+            if os.path.exists(path):
+                return path, MIMETYPES[ext]
+        return None, None
+
+    def _source_path(self, key):
+        """File upload asli yang thumbnail-nya belum dibuat"""
+        for ext in MIMETYPES:
+            path = os.path.join(self.directory, f"{key}.src.{ext}")
+            if os.path.exists(path):
+                return path, ext
+        return None, None
+
+    def _is_fresh(self, path):
+        return time.time() - os.path.getmtime(path) <= self.ttl
+
+    def put(self, key, file_content, filename):
+        """Simpan file upload apa adanya; thumbnail baru dibuat saat get() pertama"""
+        if self._memory_get(key):
+            return key
+
+        for path in (self._disk_path(key)[0], self._source_path(key)[0]):
+            if path and self._is_fresh(path):
+                os.utime(path)  # perpanjang TTL
+                return key
+
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'jpg'
+        if ext not in MIMETYPES:
+            ext = 'jpg'
+        self._write_disk(key, f"src.{ext}", file_content)
+        self._maybe_sweep_disk()
+        logger.info(f"📷 Preview source stored: {key} ({len(file_content)} bytes)")
+        return key
+
+    def get(self, key):
+        """
+        Return ('memory', bytes, mimetype) atau ('disk', path, mimetype),
+        None jika preview tidak ada / sudah kedaluwarsa
+        """
+        entry = self._memory_get(key)
+        if entry:
+            return ('memory', entry[0], entry[1])
+
+        path, mimetype = self._disk_path(key)
+        if not path:
+            return self._render(key)
+        if not self._is_fresh(path):
+            self._remove_file(path)
+            return None
+        return ('disk', path, mimetype)
+
+    def _render(self, key):
+        """Buat thumbnail dari file asli (preview pertama untuk key ini)"""
+        source, ext = self._source_path(key)
+        if not source:
+            return None
+        if not self._is_fresh(source):
+            self._remove_file(source)
+            return None
+
+        try:
+            with open(source, 'rb') as f:
+                file_content = f.read()
+        except FileNotFoundError:
+            # Worker lain baru saja selesai membuat thumbnail dan menghapus file asli
+            path, mimetype = self._disk_path(key)
+            return ('disk', path, mimetype) if path else None
+
+        try:
+            content = make_thumbnail(file_content, f"{key}.{ext}")
+            ext = 'jpg'
+        except Exception as e:
+            # Tidak bisa dibuat thumbnail: preview berupa file asli apa adanya
+            logger.warning(f"⚠️ Thumbnail generation failed for {key}: {e}")
+            content = file_content
+
+        self._write_disk(key, ext, content)
+        self._remove_file(source)
+        self._memory_put(key, content, MIMETYPES[ext])
+        logger.info(f"📷 Preview rendered: {key} ({len(content)} bytes, from {len(file_content)} bytes)")
+        return ('memory', content, MIMETYPES[ext])
+
+    def _write_disk(self, key, ext, content):
+        path = os.path.join(self.directory, f"{key}.{ext}")
+        # Nama temp unik per panggilan (bukan per pid): beberapa thread bisa menulis key yang sama
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)  # atomic, aman jika beberapa worker menulis key yang sama
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            stored_at, content, mimetype = entry
+            if time.time() - stored_at > self.ttl:
+                self._memory_bytes -= len(content)
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return content, mimetype
+
+    def _memory_put(self, key, content, mimetype):
+        if len(content) > self.memory_budget:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key)[1])
+            self._memory[key] = (time.time(), content, mimetype)
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.memory_budget:
+                _, (_, evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _maybe_sweep_disk(self):
+        """Hapus file kedaluwarsa lalu file tertua sampai total ukuran di bawah budget"""
+        now = time.time()
+        if now - self._last_sweep < DISK_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                self._remove_file(entry.path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_budget:
+                break
+            self._remove_file(path)
+            total -= size
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget": self.memory_budget,
+                "disk_budget": self.disk_budget,
+                "directory": self.directory,
+            }
@@ -0,0 +1,110 @@
+"""
+Rekap PPN bulanan untuk Faktur Service
+Dibaca dari tabel rekap_bulanan yang dijaga trigger PostgreSQL (lihat models.py),
+jadi summary setahun cukup membaca maksimal 24 baris, bukan seluruh ppn_masukan/ppn_keluaran.
+Database tanpa trigger (SQLite dev) dihitung langsung dari tabel sumber.
+"""
+from datetime import date
+
+from models import db, RekapBulanan, PpnMasukan, PpnKeluaran
+
+REKAP_FAKTUR_SOURCES = {"ppn_masukan": PpnMasukan, "ppn_keluaran": PpnKeluaran}
+REKAP_COLUMNS = ("tahun", "bulan", "jenis", "jumlah_dokumen", "total_dpp", "total_ppn")
+
+
+def period_range(tahun, bulan=None):
+    """(awal, akhir) eksklusif untuk satu tahun atau satu bulan"""
+    if bulan:
+        start = date(tahun, bulan, 1)
+        end = date(tahun + 1, 1, 1) if bulan == 12 else date(tahun, bulan + 1, 1)
+        return start, end
+    return date(tahun, 1, 1), date(tahun + 1, 1, 1)
+
+
+def _rekap_from_sources(tahun, bulan):
+    start, end = period_range(tahun, bulan)
+    selects = []
+    for jenis, model in REKAP_FAKTUR_SOURCES.items():
+        tahun_col = db.extract('year', model.tanggal)
+        bulan_col = db.extract('month', model.tanggal)
+        selects.append(
+            db.select(
+                tahun_col.label('tahun'), bulan_col.label('bulan'), db.literal(jenis).label('jenis'),
+                db.func.count().label('jumlah_dokumen'),
+                db.func.sum(model.dpp).label('total_dpp'),
+                db.func.sum(model.ppn).label('total_ppn')
+            )
+            .where(model.tanggal >= start, model.tanggal < end)
+            .group_by(tahun_col, bulan_col)
+        )
+    return db.union_all(*selects).subquery()
+
+
+def _rekap_rows(tahun, bulan):
+    if db.engine.dialect.name == 'postgresql':
+        conditions = [
+            RekapBulanan.tahun == tahun,
+            RekapBulanan.jenis.in_(list(REKAP_FAKTUR_SOURCES)),
+            RekapBulanan.jumlah_dokumen > 0
+        ]
+        if bulan:
+            conditions.append(RekapBulanan.bulan == bulan)
+        source = db.select(RekapBulanan).where(*conditions).subquery()
+    else:
+        source = _rekap_from_sources(tahun, bulan)
+
+    query = db.select(*[source.c[name] for name in REKAP_COLUMNS]).order_by(source.c.bulan)
+    return db.session.execute(query).mappings().all()
+
+
+def _empty_totals():
+    return {"jumlah_dokumen": 0, "dpp": 0.0, "ppn": 0.0}
+
+
+def _net_status(ppn_net):
+    if ppn_net > 0:
+        return "kurang_bayar"
+    if ppn_net < 0:
+        return "lebih_bayar"
+    return "nihil"
+
+
+def get_rekap_ppn(tahun, bulan=None):
+    """
+    PPN masukan vs keluaran per bulan untuk satu tahun (atau satu bulan).
+    ppn_net = PPN keluaran - PPN masukan (positif: kurang bayar, negatif: lebih bayar).
+    Raise ValueError untuk bulan di luar 1-12.
+    """
+    if bulan is not None and not 1 <= bulan <= 12:
+        raise ValueError("bulan harus 1-12")
+
+    per_bulan = {}
+    for row in _rekap_rows(tahun, bulan):
+        month = per_bulan.setdefault(int(row['bulan']), {
+            "masukan": _empty_totals(),
+            "keluaran": _empty_totals()
+        })
+        totals = month["masukan" if row['jenis'] == 'ppn_masukan' else "keluaran"]
+        totals["jumlah_dokumen"] += int(row['jumlah_dokumen'])
+        totals["dpp"] += float(row['total_dpp'] or 0)
+        totals["ppn"] += float(row['total_ppn'] or 0)
+
+    months = []
+    total = {"masukan": _empty_totals(), "keluaran": _empty_totals()}
+    for month_number in sorted(per_bulan):
+        month = per_bulan[month_number]
+        ppn_net = round(month["keluaran"]["ppn"] - month["masukan"]["ppn"], 2)
+        months.append({"bulan": month_number, **month, "ppn_net": ppn_net, "status": _net_status(ppn_net)})
+        for jenis in ("masukan", "keluaran"):
+            for key, value in month[jenis].items():
+                total[jenis][key] += value
+
+    ppn_net = round(total["keluaran"]["ppn"] - total["masukan"]["ppn"], 2)
+    rekap = {
+        "tahun": tahun,
+        "per_bulan": months,
+        "total": {**total, "ppn_net": ppn_net, "status": _net_status(ppn_net)}
+    }
+    if bulan:
+        rekap["bulan"] = bulan
+    return rekap
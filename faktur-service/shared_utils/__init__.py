@@ -1,3 +1,3 @@
 from .file_utils import allowed_file, is_image_file, is_valid_image
 from .text_utils import clean_transaction_value, fuzzy_month_match, clean_number, clean_string
-from .image_utils import preprocess_for_tesseract, preprocess_for_easyocr
+from .image_utils import preprocess_for_tesseract, preprocess_for_easyocr, apply_preprocess_profile
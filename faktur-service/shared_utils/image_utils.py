@@ -24,6 +24,27 @@ def preprocess_for_tesseract(image):
     
     return sharpened
 
+def preprocess_light(image):
+    """
+    Preprocessing ringan untuk Tesseract: grayscale saja
+    (Tesseract melakukan binarisasi Otsu sendiri)
+    """
+    if len(image.shape) == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+# Profil preprocessing Tesseract: none = gambar asli, light = grayscale, full = CLAHE + median blur + sharpen
+TESSERACT_PREPROCESS_PROFILES = {
+    "none": None,
+    "light": preprocess_light,
+    "full": preprocess_for_tesseract,
+}
+
+def apply_preprocess_profile(image, profile):
+    """Jalankan profil preprocessing Tesseract, profil tidak dikenal dianggap 'none'"""
+    preprocess = TESSERACT_PREPROCESS_PROFILES.get(profile)
+    return preprocess(image) if preprocess else image
+
 def preprocess_for_easyocr(image):
     """
     Preprocessing optimized untuk EasyOCR
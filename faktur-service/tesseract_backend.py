@@ -0,0 +1,103 @@
+"""
+Tesseract Backend untuk Faktur Processing
+pytesseract menjalankan proses `tesseract` baru di setiap panggilan: gambar ditulis
+ke file PNG sementara dan traineddata `ind` dimuat ulang setiap halaman.
+
+Backend tesserocr memakai C-API Tesseract langsung: satu instance TessBaseAPI
+dibuat sekali per proses (per worker OCR pool) lalu dipakai ulang, dan pixel
+gambar diserahkan langsung dari memory tanpa encode/decode PNG.
+
+OCR_BACKEND:
+- auto        : tesserocr jika terpasang, fallback ke pytesseract
+- tesserocr   : wajib tesserocr
+- pytesseract : perilaku lama (subprocess per panggilan)
+"""
+import os
+import re
+import logging
+import threading
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+OCR_BACKEND = os.getenv('OCR_BACKEND', 'auto').lower()
+TESSERACT_CMD = os.getenv('TESSERACT_CMD', '/usr/bin/tesseract')
+TESSDATA_PREFIX = os.getenv('TESSDATA_PREFIX', '')
+
+
+def _psm_from_config(config):
+    """Ambil nilai --psm dari config string pytesseract (default 3 = auto)"""
+    match = re.search(r"--psm\s+(\d+)", config or "")
+    return int(match.group(1)) if match else 3
+
+
+class PytesseractBackend:
+    """Backend lama: satu subprocess tesseract per panggilan"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang, config):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self._pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        self.lang = lang
+        self.config = config
+
+    def image_to_string(self, image):
+        return self._pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+
+class TesserocrBackend:
+    """
+    Backend persisten: TessBaseAPI tetap hidup selama proses berjalan.
+    TessBaseAPI tidak thread-safe, jadi akses diserialkan dengan lock.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang, config):
+        import tesserocr
+        self.lang = lang
+        self.config = config
+        kwargs = {"lang": lang, "psm": _psm_from_config(config)}
+        if TESSDATA_PREFIX:
+            kwargs["path"] = TESSDATA_PREFIX
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._lock = threading.Lock()
+
+    def image_to_string(self, image):
+        if isinstance(image, Image.Image):
+            image = np.asarray(image.convert('L') if image.mode not in ('L', 'RGB') else image)
+
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        with self._lock:
+            # Pixel buffer diserahkan langsung, tanpa file sementara / PNG
+            self._api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            try:
+                return self._api.GetUTF8Text()
+            finally:
+                self._api.Clear()
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+def create_tesseract_backend(lang, config, backend=OCR_BACKEND):
+    """Buat backend sesuai OCR_BACKEND; 'auto' memilih tesserocr bila tersedia"""
+    if backend in ("auto", "tesserocr"):
+        try:
+            instance = TesserocrBackend(lang, config)
+            logger.info(f"✅ Tesseract backend: tesserocr (persistent, lang={lang})")
+            return instance
+        except Exception as e:
+            if backend == "tesserocr":
+                raise
+            logger.warning(f"⚠️ tesserocr not available, fallback to pytesseract: {e}")
+
+    logger.info(f"✅ Tesseract backend: pytesseract (lang={lang})")
+    return PytesseractBackend(lang, config)
@@ -0,0 +1,34 @@
+-- ========================================
+-- MIGRATION 001: INDEX UNTUK HISTORY & SUMMARY
+-- ========================================
+-- Untuk database yang sudah berjalan (tabel baru sudah mendapat index ini dari
+-- supabase_setup.sql). Jalankan di Supabase SQL Editor / psql di luar transaksi:
+-- CREATE INDEX CONCURRENTLY tidak mengunci tabel dari INSERT selama index dibangun.
+
+-- Summary bukti setor per tahun/bulan:
+--   WHERE tanggal >= :start AND tanggal < :end  ->  COUNT(*), SUM(jumlah)
+-- INCLUDE (jumlah) membuat query cukup membaca index (index-only scan)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bukti_setor_tanggal_jumlah
+    ON bukti_setor (tanggal) INCLUDE (jumlah);
+
+-- Keyset pagination history: ORDER BY created_at DESC, id DESC + WHERE (created_at, id) < cursor
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bukti_setor_created_at_id
+    ON bukti_setor (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ppn_masukan_created_at_id
+    ON ppn_masukan (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ppn_keluaran_created_at_id
+    ON ppn_keluaran (created_at, id);
+
+-- Filter NPWP di history faktur tetap terurut created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ppn_masukan_npwp_created_at
+    ON ppn_masukan (npwp_lawan_transaksi, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ppn_keluaran_npwp_created_at
+    ON ppn_keluaran (npwp_lawan_transaksi, created_at, id);
+
+-- idx_bukti_setor_tanggal (tanggal saja) sekarang tercakup oleh idx_bukti_setor_tanggal_jumlah
+DROP INDEX CONCURRENTLY IF EXISTS idx_bukti_setor_tanggal;
+
+-- Statistik planner untuk index baru
+ANALYZE bukti_setor;
+ANALYZE ppn_masukan;
+ANALYZE ppn_keluaran;
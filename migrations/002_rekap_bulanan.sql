@@ -0,0 +1,143 @@
+-- ========================================
+-- MIGRATION 002: REKAP BULANAN (PPN MASUKAN, PPN KELUARAN, BUKTI SETOR)
+-- ========================================
+-- Tabel rekap per (tahun, bulan, jenis) yang dijaga trigger per statement pada
+-- tabel sumber, dipakai oleh /api/summary, /api/bukti_setor/summary dan
+-- /api/faktur-summary. Sama dengan REKAP_BULANAN_DDL di models.py: service yang
+-- menjalankan db.create_all() pada database tanpa rekap_bulanan memasangnya sendiri.
+-- Butuh PostgreSQL 11+ (EXECUTE FUNCTION, transition table).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS rekap_bulanan (
+    tahun INTEGER NOT NULL,
+    bulan INTEGER NOT NULL,
+    jenis VARCHAR(20) NOT NULL,
+    jumlah_dokumen INTEGER NOT NULL DEFAULT 0,
+    total_dpp DECIMAL(18,2) NOT NULL DEFAULT 0,
+    total_ppn DECIMAL(18,2) NOT NULL DEFAULT 0,
+    total_jumlah DECIMAL(18,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (tahun, bulan, jenis)
+);
+
+CREATE OR REPLACE FUNCTION rekap_bulanan_faktur() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+        FROM new_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               -COUNT(*), -SUM(dpp), -SUM(ppn), 0, NOW()
+        FROM old_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rekap_bulanan_bukti_setor() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               COUNT(*), 0, 0, SUM(jumlah), NOW()
+        FROM new_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               -COUNT(*), 0, 0, -SUM(jumlah), NOW()
+        FROM old_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Hitung ulang seluruh rekap dari tabel sumber (backfill / perbaikan manual)
+CREATE OR REPLACE FUNCTION rekap_bulanan_rebuild() RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE ppn_masukan, ppn_keluaran, bukti_setor IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM rekap_bulanan;
+    INSERT INTO rekap_bulanan (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_masukan',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_masukan GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_keluaran',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_keluaran GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'bukti_setor',
+           COUNT(*), 0, 0, SUM(jumlah), NOW()
+    FROM bukti_setor GROUP BY 1, 2;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_insert ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_insert AFTER INSERT ON ppn_masukan
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_update ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_update AFTER UPDATE ON ppn_masukan
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_delete ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_delete AFTER DELETE ON ppn_masukan
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_insert ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_insert AFTER INSERT ON ppn_keluaran
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_update ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_update AFTER UPDATE ON ppn_keluaran
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_delete ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_delete AFTER DELETE ON ppn_keluaran
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_insert ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_insert AFTER INSERT ON bukti_setor
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_update ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_update AFTER UPDATE ON bukti_setor
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_delete ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_delete AFTER DELETE ON bukti_setor
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+
+-- Isi rekap dari data yang sudah ada (mengunci tabel sumber dari write selama rebuild)
+SELECT rekap_bulanan_rebuild();
+
+COMMIT;
+
+-- Cek: SELECT * FROM rekap_bulanan ORDER BY tahun, bulan, jenis;
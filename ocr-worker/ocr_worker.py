@@ -0,0 +1,171 @@
+"""
+OCR Worker - proses OCR terpisah untuk faktur-service dan bukti-setor-service
+Engine OCR (Tesseract via process pool FakturOCR, EasyOCR Reader + micro-batcher)
+dimuat sekali di proses ini. Worker gunicorn kedua service menjadi client tipis
+(OCR_RPC_ADDRESS), jadi jumlah worker HTTP dan kapasitas OCR bisa diatur terpisah
+tanpa menggandakan model di setiap worker web.
+
+Dependency: requirements.txt faktur-service + requirements-bukti-setor.txt
+(hanya yang engine-nya diaktifkan lewat OCR_WORKER_ENGINES).
+
+Usage (dari root repo):
+    OCR_RPC_ADDRESS=/run/ocr/ocr.sock OCR_RPC_AUTHKEY=rahasia python ocr-worker/ocr_worker.py
+
+OCR_RPC_AUTHKEY wajib di-set (nilai acak panjang, sama di worker dan client):
+setiap pesan RPC di-unpickle, jadi client yang lolos handshake bisa menjalankan kode
+apa pun di proses ini. Listener TCP (host:port) tanpa authkey ditolak saat start;
+Unix socket dibuat dengan permission 0660 sejak awal (umask), tetapi authkey tetap wajib.
+
+Method RPC:
+- ping                                                       -> status engine + cache signature faktur
+- faktur.process_file(file_bytes, filename)                  -> hasil ocr_pool.run_ocr
+- faktur.process_pdf_pages(pdf_bytes, filename)              -> (list hasil per halaman, total halaman)
+- easyocr.readtext_many(image_arrays)                        -> list hasil readtext per gambar
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import importlib.util
+from multiprocessing.connection import Listener
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("ocr_worker")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OCR_RPC_ADDRESS = os.getenv('OCR_RPC_ADDRESS', '/tmp/ocr-worker.sock')
+OCR_RPC_AUTHKEY = os.getenv('OCR_RPC_AUTHKEY', '')
+OCR_WORKER_ENGINES = [e.strip() for e in os.getenv('OCR_WORKER_ENGINES', 'faktur,easyocr').split(',') if e.strip()]
+FAKTUR_SERVICE_DIR = os.getenv('FAKTUR_SERVICE_DIR', os.path.join(ROOT_DIR, 'faktur-service'))
+BUKTI_SETOR_SERVICE_DIR = os.getenv('BUKTI_SETOR_SERVICE_DIR', os.path.join(ROOT_DIR, 'bukti-setor-service'))
+EASYOCR_BATCH_SIZE = int(os.getenv('EASYOCR_BATCH_SIZE', '8'))
+EASYOCR_BATCH_WINDOW_MS = int(os.getenv('EASYOCR_BATCH_WINDOW_MS', '20'))
+
+
+def _load_faktur_engine():
+    """ocr_pool milik faktur-service: FakturOCR berjalan di ProcessPoolExecutor (spawn)"""
+    # Hanya faktur-service yang masuk sys.path; child process spawn mewarisi path ini
+    sys.path.insert(0, FAKTUR_SERVICE_DIR)
+    os.environ['OCR_RPC_ADDRESS'] = ''  # ocr_pool di proses ini selalu memakai pool lokal
+    import ocr_pool
+    return ocr_pool
+
+
+def _load_easyocr_engine():
+    """
+    ocr_engine.py milik bukti-setor-service dimuat langsung dari file: package
+    bukti_setor dan shared_utils-nya tidak di-import, jadi tidak bentrok dengan
+    shared_utils faktur-service di proses yang sama
+    """
+    path = os.path.join(BUKTI_SETOR_SERVICE_DIR, 'bukti_setor', 'utils', 'ocr_engine.py')
+    spec = importlib.util.spec_from_file_location('bukti_setor_ocr_engine', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.get_easyocr_reader()
+    return module.get_easyocr_batcher(EASYOCR_BATCH_SIZE, EASYOCR_BATCH_WINDOW_MS)
+
+
+class OcrWorker:
+    """Dispatcher method RPC ke engine yang dimuat"""
+
+    def __init__(self, engines):
+        self.started_at = time.time()
+        self.requests = 0
+        self.ocr_pool = _load_faktur_engine() if 'faktur' in engines else None
+        self.easyocr_batcher = _load_easyocr_engine() if 'easyocr' in engines else None
+        self.methods = {"ping": self.ping}
+        if self.ocr_pool:
+            self.methods["faktur.process_file"] = self.ocr_pool.run_ocr
+            self.methods["faktur.process_pdf_pages"] = self.ocr_pool.run_pdf_pages
+        if self.easyocr_batcher:
+            self.methods["easyocr.readtext_many"] = self.easyocr_batcher.readtext_many
+
+    def ping(self):
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "engines": {
+                "faktur": self.ocr_pool is not None,
+                "easyocr": self.easyocr_batcher is not None,
+            },
+            "ocr_pool": self.ocr_pool.pool_stats() if self.ocr_pool else None,
+            "faktur_cache_signature": self.ocr_pool.cache_signature() if self.ocr_pool else None,
+            "easyocr_batcher": self.easyocr_batcher.stats() if self.easyocr_batcher else None,
+        }
+
+    def handle(self, method, args):
+        handler = self.methods.get(method)
+        if handler is None:
+            return ('error', f"Unknown method: {method}")
+        self.requests += 1
+        try:
+            return ('ok', handler(*args))
+        except Exception as e:
+            logger.error(f"❌ {method} gagal: {e}")
+            return ('error', f"{type(e).__name__}: {e}")
+
+    def serve_connection(self, conn):
+        """Satu thread per koneksi client; request dalam satu koneksi diproses berurutan"""
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self.handle(method, args))
+
+
+def _listener_args(address):
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return (host or '127.0.0.1', int(port)), 'AF_INET'
+    if os.path.exists(address):
+        os.remove(address)  # socket sisa proses sebelumnya
+    return address, 'AF_UNIX'
+
+
+def _listen(address, family, authkey):
+    """Listener RPC; Unix socket dibuat dengan umask ketat supaya tidak ada jeda sebelum chmod"""
+    if family != 'AF_UNIX':
+        return Listener(address, family=family, authkey=authkey)
+    old_umask = os.umask(0o117)
+    try:
+        listener = Listener(address, family=family, authkey=authkey)
+    finally:
+        os.umask(old_umask)
+    os.chmod(address, 0o660)
+    return listener
+
+
+def main():
+    address, family = _listener_args(OCR_RPC_ADDRESS)
+    authkey = OCR_RPC_AUTHKEY.encode() or None
+    if not authkey:
+        if family == 'AF_INET':
+            logger.error("❌ OCR_RPC_AUTHKEY wajib untuk listener TCP: tanpa authkey siapa pun yang bisa connect dapat mengirim pickle")
+            sys.exit(1)
+        logger.warning("⚠️ OCR_RPC_AUTHKEY kosong: Unix socket hanya dilindungi permission file, set authkey")
+
+    logger.info(f"🚀 Memuat engine OCR: {', '.join(OCR_WORKER_ENGINES)}")
+    worker = OcrWorker(OCR_WORKER_ENGINES)
+
+    with _listen(address, family, authkey) as listener:
+        logger.info(f"✅ OCR worker siap di {OCR_RPC_ADDRESS} (pid {os.getpid()})")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Client gagal autentikasi / putus saat handshake
+                logger.warning(f"⚠️ Koneksi ditolak: {e}")
+                continue
+            threading.Thread(target=worker.serve_connection, args=(conn,), daemon=True).start()
+
+
+if __name__ == '__main__':
+    main()
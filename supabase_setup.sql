@@ -65,10 +65,171 @@ CREATE INDEX IF NOT EXISTS idx_ppn_keluaran_no_faktur ON ppn_keluaran(no_faktur)
 CREATE INDEX IF NOT EXISTS idx_ppn_keluaran_created_at ON ppn_keluaran(created_at);
 
 -- Indexes for bukti_setor
-CREATE INDEX IF NOT EXISTS idx_bukti_setor_tanggal ON bukti_setor(tanggal);
+-- Summary per tahun/bulan (range tanggal) dibaca dari index saja: lihat migrations/001
+CREATE INDEX IF NOT EXISTS idx_bukti_setor_tanggal_jumlah ON bukti_setor(tanggal) INCLUDE (jumlah);
 CREATE INDEX IF NOT EXISTS idx_bukti_setor_kode_setor ON bukti_setor(kode_setor);
 CREATE INDEX IF NOT EXISTS idx_bukti_setor_created_at ON bukti_setor(created_at);
 
+-- Keyset pagination history: ORDER BY created_at DESC, id DESC + WHERE (created_at, id) < cursor
+CREATE INDEX IF NOT EXISTS idx_ppn_masukan_created_at_id ON ppn_masukan(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_ppn_keluaran_created_at_id ON ppn_keluaran(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_bukti_setor_created_at_id ON bukti_setor(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_ppn_masukan_npwp_created_at ON ppn_masukan(npwp_lawan_transaksi, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_ppn_keluaran_npwp_created_at ON ppn_keluaran(npwp_lawan_transaksi, created_at, id);
+
+-- Versi data per tabel, dinaikkan oleh save/delete (kunci cache export bukti setor)
+CREATE TABLE IF NOT EXISTS data_version (
+    nama VARCHAR(50) PRIMARY KEY,
+    versi BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Idempotency-Key untuk save faktur (/api/save-faktur, /api/process, /api/process-batch)
+-- status_code NULL = request masih diproses; key lebih lama dari IDEMPOTENCY_KEY_TTL dihapus service
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    endpoint VARCHAR(100) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys(created_at);
+
+-- ========================================
+-- REKAP BULANAN (SUMMARY PER BULAN)
+-- ========================================
+
+-- Rekap per (tahun, bulan, jenis): jenis = ppn_masukan, ppn_keluaran, bukti_setor
+CREATE TABLE IF NOT EXISTS rekap_bulanan (
+    tahun INTEGER NOT NULL,
+    bulan INTEGER NOT NULL,
+    jenis VARCHAR(20) NOT NULL,
+    jumlah_dokumen INTEGER NOT NULL DEFAULT 0,
+    total_dpp DECIMAL(18,2) NOT NULL DEFAULT 0,
+    total_ppn DECIMAL(18,2) NOT NULL DEFAULT 0,
+    total_jumlah DECIMAL(18,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (tahun, bulan, jenis)
+);
+
+-- Trigger per statement pada tabel sumber menjaga rekap tetap sinkron (lihat migrations/002)
+CREATE OR REPLACE FUNCTION rekap_bulanan_faktur() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+        FROM new_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               -COUNT(*), -SUM(dpp), -SUM(ppn), 0, NOW()
+        FROM old_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rekap_bulanan_bukti_setor() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               COUNT(*), 0, 0, SUM(jumlah), NOW()
+        FROM new_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO rekap_bulanan AS r
+            (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+        SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, TG_TABLE_NAME,
+               -COUNT(*), 0, 0, -SUM(jumlah), NOW()
+        FROM old_rows GROUP BY 1, 2
+        ON CONFLICT (tahun, bulan, jenis) DO UPDATE SET
+            jumlah_dokumen = r.jumlah_dokumen + EXCLUDED.jumlah_dokumen,
+            total_dpp = r.total_dpp + EXCLUDED.total_dpp,
+            total_ppn = r.total_ppn + EXCLUDED.total_ppn,
+            total_jumlah = r.total_jumlah + EXCLUDED.total_jumlah,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Hitung ulang seluruh rekap dari tabel sumber (backfill / perbaikan manual)
+CREATE OR REPLACE FUNCTION rekap_bulanan_rebuild() RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE ppn_masukan, ppn_keluaran, bukti_setor IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM rekap_bulanan;
+    INSERT INTO rekap_bulanan (tahun, bulan, jenis, jumlah_dokumen, total_dpp, total_ppn, total_jumlah, updated_at)
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_masukan',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_masukan GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'ppn_keluaran',
+           COUNT(*), SUM(dpp), SUM(ppn), 0, NOW()
+    FROM ppn_keluaran GROUP BY 1, 2
+    UNION ALL
+    SELECT EXTRACT(YEAR FROM tanggal)::int, EXTRACT(MONTH FROM tanggal)::int, 'bukti_setor',
+           COUNT(*), 0, 0, SUM(jumlah), NOW()
+    FROM bukti_setor GROUP BY 1, 2;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_insert ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_insert AFTER INSERT ON ppn_masukan
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_update ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_update AFTER UPDATE ON ppn_masukan
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_masukan_delete ON ppn_masukan;
+CREATE TRIGGER trg_rekap_ppn_masukan_delete AFTER DELETE ON ppn_masukan
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_insert ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_insert AFTER INSERT ON ppn_keluaran
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_update ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_update AFTER UPDATE ON ppn_keluaran
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+DROP TRIGGER IF EXISTS trg_rekap_ppn_keluaran_delete ON ppn_keluaran;
+CREATE TRIGGER trg_rekap_ppn_keluaran_delete AFTER DELETE ON ppn_keluaran
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_faktur();
+
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_insert ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_insert AFTER INSERT ON bukti_setor
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_update ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_update AFTER UPDATE ON bukti_setor
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+DROP TRIGGER IF EXISTS trg_rekap_bukti_setor_delete ON bukti_setor;
+CREATE TRIGGER trg_rekap_bukti_setor_delete AFTER DELETE ON bukti_setor
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION rekap_bulanan_bukti_setor();
+
+SELECT rekap_bulanan_rebuild();
+
 -- ========================================
 -- ROW LEVEL SECURITY (OPTIONAL)
 -- ========================================
@@ -94,13 +255,14 @@ CREATE INDEX IF NOT EXISTS idx_bukti_setor_created_at ON bukti_setor(created_at)
 SELECT table_name, table_schema 
 FROM information_schema.tables 
 WHERE table_schema = 'public' 
-  AND table_name IN ('ppn_masukan', 'ppn_keluaran', 'bukti_setor')
+  AND table_name IN ('ppn_masukan', 'ppn_keluaran', 'bukti_setor', 'rekap_bulanan')
 ORDER BY table_name;
 
 -- Check table structures
 \d ppn_masukan;
 \d ppn_keluaran;
 \d bukti_setor;
+\d rekap_bulanan;
 
 -- ========================================
 -- SAMPLE DATA (OPTIONAL FOR TESTING)
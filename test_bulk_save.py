@@ -0,0 +1,103 @@
+# ========================================
+# BULK SAVE BUKTI SETOR TEST
+# ========================================
+# bulk_save_bukti_setor dijalankan dengan SQLite (jalur INSERT ... RETURNING;
+# jalur COPY hanya untuk PostgreSQL).
+
+import sys
+from pathlib import Path
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent / "bukti-setor-service"))
+
+from models import db, BuktiSetor
+from bukti_setor.services.bulk_save import bulk_save_bukti_setor
+from bukti_setor.services.data_version import get_data_version
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'bukti_setor.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _item(kode_setor="411211", tanggal="2024-05-02", jumlah="1500000"):
+    return {"kode_setor": kode_setor, "tanggal": tanggal, "jumlah": jumlah}
+
+
+def test_inserts_all_valid_items_in_payload_order(app):
+    items = [_item(jumlah="100"), _item(jumlah="200"), _item(kode_setor="411128")]
+    results, summary = bulk_save_bukti_setor(items)
+
+    assert [result["status"] for result in results] == ["inserted"] * 3
+    assert [result["index"] for result in results] == [0, 1, 2]
+    saved = {row.id: row for row in db.session.execute(db.select(BuktiSetor)).scalars()}
+    assert [saved[result["id"]].jumlah for result in results] == [Decimal("100"), Decimal("200"), Decimal("1500000")]
+    assert summary == {"total": 3, "inserted": 3, "duplicate": 0, "invalid": 0, "skipped": 0}
+    assert get_data_version("bukti_setor") == 1
+
+
+def test_invalid_items_are_reported_and_valid_ones_saved(app):
+    items = [_item(), {"kode_setor": "", "tanggal": "02-05-2024", "jumlah": "abc"}, "bukan object", _item(jumlah="-5")]
+    results, summary = bulk_save_bukti_setor(items)
+
+    assert [result["status"] for result in results] == ["inserted", "invalid", "invalid", "invalid"]
+    assert len(results[1]["errors"]) == 3
+    assert results[2]["errors"] == ["item harus berupa object"]
+    assert summary["inserted"] == 1 and summary["invalid"] == 3
+    assert db.session.query(BuktiSetor).count() == 1
+
+
+def test_strict_mode_saves_nothing_when_any_item_is_invalid(app):
+    results, summary = bulk_save_bukti_setor([_item(), _item(tanggal="kemarin")], strict=True)
+
+    assert [result["status"] for result in results] == ["skipped", "invalid"]
+    assert summary["skipped"] == 1 and summary["invalid"] == 1
+    assert db.session.query(BuktiSetor).count() == 0
+    assert get_data_version("bukti_setor") == 0
+
+
+def test_duplicates_within_payload_are_skipped(app):
+    items = [_item(), _item(jumlah="1500000.00"), _item(jumlah="99")]
+    results, summary = bulk_save_bukti_setor(items)
+
+    assert results[1] == {"index": 1, "status": "duplicate", "duplicate_of_index": 0}
+    assert summary["inserted"] == 2 and summary["duplicate"] == 1
+    assert db.session.query(BuktiSetor).count() == 2
+
+
+def test_duplicates_against_database_return_existing_id(app):
+    first, _ = bulk_save_bukti_setor([_item()])
+    results, summary = bulk_save_bukti_setor([_item(), _item(tanggal="2024-06-01")])
+
+    assert results[0] == {"index": 0, "status": "duplicate", "id": first[0]["id"]}
+    assert results[1]["status"] == "inserted"
+    assert summary["duplicate"] == 1 and summary["inserted"] == 1
+    assert db.session.query(BuktiSetor).count() == 2
+    assert get_data_version("bukti_setor") == 2
+
+
+def test_nothing_new_does_not_bump_data_version(app):
+    bulk_save_bukti_setor([_item()])
+    results, summary = bulk_save_bukti_setor([_item()])
+
+    assert results[0]["status"] == "duplicate"
+    assert summary["inserted"] == 0
+    assert get_data_version("bukti_setor") == 1
+
+
+def test_saved_values_are_normalized(app):
+    results, _ = bulk_save_bukti_setor([_item(kode_setor="  411211 ", jumlah=1500000.456)])
+    saved = db.session.get(BuktiSetor, results[0]["id"])
+
+    assert saved.kode_setor == "411211"
+    assert saved.tanggal == date(2024, 5, 2)
+    assert saved.jumlah == Decimal("1500000.46")
@@ -0,0 +1,144 @@
+# ========================================
+# IDEMPOTENCY-KEY TEST (FAKTUR SERVICE)
+# ========================================
+# Decorator idempotent() dijalankan pada app Flask kecil dengan SQLite,
+# jadi tidak butuh PostgreSQL / OCR engine.
+
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, jsonify, request
+
+sys.path.insert(0, str(Path(__file__).parent / "faktur-service"))
+
+import idempotency
+from idempotency import idempotent
+from models import db, IdempotencyKey
+
+
+@pytest.fixture
+def client(tmp_path):
+    """App dengan satu endpoint /save yang menghitung berapa kali view benar-benar dijalankan"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'idempotency.db'}"
+    db.init_app(app)
+    calls = []
+
+    @app.route('/save', methods=['POST'])
+    @idempotent("save")
+    def save():
+        calls.append(request.get_json())
+        status = int(request.args.get('status', 201))
+        return jsonify({"status": "ok", "call": len(calls)}), status
+
+    with app.app_context():
+        db.create_all()
+    test_client = app.test_client()
+    test_client.app = app
+    test_client.calls = calls
+    return test_client
+
+
+def _key(client, key):
+    with client.app.app_context():
+        return db.session.get(IdempotencyKey, key)
+
+
+def test_without_header_every_request_is_processed(client):
+    for _ in range(2):
+        response = client.post('/save', json={"no_faktur": "A"})
+        assert response.status_code == 201
+        assert 'Idempotent-Replayed' not in response.headers
+    assert len(client.calls) == 2
+
+
+def test_retry_with_same_key_replays_stored_response(client):
+    headers = {'Idempotency-Key': 'k1'}
+    first = client.post('/save', json={"no_faktur": "A"}, headers=headers)
+    retry = client.post('/save', json={"no_faktur": "A"}, headers=headers)
+
+    assert len(client.calls) == 1
+    assert retry.status_code == first.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert _key(client, 'k1').status_code == 201
+
+
+def test_same_key_with_different_body_is_rejected(client):
+    headers = {'Idempotency-Key': 'k1'}
+    client.post('/save', json={"no_faktur": "A"}, headers=headers)
+    response = client.post('/save', json={"no_faktur": "B"}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.get_json()['error_code'] == 'IDEMPOTENCY_KEY_REUSED'
+    assert len(client.calls) == 1
+
+
+def test_request_still_in_progress_returns_409(client):
+    client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    with client.app.app_context():
+        db.session.execute(db.update(IdempotencyKey).values(status_code=None, response_body=None))
+        db.session.commit()
+
+    response = client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '5'
+    assert len(client.calls) == 1
+
+
+def test_stale_claim_is_taken_over(client):
+    client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    stale = datetime.utcnow() - timedelta(seconds=idempotency.IDEMPOTENCY_LOCK_TIMEOUT + 60)
+    with client.app.app_context():
+        db.session.execute(db.update(IdempotencyKey).values(status_code=None, created_at=stale))
+        db.session.commit()
+
+    response = client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(client.calls) == 2
+
+
+@pytest.mark.parametrize("status", [202, 409, 413, 429, 500, 503])
+def test_transient_responses_release_the_key(client, status):
+    headers = {'Idempotency-Key': 'k1'}
+    first = client.post(f'/save?status={status}', json={"no_faktur": "A"}, headers=headers)
+    retry = client.post(f'/save?status={status}', json={"no_faktur": "A"}, headers=headers)
+
+    assert first.status_code == retry.status_code == status
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert len(client.calls) == 2
+    assert _key(client, 'k1') is None
+
+
+@pytest.mark.parametrize("status", [200, 400, 404, 422])
+def test_deterministic_responses_are_replayed(client, status):
+    headers = {'Idempotency-Key': 'k1'}
+    client.post(f'/save?status={status}', json={"no_faktur": "A"}, headers=headers)
+    retry = client.post(f'/save?status={status}', json={"no_faktur": "A"}, headers=headers)
+
+    assert retry.status_code == status
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert len(client.calls) == 1
+
+
+def test_expired_keys_are_purged(client, monkeypatch):
+    client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    expired = datetime.utcnow() - timedelta(seconds=idempotency.IDEMPOTENCY_KEY_TTL + 60)
+    with client.app.app_context():
+        db.session.execute(db.update(IdempotencyKey).values(created_at=expired))
+        db.session.commit()
+    monkeypatch.setattr(idempotency, '_last_purge', 0.0)
+
+    response = client.post('/save', json={"no_faktur": "A"}, headers={'Idempotency-Key': 'k1'})
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(client.calls) == 2
+
+
+def test_key_too_long_is_rejected(client):
+    response = client.post('/save', json={}, headers={'Idempotency-Key': 'x' * 256})
+    assert response.status_code == 400
+    assert response.get_json()['error_code'] == 'INVALID_IDEMPOTENCY_KEY'
+    assert client.calls == []